@@ -0,0 +1,291 @@
+"""
+Batch QR generation: many payloads per run, encoded in parallel worker processes.
+
+Payloads come from a CSV file, a JSON Lines file or the session_tokens table
+of one exam session. Every code is written as <row>_<name>.png in the output
+directory (.svg with --format svg), so the same input always produces the
+same filenames, and a manifest.csv maps each file back to its payload.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from render import EXTENSIONS, FORMAT_PNG, RenderOptions, disk_cache, render
+
+DEFAULT_COLUMNS = ("payload", "url", "token")
+MANIFEST_NAME = "manifest.csv"
+MAX_NAME_CHARS = 60
+MYSQL_DEFAULT_PORT = 3306
+
+SESSION_TOKENS_SQL = """
+SELECT token, role
+FROM session_tokens
+WHERE exam_session_id = %s
+ORDER BY role, token
+"""
+
+SESSION_TOKENS_ROLE_SQL = """
+SELECT token, role
+FROM session_tokens
+WHERE exam_session_id = %s AND role = %s
+ORDER BY token
+"""
+
+
+@dataclass(frozen=True)
+class Payload:
+    index: int
+    text: str
+    name: str = ""
+    seat: str = ""
+
+
+@dataclass
+class BatchResult:
+    count: int
+    bytes_written: int
+    seconds: float
+    workers: int
+    cache_hits: int = 0
+
+    @property
+    def codes_per_second(self) -> float:
+        return self.count / self.seconds if self.seconds > 0 else float("inf")
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", value).strip("-.")[:MAX_NAME_CHARS]
+
+
+def output_name(payload: Payload, width: int, fmt: str = FORMAT_PNG) -> str:
+    slug = _slug(payload.name)
+    stem = f"{payload.index:0{width}d}_{slug}" if slug else f"{payload.index:0{width}d}"
+    return stem + EXTENSIONS[fmt]
+
+
+def _pick_column(fields: Sequence[str], column: str | None, source: str) -> str:
+    if column:
+        if column not in fields:
+            raise SystemExit(f"{source} has no column {column!r}; columns: {', '.join(fields)}.")
+        return column
+    for candidate in DEFAULT_COLUMNS:
+        if candidate in fields:
+            return candidate
+    if not fields:
+        raise SystemExit(f"{source} has no columns.")
+    return fields[0]
+
+
+def _payloads_from_rows(
+    rows: Iterable[Dict[str, object]],
+    column: str | None,
+    name_column: str | None,
+    template: str | None,
+    source: str,
+    seat_column: str | None = None,
+) -> List[Payload]:
+    payloads: List[Payload] = []
+    picked: str | None = None
+    for number, row in enumerate(rows, start=1):
+        if template:
+            try:
+                text = template.format(**row)
+            except KeyError as exc:
+                raise SystemExit(f"{source} row {number} has no field {exc} used by --template.") from None
+        else:
+            if picked is None:
+                picked = _pick_column(list(row), column, source)
+            value = row.get(picked)
+            text = "" if value is None else str(value)
+        text = text.strip()
+        if not text:
+            raise SystemExit(f"{source} row {number} has an empty payload.")
+        name = str(row.get(name_column) or "") if name_column else ""
+        seat = str(row.get(seat_column) or "") if seat_column else ""
+        payloads.append(Payload(index=number, text=text, name=name, seat=seat))
+    return payloads
+
+
+def read_csv(
+    path: Path,
+    column: str | None,
+    name_column: str | None,
+    template: str | None,
+    seat_column: str | None = None,
+) -> List[Payload]:
+    with path.open(newline="", encoding="utf-8-sig") as handle:
+        return _payloads_from_rows(csv.DictReader(handle), column, name_column, template, str(path), seat_column)
+
+
+def _jsonl_rows(path: Path) -> Iterable[Dict[str, object]]:
+    with path.open(encoding="utf-8") as handle:
+        for number, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise SystemExit(f"{path} line {number} is not valid JSON: {exc}") from None
+            yield value if isinstance(value, dict) else {"payload": value}
+
+
+def read_jsonl(
+    path: Path,
+    column: str | None,
+    name_column: str | None,
+    template: str | None,
+    seat_column: str | None = None,
+) -> List[Payload]:
+    return _payloads_from_rows(_jsonl_rows(path), column, name_column, template, str(path), seat_column)
+
+
+def _connect(db_url: str):
+    scheme = urlsplit(db_url).scheme.lower().split("+", 1)[0] if "://" in db_url else "postgresql"
+    if scheme in ("postgres", "postgresql"):
+        try:
+            import psycopg
+        except ImportError:
+            raise SystemExit("PostgreSQL databases need the psycopg package (pip install psycopg[binary]).") from None
+        return psycopg.connect(db_url)
+    if scheme in ("mysql", "mariadb"):
+        try:
+            import pymysql
+        except ImportError:
+            raise SystemExit("MySQL databases need the PyMySQL package (pip install PyMySQL).") from None
+        parts = urlsplit(db_url)
+        options = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        kwargs = {
+            "host": parts.hostname or "localhost",
+            "port": parts.port or MYSQL_DEFAULT_PORT,
+            "user": unquote(parts.username or ""),
+            "password": unquote(parts.password or ""),
+            "database": unquote(parts.path.lstrip("/")) or None,
+            "charset": options.get("charset", "utf8mb4"),
+        }
+        if options.get("unix_socket"):
+            kwargs["unix_socket"] = options["unix_socket"]
+        return pymysql.connect(**kwargs)
+    raise SystemExit(f"Unsupported database URL scheme {scheme!r}; use postgresql:// or mysql://.")
+
+
+def read_session_tokens(
+    db_url: str,
+    exam_session_id: str,
+    role: str,
+    name_column: str | None,
+    template: str | None,
+    seat_column: str | None = None,
+) -> List[Payload]:
+    conn = _connect(db_url)
+    try:
+        cur = conn.cursor()
+        if role == "all":
+            cur.execute(SESSION_TOKENS_SQL, (exam_session_id,))
+        else:
+            cur.execute(SESSION_TOKENS_ROLE_SQL, (exam_session_id, role))
+        rows = [{"token": token, "role": token_role, "exam_session_id": exam_session_id} for token, token_role in cur.fetchall()]
+        cur.close()
+    finally:
+        conn.close()
+    if not rows:
+        raise SystemExit(f"No {'' if role == 'all' else role + ' '}tokens found for exam session {exam_session_id}.")
+    return _payloads_from_rows(rows, "token", name_column or "token", template, "session_tokens", seat_column)
+
+
+def _render_chunk(
+    jobs: Sequence[Tuple[str, str]],
+    options: RenderOptions,
+    fmt: str,
+    cache_dir: str | None,
+) -> Tuple[int, int, int]:
+    cache = disk_cache(cache_dir) if cache_dir else None
+    hits_before = cache.stats.disk_hits if cache is not None else 0
+    written = 0
+    for text, path in jobs:
+        data = render(text, fmt, options, cache)
+        Path(path).write_bytes(data)
+        written += len(data)
+    hits = cache.stats.disk_hits - hits_before if cache is not None else 0
+    return len(jobs), written, hits
+
+
+def render_batch(
+    payloads: Sequence[Payload],
+    output_dir: Path,
+    options: RenderOptions,
+    workers: int = 0,
+    fmt: str = FORMAT_PNG,
+    cache_dir: Path | None = None,
+) -> BatchResult:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    width = max(4, len(str(len(payloads))))
+    jobs = [(payload.text, str(output_dir / output_name(payload, width, fmt))) for payload in payloads]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    chunk_size = max(1, math.ceil(len(jobs) / (workers * 4)))
+    chunks = [jobs[start : start + chunk_size] for start in range(0, len(jobs), chunk_size)]
+
+    cache = str(cache_dir) if cache_dir else None
+    started = time.perf_counter()
+    if workers == 1:
+        results = [_render_chunk(chunk, options, fmt, cache) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            count = len(chunks)
+            results = list(executor.map(_render_chunk, chunks, [options] * count, [fmt] * count, [cache] * count))
+    seconds = time.perf_counter() - started
+
+    with (output_dir / MANIFEST_NAME).open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["index", "file", "name", "payload"])
+        for payload, (_, path) in zip(payloads, jobs):
+            writer.writerow([payload.index, Path(path).name, payload.name, payload.text])
+
+    return BatchResult(
+        count=sum(count for count, _, _ in results),
+        bytes_written=sum(size for _, size, _ in results),
+        seconds=seconds,
+        workers=workers,
+        cache_hits=sum(hits for _, _, hits in results),
+    )
+
+
+def load_payloads(args: argparse.Namespace) -> List[Payload]:
+    if args.csv:
+        return read_csv(args.csv, args.column, args.name_column, args.template, args.seat_column)
+    if args.jsonl:
+        return read_jsonl(args.jsonl, args.column, args.name_column, args.template, args.seat_column)
+    db_url = args.db_url or os.environ.get("DATABASE_URL")
+    if not db_url:
+        raise SystemExit("--exam-session-id needs --db-url or the DATABASE_URL environment variable.")
+    return read_session_tokens(
+        db_url, args.exam_session_id, args.role, args.name_column, args.template, args.seat_column
+    )
+
+
+def run_batch(args: argparse.Namespace) -> BatchResult:
+    if args.text:
+        raise SystemExit("Pass either text to encode or a batch source, not both.")
+    payloads = load_payloads(args)
+    options = RenderOptions(box_size=args.box_size, border=args.border, error_correction=args.error_correction)
+    output_dir = args.output_dir.resolve()
+    result = render_batch(payloads, output_dir, options, args.workers, args.format, args.cache_dir)
+    cached = f", {result.cache_hits} from cache" if args.cache_dir else ""
+    print(
+        f"QR batch generated: {result.count} code(s) in {output_dir} "
+        f"in {result.seconds:.2f}s ({result.codes_per_second:,.0f} codes/s, "
+        f"{result.bytes_written / 1024:,.0f} KiB, {result.workers} worker(s){cached})."
+    )
+    return result
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Benchmark QR generation stage by stage.
+
+For every payload length and error correction level the payload is encoded
+(add_data + make), then rasterized at each box size with qrcode's
+make_image() and with the rasterizers in raster.py, then written out as PNG,
+SVG and a module matrix. Medians are reported per stage, and every
+rasterizer is checked pixel-for-pixel against make_image().
+
+Usage:
+  python bench_qr.py
+  python bench_qr.py --quick --json bench_qr.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+from raster import RASTER_NUMPY, RASTER_PIL, RASTER_QRCODE, has_numpy, rasterize, reference_image, same_pixels
+from render import ERROR_CORRECTION, FORMAT_MATRIX, FORMAT_PNG, FORMAT_SVG, build_qr, matrix_to_bytes, matrix_to_svg
+
+PAYLOAD_LENGTHS = (16, 64, 256, 1024)
+BOX_SIZES = (1, 4, 10, 25)
+QUICK_PAYLOAD_LENGTHS = (16, 256)
+QUICK_ERROR_CORRECTION = ("M", "H")
+QUICK_BOX_SIZES = (4, 25)
+PAYLOAD_PREFIX = "https://exam.example/join?token="
+
+
+@dataclass
+class BenchRow:
+    length: int
+    error_correction: str
+    version: int
+    modules: int
+    fmt: str
+    box_size: int | None
+    encode_ms: float
+    raster_ms: Dict[str, float] = field(default_factory=dict)
+    output_ms: float = 0.0
+    pixels_match: bool | None = None
+
+    @property
+    def total_ms(self) -> float:
+        raster = self.raster_ms.get(RASTER_NUMPY, self.raster_ms.get(RASTER_PIL, 0.0))
+        return self.encode_ms + raster + self.output_ms
+
+    @property
+    def codes_per_second(self) -> float:
+        return 1000 / self.total_ms if self.total_ms > 0 else float("inf")
+
+
+def payload(length: int, seed: int) -> str:
+    body = ""
+    counter = 0
+    while len(PAYLOAD_PREFIX) + len(body) < length:
+        body += hashlib.sha256(f"{seed}:{counter}".encode("ascii")).hexdigest()
+        counter += 1
+    return (PAYLOAD_PREFIX + body)[:length]
+
+
+def _median_ms(fn: Callable[[int], object], repeat: int) -> float:
+    timings = []
+    for index in range(repeat):
+        started = time.perf_counter()
+        fn(index)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _png_bytes(image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def bench_case(length: int, error_correction: str, box_sizes: Sequence[int], repeat: int, border: int) -> List[BenchRow]:
+    texts = [payload(length, index) for index in range(repeat)]
+    codes = [build_qr(text, 1, border, error_correction) for text in texts]
+    encode_ms = _median_ms(lambda index: build_qr(texts[index], 1, border, error_correction), repeat)
+    matrices = [qr.get_matrix() for qr in codes]
+    version = codes[0].version
+    modules = len(matrices[0])
+
+    rasterizers = [RASTER_PIL] + ([RASTER_NUMPY] if has_numpy() else [])
+    rows: List[BenchRow] = []
+    for box_size in box_sizes:
+        sized = [build_qr(text, box_size, border, error_correction) for text in texts]
+        row = BenchRow(length, error_correction, version, modules, FORMAT_PNG, box_size, encode_ms)
+        row.raster_ms[RASTER_QRCODE] = _median_ms(lambda index: reference_image(sized[index]), repeat)
+        references = [reference_image(qr) for qr in sized]
+        matches = True
+        for name in rasterizers:
+            row.raster_ms[name] = _median_ms(lambda index: rasterize(matrices[index], box_size, name), repeat)
+            matches = matches and all(
+                same_pixels(rasterize(matrix, box_size, name), reference)
+                for matrix, reference in zip(matrices, references)
+            )
+        row.pixels_match = matches
+        images = [rasterize(matrix, box_size) for matrix in matrices]
+        row.output_ms = _median_ms(lambda index: _png_bytes(images[index]), repeat)
+        rows.append(row)
+
+    rows.append(
+        BenchRow(
+            length,
+            error_correction,
+            version,
+            modules,
+            FORMAT_SVG,
+            None,
+            encode_ms,
+            output_ms=_median_ms(lambda index: matrix_to_svg(matrices[index], 10), repeat),
+        )
+    )
+    rows.append(
+        BenchRow(
+            length,
+            error_correction,
+            version,
+            modules,
+            FORMAT_MATRIX,
+            None,
+            encode_ms,
+            output_ms=_median_ms(lambda index: matrix_to_bytes(matrices[index]), repeat),
+        )
+    )
+    return rows
+
+
+def format_report(rows: Sequence[BenchRow]) -> str:
+    def ms(value: float | None) -> str:
+        return "-" if value is None else f"{value:,.2f}"
+
+    lines = [
+        f"{'len':>5} {'ecl':>3} {'ver':>3} {'fmt':>6} {'box':>3} {'encode':>8} "
+        f"{'qrcode':>8} {'pil':>8} {'numpy':>8} {'output':>8} {'total':>8} {'codes/s':>8}  pixels"
+    ]
+    for row in rows:
+        match = "-" if row.pixels_match is None else ("same" if row.pixels_match else "DIFFERENT")
+        lines.append(
+            f"{row.length:>5} {row.error_correction:>3} {row.version:>3} {row.fmt:>6} "
+            f"{'-' if row.box_size is None else row.box_size:>3} {ms(row.encode_ms):>8} "
+            f"{ms(row.raster_ms.get(RASTER_QRCODE)):>8} {ms(row.raster_ms.get(RASTER_PIL)):>8} "
+            f"{ms(row.raster_ms.get(RASTER_NUMPY)):>8} {ms(row.output_ms):>8} {ms(row.total_ms):>8} "
+            f"{row.codes_per_second:>8,.0f}  {match}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Time QR encoding, rasterizing and output per payload length, error correction level and box size."
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Payloads per case; medians are reported (default: 5).")
+    parser.add_argument("--border", type=int, default=4, help="Border thickness in boxes (default: 4).")
+    parser.add_argument("--quick", action="store_true", help="Run a reduced grid (2 lengths, M/H, box 4 and 25).")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the results as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.repeat < 1:
+        print("--repeat must be at least 1.", file=sys.stderr)
+        return 2
+    lengths = QUICK_PAYLOAD_LENGTHS if args.quick else PAYLOAD_LENGTHS
+    levels = QUICK_ERROR_CORRECTION if args.quick else tuple(ERROR_CORRECTION)
+    box_sizes = QUICK_BOX_SIZES if args.quick else BOX_SIZES
+    if not has_numpy():
+        print("numpy is not installed; the NumPy rasterizer is skipped.")
+
+    rows: List[BenchRow] = []
+    for length in lengths:
+        for level in levels:
+            rows.extend(bench_case(length, level, box_sizes, args.repeat, args.border))
+            print(f"Benchmarked {length}-character payloads at level {level}.", file=sys.stderr)
+    print(format_report(rows))
+
+    if args.json is not None:
+        payload_rows = [dict(asdict(row), total_ms=row.total_ms) for row in rows]
+        args.json.write_text(json.dumps({"rows": payload_rows}, indent=2) + "\n", encoding="utf-8")
+
+    mismatches = [row for row in rows if row.pixels_match is False]
+    if mismatches:
+        print(f"{len(mismatches)} case(s) rasterized differently from qrcode's make_image().", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
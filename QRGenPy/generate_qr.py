@@ -5,6 +5,9 @@ Generate a QR code image from text (e.g., a Google Form link).
 Usage:
   python generate_qr.py "https://docs.google.com/forms/d/...."
   python generate_qr.py "https://docs.google.com/forms/d/...." --output form_qr.png
+  python generate_qr.py --csv students.csv --output-dir codes
+  python generate_qr.py --exam-session-id <uuid> --db-url mysql://... --output-dir codes
+  python generate_qr.py --csv students.csv --name-column student --sheet room_12.pdf
 """
 
 from __future__ import annotations
@@ -12,22 +15,23 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-import qrcode
+from render import ERROR_CORRECTION, FORMAT_PNG, FORMAT_SVG, RenderOptions, disk_cache, render
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
-        description="Generate a QR code PNG from text or URL."
+        description="Generate a QR code PNG from text or URL, or one PNG per row of a batch."
     )
     parser.add_argument(
         "text",
-        help="Text/URL to encode (Google Form link recommended).",
+        nargs="?",
+        help="Text/URL to encode (Google Form link recommended). Omit it in batch mode.",
     )
     parser.add_argument(
         "-o",
         "--output",
         default="google_form_qr.png",
-        help="Output image filename (default: google_form_qr.png).",
+        help="Output image filename; a .svg name writes SVG (default: google_form_qr.png).",
     )
     parser.add_argument(
         "--box-size",
@@ -41,33 +45,123 @@ def parse_args() -> argparse.Namespace:
         default=4,
         help="Border thickness in boxes (default: 4).",
     )
+    parser.add_argument(
+        "--error-correction",
+        choices=sorted(ERROR_CORRECTION),
+        default="M",
+        help="Error correction level (default: M).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="Reuse codes rendered earlier with the same payload and options from this directory.",
+    )
+
+    batch = parser.add_argument_group("batch mode")
+    source = batch.add_mutually_exclusive_group()
+    source.add_argument("--csv", type=Path, help="CSV file with a header row; one QR code per row.")
+    source.add_argument("--jsonl", type=Path, help="JSON Lines file; one QR code per object or string.")
+    source.add_argument(
+        "--exam-session-id",
+        help="Encode the session_tokens of this exam session (needs --db-url or DATABASE_URL).",
+    )
+    batch.add_argument(
+        "--db-url",
+        help="postgresql:// or mysql:// URL of the session API database (default: $DATABASE_URL).",
+    )
+    batch.add_argument(
+        "--role",
+        choices=("student", "admin", "all"),
+        default="student",
+        help="Token role to encode with --exam-session-id (default: student).",
+    )
+    batch.add_argument(
+        "--column",
+        help="CSV column or JSON field to encode (default: payload, url, token or the first column).",
+    )
+    batch.add_argument(
+        "--name-column",
+        help="CSV column or JSON field used in output filenames (default: the row number only).",
+    )
+    batch.add_argument(
+        "--seat-column",
+        help="CSV column or JSON field with the seat label on sheets (default: the row number).",
+    )
+    batch.add_argument(
+        "--template",
+        help="Build each payload from the row, e.g. 'https://exam.example/join?token={token}'.",
+    )
+    batch.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("qr_codes"),
+        help="Directory for batch output (default: qr_codes).",
+    )
+    batch.add_argument(
+        "--format",
+        choices=(FORMAT_PNG, FORMAT_SVG),
+        default=FORMAT_PNG,
+        help="Batch output format (default: png).",
+    )
+    batch.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes (default: one per CPU core).",
+    )
+
+    sheet = parser.add_argument_group("sheet mode")
+    sheet.add_argument(
+        "--sheet",
+        type=Path,
+        help="Tile the batch onto printable pages: a .pdf file, or a directory for page_0001.png, ...",
+    )
+    sheet.add_argument(
+        "--page-size",
+        choices=("A4", "A3", "Letter"),
+        default="A4",
+        help="Sheet page size (default: A4).",
+    )
+    sheet.add_argument("--columns", type=int, default=3, help="Codes per row on a sheet (default: 3).")
+    sheet.add_argument("--rows", type=int, default=4, help="Rows of codes per sheet (default: 4).")
+    sheet.add_argument(
+        "--dpi",
+        type=int,
+        default=200,
+        help="Sheet resolution; --box-size is the largest module size in pixels at this DPI (default: 200).",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    text = args.text.strip()
+    if args.sheet and not (args.csv or args.jsonl or args.exam_session_id):
+        raise SystemExit("--sheet needs a batch source: --csv, --jsonl or --exam-session-id.")
+    if args.sheet:
+        from sheet import run_sheet
+
+        run_sheet(args)
+        return
+    if args.csv or args.jsonl or args.exam_session_id:
+        from batch import run_batch
+
+        run_batch(args)
+        return
+
+    text = (args.text or "").strip()
     if not text:
         raise SystemExit("Input text is empty.")
 
     if not (text.startswith("http://") or text.startswith("https://")):
         print("Warning: input does not look like a URL. QR will still be generated.")
 
-    qr = qrcode.QRCode(
-        version=None,
-        error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=max(1, args.box_size),
-        border=max(1, args.border),
-    )
-    qr.add_data(text)
-    qr.make(fit=True)
-
-    img = qr.make_image(fill_color="black", back_color="white")
     output_path = Path(args.output).resolve()
-    img.save(output_path)
+    fmt = FORMAT_SVG if output_path.suffix.lower() == ".svg" else FORMAT_PNG
+    options = RenderOptions(args.box_size, args.border, args.error_correction)
+    cache = disk_cache(args.cache_dir) if args.cache_dir else None
+    output_path.write_bytes(render(text, fmt, options, cache))
     print(f"QR generated: {output_path}")
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,78 @@
+"""
+Rasterizers that turn a QR module matrix into a black-and-white image.
+
+qrcode's make_image() draws one rectangle per dark module, which dominates
+the render time at large box sizes. rasterize() instead scales the matrix
+with NumPy array repetition (or Pillow's nearest-neighbour resize when NumPy
+is not installed) and produces the same pixels as make_image().
+
+Usage:
+  from raster import rasterize
+  image = rasterize(qr.get_matrix(), box_size=10)
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+from PIL import Image
+
+RASTER_NUMPY = "numpy"
+RASTER_PIL = "pil"
+RASTER_QRCODE = "qrcode"
+RASTERIZERS = (RASTER_NUMPY, RASTER_PIL, RASTER_QRCODE)
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _require_numpy():
+    numpy = _numpy()
+    if numpy is None:
+        raise RuntimeError("The NumPy rasterizer needs the optional numpy package (pip install numpy).")
+    return numpy
+
+
+def has_numpy() -> bool:
+    return _numpy() is not None
+
+
+def default_rasterizer() -> str:
+    return RASTER_NUMPY if has_numpy() else RASTER_PIL
+
+
+def rasterize_numpy(matrix: List[List[bool]], box_size: int) -> Image.Image:
+    np = _require_numpy()
+    size = len(matrix) * box_size
+    light = ~np.asarray(matrix, dtype=bool)
+    packed = np.packbits(np.repeat(light, box_size, axis=1), axis=1)
+    return Image.frombytes("1", (size, size), np.repeat(packed, box_size, axis=0).tobytes())
+
+
+def rasterize_pil(matrix: List[List[bool]], box_size: int) -> Image.Image:
+    modules = len(matrix)
+    image = Image.new("1", (modules, modules), 1)
+    image.putdata([0 if cell else 1 for row in matrix for cell in row])
+    return image.resize((modules * box_size, modules * box_size), Image.Resampling.NEAREST)
+
+
+def rasterize(matrix: List[List[bool]], box_size: int, rasterizer: str | None = None) -> Image.Image:
+    rasterizer = rasterizer or default_rasterizer()
+    if rasterizer == RASTER_NUMPY:
+        return rasterize_numpy(matrix, box_size)
+    if rasterizer == RASTER_PIL:
+        return rasterize_pil(matrix, box_size)
+    raise ValueError(f"Unknown rasterizer {rasterizer!r}; use {RASTER_NUMPY} or {RASTER_PIL}.")
+
+
+def reference_image(qr) -> Image.Image:
+    return qr.make_image(fill_color="black", back_color="white").get_image()
+
+
+def same_pixels(left: Image.Image, right: Image.Image) -> bool:
+    return left.mode == right.mode and left.size == right.size and left.tobytes() == right.tobytes()
@@ -0,0 +1,322 @@
+"""
+Importable QR rendering API.
+
+render() returns the encoded code as PNG bytes, SVG bytes or a module matrix
+without touching the filesystem. Results are cached by content: the key is a
+hash of the payload, error correction level, box size and border, and the
+cache keeps an in-memory LRU tier in front of an optional on-disk tier.
+
+Usage:
+  from render import RenderOptions, render
+  png = render("https://exam.example/join?token=S-1234")
+  svg = render("S-1234", "svg", RenderOptions(box_size=8, border=2))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import qrcode
+
+from raster import rasterize
+
+FORMAT_PNG = "png"
+FORMAT_SVG = "svg"
+FORMAT_MATRIX = "matrix"
+FORMATS = (FORMAT_PNG, FORMAT_SVG, FORMAT_MATRIX)
+EXTENSIONS = {FORMAT_PNG: ".png", FORMAT_SVG: ".svg", FORMAT_MATRIX: ".txt"}
+
+ERROR_CORRECTION = {
+    "L": qrcode.constants.ERROR_CORRECT_L,
+    "M": qrcode.constants.ERROR_CORRECT_M,
+    "Q": qrcode.constants.ERROR_CORRECT_Q,
+    "H": qrcode.constants.ERROR_CORRECT_H,
+}
+
+CACHE_KEY_VERSION = 1
+MEMORY_CACHE_ENTRIES = 1024
+MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+DISK_CACHE_BYTES = 512 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    box_size: int = 10
+    border: int = 4
+    error_correction: str = "M"
+
+    def normalized(self) -> RenderOptions:
+        if self.error_correction not in ERROR_CORRECTION:
+            raise ValueError(
+                f"Unknown error correction level {self.error_correction!r}; use one of {', '.join(ERROR_CORRECTION)}."
+            )
+        return RenderOptions(max(1, self.box_size), max(1, self.border), self.error_correction)
+
+
+def build_qr(text: str, box_size: int = 10, border: int = 4, error_correction: str = "M") -> qrcode.QRCode:
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=ERROR_CORRECTION[error_correction],
+        box_size=max(1, box_size),
+        border=max(1, border),
+    )
+    qr.add_data(text)
+    qr.make(fit=True)
+    return qr
+
+
+def encode_matrix(text: str, options: RenderOptions | None = None) -> List[List[bool]]:
+    options = (options or RenderOptions()).normalized()
+    return build_qr(text, options.box_size, options.border, options.error_correction).get_matrix()
+
+
+def render_png(text: str, options: RenderOptions | None = None) -> bytes:
+    options = (options or RenderOptions()).normalized()
+    qr = build_qr(text, options.box_size, options.border, options.error_correction)
+    buffer = io.BytesIO()
+    rasterize(qr.get_matrix(), options.box_size).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def matrix_to_svg(matrix: List[List[bool]], box_size: int) -> bytes:
+    size = len(matrix)
+    path = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            path.append(f"M{start},{y}h{x - start}v1h-{x - start}z")
+    pixels = size * box_size
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path fill="#000" d="{"".join(path)}"/></svg>\n'
+    ).encode("utf-8")
+
+
+def matrix_to_bytes(matrix: List[List[bool]]) -> bytes:
+    return "".join("".join("1" if cell else "0" for cell in row) + "\n" for row in matrix).encode("ascii")
+
+
+def matrix_from_bytes(data: bytes) -> List[List[bool]]:
+    return [[cell == "1" for cell in line] for line in data.decode("ascii").splitlines()]
+
+
+def _render_uncached(text: str, fmt: str, options: RenderOptions) -> bytes:
+    if fmt == FORMAT_PNG:
+        return render_png(text, options)
+    matrix = encode_matrix(text, options)
+    if fmt == FORMAT_SVG:
+        return matrix_to_svg(matrix, options.box_size)
+    return matrix_to_bytes(matrix)
+
+
+def cache_key(text: str, fmt: str, options: RenderOptions) -> str:
+    box_size = 1 if fmt == FORMAT_MATRIX else options.box_size
+    material = json.dumps(
+        [CACHE_KEY_VERSION, fmt, text, options.error_correction, box_size, options.border],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / total if total else 0.0
+
+
+class RenderCache:
+    def __init__(
+        self,
+        memory_entries: int = MEMORY_CACHE_ENTRIES,
+        memory_bytes: int = MEMORY_CACHE_BYTES,
+        disk_dir: str | Path | None = None,
+        disk_bytes: int = DISK_CACHE_BYTES,
+    ) -> None:
+        self.memory_entries = memory_entries
+        self.memory_bytes = memory_bytes
+        self.disk_dir = Path(disk_dir).expanduser().resolve() if disk_dir else None
+        self.disk_bytes = disk_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = 0
+        self._disk_size: int | None = None
+
+    def get(self, key: str, fmt: str) -> bytes | None:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return data
+        data = self._read_disk(key, fmt)
+        with self._lock:
+            if data is None:
+                self.stats.misses += 1
+                return None
+            self.stats.disk_hits += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, fmt: str, data: bytes) -> None:
+        with self._lock:
+            self._remember(key, data)
+        self._write_disk(key, fmt, data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            self.stats = CacheStats()
+
+    def memory_usage(self) -> Tuple[int, int]:
+        with self._lock:
+            return len(self._memory), self._memory_size
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes or self.memory_entries < 1:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= len(previous)
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while len(self._memory) > self.memory_entries or self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _disk_path(self, key: str, fmt: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}{EXTENSIONS[fmt]}"
+
+    def _read_disk(self, key: str, fmt: str) -> bytes | None:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key, fmt)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def _write_disk(self, key: str, fmt: str, data: bytes) -> None:
+        if self.disk_dir is None or len(data) > self.disk_bytes:
+            return
+        path = self._disk_path(key, fmt)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            existed = path.exists()
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = self._scan_disk_size()
+            elif not existed:
+                self._disk_size += len(data)
+            if self._disk_size > self.disk_bytes:
+                self._evict_disk()
+
+    def _disk_files(self) -> List[Path]:
+        return [path for path in self.disk_dir.glob("??/*") if path.suffix in EXTENSIONS.values()]
+
+    def _scan_disk_size(self) -> int:
+        total = 0
+        for path in self._disk_files():
+            try:
+                total += path.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def _evict_disk(self) -> None:
+        entries: List[Tuple[float, int, Path]] = []
+        for path in self._disk_files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.disk_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        self._disk_size = total
+
+
+default_cache = RenderCache()
+_disk_caches: Dict[Path, RenderCache] = {}
+_disk_caches_lock = threading.Lock()
+
+
+def disk_cache(directory: str | Path, disk_bytes: int = DISK_CACHE_BYTES) -> RenderCache:
+    path = Path(directory).expanduser().resolve()
+    with _disk_caches_lock:
+        cache = _disk_caches.get(path)
+        if cache is None:
+            cache = RenderCache(disk_dir=path, disk_bytes=disk_bytes)
+            _disk_caches[path] = cache
+        return cache
+
+
+def render(
+    text: str,
+    fmt: str = FORMAT_PNG,
+    options: RenderOptions | None = None,
+    cache: RenderCache | None = default_cache,
+) -> bytes:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown QR output format {fmt!r}; use one of {', '.join(FORMATS)}.")
+    if not text:
+        raise ValueError("QR payload is empty.")
+    options = (options or RenderOptions()).normalized()
+    if cache is None:
+        return _render_uncached(text, fmt, options)
+    key = cache_key(text, fmt, options)
+    data = cache.get(key, fmt)
+    if data is None:
+        data = _render_uncached(text, fmt, options)
+        cache.put(key, fmt, data)
+    return data
+
+
+def render_matrix(
+    text: str,
+    options: RenderOptions | None = None,
+    cache: RenderCache | None = default_cache,
+) -> List[List[bool]]:
+    return matrix_from_bytes(render(text, FORMAT_MATRIX, options, cache))
@@ -0,0 +1,321 @@
+"""
+Printable QR sheets: many codes per page with seat and student labels.
+
+Pages are rendered one at a time (in parallel worker processes when more than
+one core is available) and written out as soon as they are ready, either as
+pages of one PDF or as page_0001.png, page_0002.png, ... in a directory, so
+memory use does not grow with the number of codes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from batch import Payload, load_payloads
+from raster import rasterize
+from render import RenderOptions, disk_cache, render_matrix
+
+PAGE_SIZES_MM = {"A4": (210.0, 297.0), "A3": (297.0, 420.0), "Letter": (215.9, 279.4)}
+DEFAULT_DPI = 200
+MARGIN_MM = 10.0
+LABEL_POINTS = 9
+CELL_PADDING_MM = 2.0
+GUIDE_GRAY = 200
+PDF_COMPRESSION = 6
+
+
+@dataclass(frozen=True)
+class SheetLayout:
+    page_size: str = "A4"
+    columns: int = 3
+    rows: int = 4
+    dpi: int = DEFAULT_DPI
+    margin_mm: float = MARGIN_MM
+
+    @property
+    def per_page(self) -> int:
+        return self.columns * self.rows
+
+    def _px(self, mm: float) -> int:
+        return round(mm / 25.4 * self.dpi)
+
+    @property
+    def page_pixels(self) -> Tuple[int, int]:
+        width, height = PAGE_SIZES_MM[self.page_size]
+        return self._px(width), self._px(height)
+
+    @property
+    def margin(self) -> int:
+        return self._px(self.margin_mm)
+
+    @property
+    def padding(self) -> int:
+        return self._px(CELL_PADDING_MM)
+
+    @property
+    def cell_pixels(self) -> Tuple[int, int]:
+        width, height = self.page_pixels
+        return (width - 2 * self.margin) // self.columns, (height - 2 * self.margin) // self.rows
+
+    @property
+    def label_pixels(self) -> int:
+        return max(8, round(self.dpi * LABEL_POINTS / 72))
+
+    @property
+    def code_pixels(self) -> int:
+        cell_width, cell_height = self.cell_pixels
+        return min(cell_width, cell_height - 2 * self.label_pixels - self.padding) - 2 * self.padding
+
+    def validate(self) -> None:
+        if self.page_size not in PAGE_SIZES_MM:
+            raise ValueError(f"Unknown page size {self.page_size!r}; use one of {', '.join(PAGE_SIZES_MM)}.")
+        if self.columns < 1 or self.rows < 1 or self.dpi < 72:
+            raise ValueError("Columns and rows must be at least 1 and the DPI at least 72.")
+        if self.code_pixels < 21:
+            raise ValueError(
+                f"{self.columns}x{self.rows} codes do not fit on a {self.page_size} page at {self.dpi} DPI; "
+                "use fewer columns/rows or a higher DPI."
+            )
+
+
+@dataclass
+class SheetResult:
+    count: int
+    pages: int
+    bytes_written: int
+    seconds: float
+    workers: int
+
+    @property
+    def codes_per_second(self) -> float:
+        return self.count / self.seconds if self.seconds > 0 else float("inf")
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def _fit_text(draw: ImageDraw.ImageDraw, text: str, font, width: int) -> str:
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "...", font=font) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+def render_page(
+    payloads: Sequence[Payload],
+    layout: SheetLayout,
+    options: RenderOptions,
+    cache_dir: str | None = None,
+) -> Image.Image:
+    cache = disk_cache(cache_dir) if cache_dir else None
+    page = Image.new("L", layout.page_pixels, 255)
+    draw = ImageDraw.Draw(page)
+    font = _font(layout.label_pixels)
+    cell_width, cell_height = layout.cell_pixels
+    padding = layout.padding
+    for position, payload in enumerate(payloads):
+        row, column = divmod(position, layout.columns)
+        left = layout.margin + column * cell_width
+        top = layout.margin + row * cell_height
+        draw.rectangle((left, top, left + cell_width - 1, top + cell_height - 1), outline=GUIDE_GRAY)
+
+        matrix = render_matrix(payload.text, options, cache)
+        box_size = min(options.box_size, layout.code_pixels // len(matrix))
+        if box_size < 1:
+            raise ValueError(
+                f"Row {payload.index} needs {len(matrix)} px per code but only {layout.code_pixels} px fit; "
+                "use fewer columns/rows or a higher DPI."
+            )
+        code = rasterize(matrix, box_size)
+        code_top = top + max(padding, (cell_height - code.height - padding // 2 - 2 * layout.label_pixels) // 2)
+        page.paste(code, (left + (cell_width - code.width) // 2, code_top))
+
+        label_top = code_top + code.height + padding // 2
+        for line, text in enumerate((f"Seat {payload.seat or payload.index}", payload.name)):
+            if not text:
+                continue
+            text = _fit_text(draw, text, font, cell_width - 2 * padding)
+            x = left + (cell_width - draw.textlength(text, font=font)) / 2
+            draw.text((x, label_top + line * layout.label_pixels), text, fill=0, font=font)
+    return page
+
+
+def _pdf_page(
+    payloads: Sequence[Payload],
+    layout: SheetLayout,
+    options: RenderOptions,
+    cache_dir: str | None,
+) -> Tuple[int, int, bytes]:
+    page = render_page(payloads, layout, options, cache_dir)
+    return page.width, page.height, zlib.compress(page.tobytes(), PDF_COMPRESSION)
+
+
+def _png_page(
+    payloads: Sequence[Payload],
+    layout: SheetLayout,
+    options: RenderOptions,
+    cache_dir: str | None,
+    path: str,
+) -> int:
+    render_page(payloads, layout, options, cache_dir).save(path, dpi=(layout.dpi, layout.dpi), optimize=True)
+    return os.path.getsize(path)
+
+
+def _pipeline(fn: Callable, calls: Iterable[tuple], workers: int) -> Iterator:
+    if workers == 1:
+        for call in calls:
+            yield fn(*call)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for call in calls:
+            pending.append(executor.submit(fn, *call))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class PdfStreamWriter:
+    def __init__(self, handle: BinaryIO, dpi: int) -> None:
+        self._handle = handle
+        self._dpi = dpi
+        self._offsets = {}
+        self._pages: List[int] = []
+        self._next_object = 3
+        handle.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write_object(self, number: int, body: bytes, stream: bytes | None = None) -> None:
+        self._offsets[number] = self._handle.tell()
+        self._handle.write(f"{number} 0 obj\n".encode("ascii") + body)
+        if stream is not None:
+            self._handle.write(b"\nstream\n" + stream + b"\nendstream")
+        self._handle.write(b"\nendobj\n")
+
+    def add_page(self, width: int, height: int, gray_deflated: bytes) -> None:
+        image, content, page = self._next_object, self._next_object + 1, self._next_object + 2
+        self._next_object += 3
+        width_pt = width * 72 / self._dpi
+        height_pt = height * 72 / self._dpi
+        self._write_object(
+            image,
+            (
+                f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceGray "
+                f"/BitsPerComponent 8 /Filter /FlateDecode /Length {len(gray_deflated)} >>"
+            ).encode("ascii"),
+            gray_deflated,
+        )
+        drawing = f"q {width_pt:.2f} 0 0 {height_pt:.2f} 0 0 cm /Im0 Do Q".encode("ascii")
+        self._write_object(content, f"<< /Length {len(drawing)} >>".encode("ascii"), drawing)
+        self._write_object(
+            page,
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width_pt:.2f} {height_pt:.2f}] "
+                f"/Resources << /XObject << /Im0 {image} 0 R >> >> /Contents {content} 0 R >>"
+            ).encode("ascii"),
+        )
+        self._pages.append(page)
+        self._handle.flush()
+
+    def close(self) -> None:
+        kids = " ".join(f"{page} 0 R" for page in self._pages)
+        self._write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>".encode("ascii"))
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self._handle.tell()
+        size = self._next_object
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{self._offsets[number]:010d} 00000 n \n" for number in range(1, size))
+        lines.append(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n")
+        self._handle.write("".join(lines).encode("ascii"))
+
+
+def _pages(payloads: Sequence[Payload], per_page: int) -> Iterator[Sequence[Payload]]:
+    for start in range(0, len(payloads), per_page):
+        yield payloads[start : start + per_page]
+
+
+def write_sheets(
+    payloads: Sequence[Payload],
+    target: Path,
+    layout: SheetLayout,
+    options: RenderOptions,
+    workers: int = 0,
+    cache_dir: Path | None = None,
+    on_page: Callable[[int, int], None] | None = None,
+) -> SheetResult:
+    layout.validate()
+    options = options.normalized()
+    page_count = (len(payloads) + layout.per_page - 1) // layout.per_page
+    workers = max(1, min(workers or os.cpu_count() or 1, page_count))
+    cache = str(cache_dir) if cache_dir else None
+    started = time.perf_counter()
+    written = 0
+
+    if target.suffix.lower() == ".pdf":
+        target.parent.mkdir(parents=True, exist_ok=True)
+        calls = ((page, layout, options, cache) for page in _pages(payloads, layout.per_page))
+        try:
+            with target.open("wb") as handle:
+                writer = PdfStreamWriter(handle, layout.dpi)
+                for number, (width, height, data) in enumerate(_pipeline(_pdf_page, calls, workers), start=1):
+                    writer.add_page(width, height, data)
+                    if on_page is not None:
+                        on_page(number, page_count)
+                writer.close()
+        except BaseException:
+            target.unlink(missing_ok=True)
+            raise
+        written = target.stat().st_size
+    else:
+        target.mkdir(parents=True, exist_ok=True)
+        width = max(4, len(str(page_count)))
+        calls = (
+            (page, layout, options, cache, str(target / f"page_{number:0{width}d}.png"))
+            for number, page in enumerate(_pages(payloads, layout.per_page), start=1)
+        )
+        for number, size in enumerate(_pipeline(_png_page, calls, workers), start=1):
+            written += size
+            if on_page is not None:
+                on_page(number, page_count)
+
+    return SheetResult(
+        count=len(payloads),
+        pages=page_count,
+        bytes_written=written,
+        seconds=time.perf_counter() - started,
+        workers=workers,
+    )
+
+
+def run_sheet(args: argparse.Namespace) -> SheetResult:
+    if args.text:
+        raise SystemExit("Pass either text to encode or a batch source, not both.")
+    payloads = load_payloads(args)
+    layout = SheetLayout(page_size=args.page_size, columns=args.columns, rows=args.rows, dpi=args.dpi)
+    options = RenderOptions(box_size=args.box_size, border=args.border, error_correction=args.error_correction)
+    target = args.sheet.resolve()
+    try:
+        result = write_sheets(payloads, target, layout, options, args.workers, args.cache_dir)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from None
+    print(
+        f"QR sheets generated: {result.count} code(s) on {result.pages} page(s) in {target} "
+        f"in {result.seconds:.2f}s ({result.codes_per_second:,.0f} codes/s, "
+        f"{result.bytes_written / 1024:,.0f} KiB, {result.workers} worker(s))."
+    )
+    return result
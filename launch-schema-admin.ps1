@@ -7,7 +7,7 @@ $ErrorActionPreference = "Stop"
 $root = Split-Path -Parent $MyInvocation.MyCommand.Path
 $schemaAdminDir = Join-Path $root "schema-admin"
 $buildScript = Join-Path $schemaAdminDir "build.ps1"
-$exePath = Join-Path $schemaAdminDir "dist\\EdufikaSchemaAdmin.exe"
+$exePath = Join-Path $schemaAdminDir "dist\\EdufikaSchemaAdmin\\EdufikaSchemaAdmin.exe"
 
 if (!(Test-Path $schemaAdminDir)) {
     throw "schema-admin directory not found at: $schemaAdminDir"
@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from psycopg import Connection as PgConnection
+from psycopg import errors as pg_errors
+from psycopg import sql as pg_sql
+
+from catalog import CatalogSnapshot, IndexInfo, TableInfo, format_bytes, load_snapshot
+from db import TableRef
+from stats import IndexStats, StatsSample, sample_stats
+
+KIND_MISSING = "missing"
+KIND_DUPLICATE = "duplicate"
+KIND_UNUSED = "unused"
+
+STATEMENT_LIMIT = 100
+MIN_TABLE_ROWS = 10_000
+MIN_ROWS_PER_SEQ_SCAN = 1_000
+MAX_INDEX_COLUMNS = 3
+MIGRATION_SLUG = "index_advisor"
+
+STATEMENTS_SQL = """
+SELECT query, calls, {total} AS total_ms, {mean} AS mean_ms, rows
+FROM pg_stat_statements
+WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+  AND query !~* '^\\s*(EXPLAIN|CREATE|ALTER|DROP|VACUUM|ANALYZE|COPY|SET|SHOW|BEGIN|COMMIT|ROLLBACK)\\M'
+ORDER BY {total} DESC
+LIMIT %(limit)s
+"""
+
+_TABLE_REF = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE|INTO)\s+((?:\"?[A-Za-z_]\w*\"?\.)?\"?[A-Za-z_]\w*\"?)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?",
+    re.IGNORECASE,
+)
+_PREDICATE = re.compile(
+    r"(?:\b([A-Za-z_]\w*)\.)?\b([A-Za-z_]\w*)\s*(=\s*ANY\b|=|<=|>=|<|>|\bIN\b|\bBETWEEN\b|\bIS\s+NULL\b)",
+    re.IGNORECASE,
+)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\s+(?:([A-Za-z_]\w*)\.)?([A-Za-z_]\w*)", re.IGNORECASE)
+_KEYWORDS = {
+    "where", "join", "inner", "left", "right", "full", "cross", "on", "set", "values", "select", "group",
+    "order", "limit", "offset", "returning", "using", "union", "for", "natural", "lateral", "having", "window",
+}
+_INDEX_SHAPE = re.compile(r"\bUSING\s+(\w+)\s+\((.*?)\)(?:\s+INCLUDE\s+\((.*?)\))?\s*(?:WHERE\b.*)?$", re.IGNORECASE)
+_MIGRATION_NUMBER = re.compile(r"^(\d+)_")
+
+
+@dataclass
+class QueryStat:
+    query: str
+    calls: int
+    total_ms: float
+    mean_ms: float
+    rows: int
+
+    @property
+    def summary(self) -> str:
+        collapsed = " ".join(self.query.split())
+        return collapsed if len(collapsed) <= 100 else collapsed[:97] + "..."
+
+
+@dataclass
+class IndexAdvice:
+    kind: str
+    table: TableRef
+    index_name: str
+    columns: List[str]
+    reason: str
+    up_sql: str
+    down_sql: str
+    queries: List[QueryStat] = field(default_factory=list)
+
+    @property
+    def applied_by_default(self) -> bool:
+        return self.kind != KIND_UNUSED
+
+
+@dataclass
+class AdvisorReport:
+    advice: List[IndexAdvice]
+    statements_available: bool
+    notes: List[str] = field(default_factory=list)
+
+    def count(self, kind: str) -> int:
+        return sum(1 for item in self.advice if item.kind == kind)
+
+    def describe(self) -> str:
+        return (
+            f"Index advisor: {self.count(KIND_MISSING)} missing, {self.count(KIND_DUPLICATE)} duplicate, "
+            f"{self.count(KIND_UNUSED)} unused"
+            + ("" if self.statements_available else " (pg_stat_statements unavailable)")
+        )
+
+
+def read_statements(conn: PgConnection, limit: int = STATEMENT_LIMIT) -> List[QueryStat] | None:
+    modern = conn.info.server_version >= 130000
+    query = STATEMENTS_SQL.format(
+        total="total_exec_time" if modern else "total_time",
+        mean="mean_exec_time" if modern else "mean_time",
+    )
+    try:
+        with conn.cursor() as cur:
+            cur.execute(query, {"limit": limit})
+            rows = cur.fetchall()
+    except (pg_errors.UndefinedTable, pg_errors.ObjectNotInPrerequisiteState, pg_errors.InsufficientPrivilege):
+        conn.rollback()
+        return None
+    conn.rollback()
+    return [
+        QueryStat(query=row[0], calls=int(row[1] or 0), total_ms=float(row[2] or 0), mean_ms=float(row[3] or 0), rows=int(row[4] or 0))
+        for row in rows
+    ]
+
+
+def advise(
+    conn: PgConnection,
+    snapshot: CatalogSnapshot | None = None,
+    limit: int = STATEMENT_LIMIT,
+    concurrently: bool = False,
+) -> AdvisorReport:
+    snapshot = snapshot or load_snapshot(conn)
+    sample = sample_stats(conn)
+    statements = read_statements(conn, limit)
+    report = AdvisorReport(advice=[], statements_available=statements is not None)
+    if statements is None:
+        report.notes.append(
+            "pg_stat_statements is not available: add it to shared_preload_libraries and run "
+            "CREATE EXTENSION pg_stat_statements to get missing-index proposals."
+        )
+    else:
+        report.advice += _missing_indexes(snapshot, sample, statements, concurrently, report.notes)
+    duplicates = _duplicate_indexes(snapshot)
+    report.advice += duplicates
+    report.advice += _unused_indexes(snapshot, sample, {item.index_name for item in duplicates})
+    return report
+
+
+def _missing_indexes(
+    snapshot: CatalogSnapshot,
+    sample: StatsSample,
+    statements: Sequence[QueryStat],
+    concurrently: bool,
+    notes: List[str],
+) -> List[IndexAdvice]:
+    by_name: Dict[str, List[TableInfo]] = {}
+    for table in snapshot.tables:
+        by_name.setdefault(table.ref.name, []).append(table)
+
+    candidates: Dict[Tuple[str, Tuple[str, ...]], IndexAdvice] = {}
+    for stat in statements:
+        for table, columns in _statement_candidates(stat.query, snapshot, by_name):
+            stats = sample.tables.get(table.label)
+            if stats is None or table.row_estimate < MIN_TABLE_ROWS or stats.seq_scan == 0:
+                continue
+            rows_per_scan = stats.seq_tup_read // max(stats.seq_scan, 1)
+            if rows_per_scan < MIN_ROWS_PER_SEQ_SCAN or _covered(table, columns):
+                continue
+            key = (table.label, tuple(columns))
+            advice = candidates.get(key)
+            if advice is None:
+                name = _index_name(table, columns)
+                advice = IndexAdvice(
+                    kind=KIND_MISSING,
+                    table=table.ref,
+                    index_name=name,
+                    columns=list(columns),
+                    reason=(
+                        f"{stats.seq_scan:,} sequential scans reading {rows_per_scan:,} rows each "
+                        f"on about {table.row_estimate:,} rows"
+                    ),
+                    up_sql=(
+                        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {_quoted(name)}\n"
+                        f"ON {_qualified(table.ref)} ({', '.join(_quoted(column) for column in columns)});"
+                    ),
+                    down_sql=f"DROP INDEX IF EXISTS {_qualified(TableRef(table.ref.schema, name))};",
+                )
+                candidates[key] = advice
+            advice.queries.append(stat)
+
+    advice_list = sorted(candidates.values(), key=lambda item: -sum(stat.total_ms for stat in item.queries))
+    for item in advice_list:
+        total = sum(stat.total_ms for stat in item.queries)
+        calls = sum(stat.calls for stat in item.queries)
+        item.reason += f"; used by {len(item.queries)} statement(s), {calls:,} calls, {total:,.0f} ms total"
+    if not advice_list and statements:
+        notes.append(
+            f"No missing indexes: no statement filters a table of at least {MIN_TABLE_ROWS:,} rows "
+            f"that is sequentially scanned for {MIN_ROWS_PER_SEQ_SCAN:,}+ rows per scan."
+        )
+    return advice_list
+
+
+def _statement_candidates(
+    query: str, snapshot: CatalogSnapshot, by_name: Dict[str, List[TableInfo]]
+) -> List[Tuple[TableInfo, List[str]]]:
+    aliases: Dict[str, TableInfo] = {}
+    tables: List[TableInfo] = []
+    for match in _TABLE_REF.finditer(query):
+        table = _resolve_table(match.group(1), snapshot, by_name)
+        if table is None:
+            continue
+        tables.append(table)
+        aliases[table.ref.name.lower()] = table
+        alias = match.group(2)
+        if alias and alias.lower() not in _KEYWORDS:
+            aliases[alias.lower()] = table
+    if not tables:
+        return []
+
+    equality: Dict[str, List[str]] = {}
+    ranges: Dict[str, List[str]] = {}
+    where = re.search(r"\b(WHERE|ON)\b", query, re.IGNORECASE)
+    for match in _PREDICATE.finditer(query, where.start() if where else len(query)):
+        table = _column_table(match.group(1), match.group(2), aliases, tables)
+        if table is None:
+            continue
+        operator = match.group(3).upper()
+        bucket = equality if operator.startswith("=") or operator == "IN" or "NULL" in operator else ranges
+        names = bucket.setdefault(table.label, [])
+        if match.group(2) not in names:
+            names.append(match.group(2))
+    for match in _ORDER_BY.finditer(query):
+        table = _column_table(match.group(1), match.group(2), aliases, tables)
+        if table is not None and match.group(2) not in ranges.setdefault(table.label, []):
+            ranges[table.label].append(match.group(2))
+
+    found: List[Tuple[TableInfo, List[str]]] = []
+    for table in {table.label: table for table in tables}.values():
+        columns = list(equality.get(table.label, []))
+        columns += [name for name in ranges.get(table.label, [])[:1] if name not in columns]
+        if columns:
+            found.append((table, columns[:MAX_INDEX_COLUMNS]))
+    return found
+
+
+def _resolve_table(name: str, snapshot: CatalogSnapshot, by_name: Dict[str, List[TableInfo]]) -> TableInfo | None:
+    parts = [part.strip('"') for part in name.split(".")]
+    if len(parts) == 2:
+        return snapshot.table(f"{parts[0]}.{parts[1]}")
+    matches = by_name.get(parts[0], [])
+    public = [table for table in matches if table.ref.schema == "public"]
+    return (public or matches or [None])[0]
+
+
+def _column_table(qualifier: str | None, column: str, aliases: Dict[str, TableInfo], tables: List[TableInfo]) -> TableInfo | None:
+    if qualifier:
+        table = aliases.get(qualifier.lower())
+        return table if table is not None and _has_column(table, column) else None
+    owners = {table.label: table for table in tables if _has_column(table, column)}
+    return next(iter(owners.values())) if len(owners) == 1 else None
+
+
+def _has_column(table: TableInfo, column: str) -> bool:
+    return any(item.name == column for item in table.columns)
+
+
+def _covered(table: TableInfo, columns: Sequence[str]) -> bool:
+    for index in table.indexes:
+        if not index.is_valid or index.is_partial_or_expression:
+            continue
+        if index.columns[: len(columns)] == list(columns):
+            return True
+    return False
+
+
+def _index_name(table: TableInfo, columns: Sequence[str]) -> str:
+    name = f"idx_{table.ref.name}_{'_'.join(columns)}"
+    if len(name.encode("utf-8")) <= 63:
+        return name
+    digest = hashlib.sha1(f"{table.ref.name}:{','.join(columns)}".encode("utf-8")).hexdigest()[:8]
+    return f"{name.encode('utf-8')[:54].decode('utf-8', 'ignore')}_{digest}"
+
+
+def _quoted(name: str) -> str:
+    return pg_sql.Identifier(name).as_string(None)
+
+
+def _qualified(ref: TableRef) -> str:
+    if ref.schema == "public":
+        return _quoted(ref.name)
+    return pg_sql.Identifier(ref.schema, ref.name).as_string(None)
+
+
+def _index_shape(index: IndexInfo) -> Tuple[str, List[str], str] | None:
+    match = _INDEX_SHAPE.search(index.definition)
+    if not match:
+        return None
+    keys = [item.strip() for item in match.group(2).split(",")]
+    return match.group(1).lower(), keys, (match.group(3) or "").strip()
+
+
+def _recreate_sql(index: IndexInfo) -> str:
+    definition = re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX IF NOT EXISTS ", index.definition)
+    return f"{definition};"
+
+
+def _duplicate_indexes(snapshot: CatalogSnapshot) -> List[IndexAdvice]:
+    found: List[IndexAdvice] = []
+    for table in snapshot.tables:
+        shapes = {
+            index.name: _index_shape(index)
+            for index in table.indexes
+            if index.is_valid and not index.is_partial_or_expression
+        }
+        keepers = sorted(
+            (index for index in table.indexes if shapes.get(index.name) is not None),
+            key=lambda index: (not (index.is_unique or index.is_primary), -len(shapes[index.name][1]), index.name),
+        )
+        redundant: set = set()
+        for index in table.indexes:
+            shape = shapes.get(index.name)
+            if shape is None or index.is_unique or index.is_primary:
+                continue
+            method, keys, include = shape
+            for other in keepers:
+                other_shape = shapes.get(other.name)
+                if other.name == index.name or other.name in redundant or other_shape is None:
+                    continue
+                other_method, other_keys, _other_include = other_shape
+                if other_method != method or other_keys[: len(keys)] != keys or include:
+                    continue
+                if len(other_keys) == len(keys) and not other.is_unique and other.name > index.name:
+                    continue
+                redundant.add(index.name)
+                relation = "same columns as" if len(other_keys) == len(keys) else "a leading prefix of"
+                found.append(
+                    IndexAdvice(
+                        kind=KIND_DUPLICATE,
+                        table=table.ref,
+                        index_name=index.name,
+                        columns=list(index.columns),
+                        reason=f"({', '.join(keys)}) is {relation} {other.name}; frees {format_bytes(index.size_bytes)}",
+                        up_sql=f"DROP INDEX IF EXISTS {_qualified(TableRef(table.ref.schema, index.name))};",
+                        down_sql=_recreate_sql(index),
+                    )
+                )
+                break
+    return found
+
+
+def _unused_indexes(snapshot: CatalogSnapshot, sample: StatsSample, skip: set) -> List[IndexAdvice]:
+    usage: Dict[Tuple[str, str], IndexStats] = {(item.schema, item.name): item for item in sample.indexes}
+    found: List[IndexAdvice] = []
+    for table in snapshot.tables:
+        for index in table.indexes:
+            stats = usage.get((table.ref.schema, index.name))
+            if stats is None or not stats.is_unused or index.name in skip:
+                continue
+            found.append(
+                IndexAdvice(
+                    kind=KIND_UNUSED,
+                    table=table.ref,
+                    index_name=index.name,
+                    columns=list(index.columns),
+                    reason=f"no index scans since statistics were reset; {format_bytes(index.size_bytes)}",
+                    up_sql=f"DROP INDEX IF EXISTS {_qualified(TableRef(table.ref.schema, index.name))};",
+                    down_sql=_recreate_sql(index),
+                )
+            )
+    return found
+
+
+def next_migration_number(migrations_dir: str | Path) -> int:
+    numbers = [
+        int(match.group(1))
+        for match in (_MIGRATION_NUMBER.match(path.name) for path in Path(migrations_dir).glob("*.sql"))
+        if match
+    ]
+    return max(numbers, default=0) + 1
+
+
+def write_migration(
+    report: AdvisorReport,
+    migrations_dir: str | Path,
+    slug: str = MIGRATION_SLUG,
+    include_unused: bool = False,
+) -> Tuple[Path, Path]:
+    advice = [item for item in report.advice if item.applied_by_default or include_unused]
+    commented = [item for item in report.advice if item not in advice]
+    if not advice and not commented:
+        raise ValueError("The advisor has no proposals to write.")
+
+    root = Path(migrations_dir).expanduser().resolve()
+    if not root.is_dir():
+        raise ValueError(f"Migrations directory not found: {root}")
+    stem = f"{next_migration_number(root):03d}_{slug}"
+    up_path = root / f"{stem}.sql"
+    down_path = root / f"{stem}.down.sql"
+
+    header = [
+        f"-- Generated by the schema-admin index advisor on {datetime.now():%Y-%m-%d %H:%M}.",
+        "-- Review every statement before applying.",
+    ]
+    up_lines = list(header)
+    down_lines = list(header)
+    for item in advice:
+        up_lines += ["", f"-- {item.kind}: {item.reason}"]
+        up_lines += [f"--   {stat.summary}" for stat in item.queries[:3]]
+        up_lines.append(item.up_sql)
+    for item in commented:
+        up_lines += ["", f"-- {item.kind} (not applied): {item.reason}"]
+        up_lines += [f"-- {line}" for line in item.up_sql.splitlines()]
+    for item in reversed(advice):
+        down_lines += ["", item.down_sql]
+
+    up_path.write_text("\n".join(up_lines) + "\n", encoding="utf-8")
+    down_path.write_text("\n".join(down_lines) + "\n", encoding="utf-8")
+    return up_path, down_path
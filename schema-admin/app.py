@@ -1,5 +1,12 @@
-from ui import run
+import sys
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from cli import main
+
+        raise SystemExit(main())
+
+    from ui import run
+
     run()
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+ROOT = Path(__file__).resolve().parent
+DEFAULT_BASELINE = ROOT / "bench_startup_baseline.json"
+METRICS = ("import_ms", "window_ms", "process_ms")
+LAZY_MODULES = (
+    "psycopg",
+    "pymysql",
+    "pyarrow",
+    "db",
+    "dialects",
+    "pool",
+    "catalog",
+    "migrations",
+    "advisor",
+    "fleet",
+    "grid",
+    "locks",
+    "profiler",
+    "retention",
+    "schemadiff",
+    "seed",
+    "tkinter.filedialog",
+)
+
+PROBE = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import ui
+
+imported = time.perf_counter()
+result = {"import_ms": (imported - start) * 1000, "window_ms": None}
+try:
+    app = ui.SchemaAdminApp()
+except ui.tk.TclError as exc:
+    result["window_error"] = str(exc)
+else:
+    result["window_ms"] = (time.perf_counter() - imported) * 1000
+    app.destroy()
+result["loaded"] = sorted(name for name in sys.argv[1:] if name in sys.modules)
+print(json.dumps(result))
+"""
+
+
+@dataclass
+class StartupRun:
+    import_ms: float
+    window_ms: float | None
+    process_ms: float
+    loaded: List[str]
+    window_error: str | None = None
+
+
+@dataclass
+class MetricComparison:
+    name: str
+    value_ms: float | None
+    baseline_ms: float | None
+    regressed: bool
+
+    @property
+    def change(self) -> float | None:
+        if self.value_ms is None or self.baseline_ms is None or self.baseline_ms <= 0:
+            return None
+        return (self.value_ms - self.baseline_ms) / self.baseline_ms
+
+
+def probe() -> StartupRun:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE, *LAZY_MODULES],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    process_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{completed.stderr.strip()}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return StartupRun(
+        import_ms=float(result["import_ms"]),
+        window_ms=None if result["window_ms"] is None else float(result["window_ms"]),
+        process_ms=process_ms,
+        loaded=list(result["loaded"]),
+        window_error=result.get("window_error"),
+    )
+
+
+def median_metrics(runs: Sequence[StartupRun]) -> Dict[str, float | None]:
+    medians: Dict[str, float | None] = {}
+    for name in METRICS:
+        values = [getattr(run, name) for run in runs if getattr(run, name) is not None]
+        medians[name] = statistics.median(values) if values else None
+    return medians
+
+
+def load_baseline(path: Path) -> Dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_baseline(path: Path, metrics: Dict[str, float | None]) -> None:
+    payload = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "metrics": {name: round(value, 1) for name, value in metrics.items() if value is not None},
+    }
+    path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+
+def compare(
+    metrics: Dict[str, float | None],
+    baseline: Dict,
+    tolerance: float,
+    min_delta_ms: float,
+) -> List[MetricComparison]:
+    known = baseline.get("metrics", {})
+    comparisons: List[MetricComparison] = []
+    for name in METRICS:
+        value = metrics.get(name)
+        baseline_ms = float(known[name]) if name in known else None
+        regressed = (
+            value is not None
+            and baseline_ms is not None
+            and value > baseline_ms * (1 + tolerance)
+            and value - baseline_ms > min_delta_ms
+        )
+        comparisons.append(MetricComparison(name=name, value_ms=value, baseline_ms=baseline_ms, regressed=regressed))
+    return comparisons
+
+
+def format_report(comparisons: Sequence[MetricComparison]) -> str:
+    lines = [f"{'Metric':<12} {'ms':>10} {'baseline':>10} {'change':>8}  status"]
+    for item in comparisons:
+        value = "-" if item.value_ms is None else f"{item.value_ms:,.1f}"
+        baseline = "-" if item.baseline_ms is None else f"{item.baseline_ms:,.1f}"
+        change = "-" if item.change is None else f"{item.change:+.0%}"
+        if item.value_ms is None:
+            status = "skipped"
+        else:
+            status = "SLOWER" if item.regressed else ("new" if item.baseline_ms is None else "ok")
+        lines.append(f"{item.name:<12} {value:>10} {baseline:>10} {change:>8}  {status}")
+    return "\n".join(lines)
+
+
+def parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure how long Schema Admin takes to import and build its window in a fresh interpreter."
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to start; the median is reported.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown, e.g. 0.25 for +25%%.")
+    parser.add_argument("--min-delta-ms", type=float, default=20.0, help="Ignore slowdowns smaller than this.")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the results as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.repeat < 1:
+        print("--repeat must be at least 1.", file=sys.stderr)
+        return 2
+
+    runs: List[StartupRun] = []
+    for run in range(1, args.repeat + 1):
+        try:
+            runs.append(probe())
+        except RuntimeError as exc:
+            print(str(exc), file=sys.stderr)
+            return 1
+        print(f"Run {run}/{args.repeat}: {runs[-1].process_ms:,.1f} ms")
+
+    if runs[0].window_error:
+        print(f"Window not measured: {runs[0].window_error}")
+    metrics = median_metrics(runs)
+    comparisons = compare(metrics, load_baseline(args.baseline), args.tolerance, args.min_delta_ms)
+    print(format_report(comparisons))
+    loaded = sorted({name for run in runs for name in run.loaded})
+
+    if args.json is not None:
+        args.json.write_text(
+            json.dumps(
+                {
+                    "metrics": metrics,
+                    "runs_ms": {name: [getattr(run, name) for run in runs] for name in METRICS},
+                    "loaded_at_startup": loaded,
+                    "regressions": [item.name for item in comparisons if item.regressed],
+                },
+                indent=2,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+    if loaded:
+        print(f"Loaded before first use: {', '.join(loaded)}; these modules must stay lazy.", file=sys.stderr)
+        return 1
+    if args.update_baseline:
+        save_baseline(args.baseline, metrics)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = [item for item in comparisons if item.regressed]
+    if regressions:
+        print(
+            f"{len(regressions)} startup metric(s) slower than baseline (+{args.tolerance:.0%}): "
+            + ", ".join(item.name for item in regressions),
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -25,11 +25,20 @@ $pyinstaller = Join-Path $root ".venv\\Scripts\\pyinstaller.exe"
 & $pyinstaller `
     --noconfirm `
     --clean `
-    --onefile `
+    --onedir `
     --windowed `
     --name EdufikaSchemaAdmin `
     app.py
 
+& $pyinstaller `
+    --noconfirm `
+    --onefile `
+    --console `
+    --exclude-module tkinter `
+    --name schema-admin `
+    cli.py
+
 Write-Host ""
 Write-Host "Build complete:"
-Write-Host "  $root\\dist\\EdufikaSchemaAdmin.exe"
+Write-Host "  $root\\dist\\EdufikaSchemaAdmin\\EdufikaSchemaAdmin.exe"
+Write-Host "  $root\\dist\\schema-admin.exe"
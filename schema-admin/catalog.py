@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List
+
+from psycopg import Connection as PgConnection
+
+from db import ColumnInfo, TableRef
+from dialects import MYSQL, dialect_of
+
+SNAPSHOT_SQL = """
+SELECT
+    n.nspname,
+    c.relname,
+    c.relkind,
+    c.relispartition,
+    GREATEST(c.reltuples, 0)::bigint,
+    pg_table_size(c.oid),
+    pg_indexes_size(c.oid),
+    pg_total_relation_size(c.oid),
+    COALESCE((
+        SELECT json_agg(
+            json_build_array(
+                a.attname,
+                format_type(a.atttypid, a.atttypmod),
+                a.attnotnull,
+                pg_get_expr(d.adbin, d.adrelid)
+            )
+            ORDER BY a.attnum
+        )
+        FROM pg_attribute a
+        LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+        WHERE a.attrelid = c.oid
+          AND a.attnum > 0
+          AND NOT a.attisdropped
+    ), '[]'::json),
+    COALESCE((
+        SELECT json_agg(
+            json_build_array(
+                ic.relname,
+                pg_get_indexdef(i.indexrelid),
+                i.indisunique,
+                i.indisprimary,
+                i.indisvalid,
+                pg_relation_size(i.indexrelid),
+                COALESCE((
+                    SELECT array_agg(att.attname ORDER BY k.ord)
+                    FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+                    JOIN pg_attribute att ON att.attrelid = i.indrelid AND att.attnum = k.attnum
+                    WHERE k.ord <= i.indnkeyatts
+                ), ARRAY[]::name[]),
+                i.indpred IS NOT NULL OR i.indexprs IS NOT NULL
+            )
+            ORDER BY ic.relname
+        )
+        FROM pg_index i
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        WHERE i.indrelid = c.oid
+    ), '[]'::json),
+    COALESCE((
+        SELECT json_agg(
+            json_build_array(con.conname, con.contype, pg_get_constraintdef(con.oid))
+            ORDER BY con.conname
+        )
+        FROM pg_constraint con
+        WHERE con.conrelid = c.oid
+    ), '[]'::json)
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('r', 'p')
+  AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+  AND n.nspname NOT LIKE 'pg\\_toast%'
+  AND n.nspname NOT LIKE 'pg\\_temp%'
+ORDER BY n.nspname, c.relname
+"""
+
+MYSQL_TABLES_SQL = """
+SELECT table_schema, table_name, COALESCE(table_rows, 0), COALESCE(data_length, 0), COALESCE(index_length, 0)
+FROM information_schema.tables
+WHERE table_schema = DATABASE() AND table_type = 'BASE TABLE'
+ORDER BY table_name
+"""
+
+MYSQL_COLUMNS_SQL = """
+SELECT table_name, column_name, column_type, is_nullable, column_default, extra
+FROM information_schema.columns
+WHERE table_schema = DATABASE()
+ORDER BY table_name, ordinal_position
+"""
+
+MYSQL_INDEXES_SQL = """
+SELECT table_name, index_name, non_unique, column_name, sub_part, index_type
+FROM information_schema.statistics
+WHERE table_schema = DATABASE()
+ORDER BY table_name, index_name, seq_in_index
+"""
+
+MYSQL_CONSTRAINTS_SQL = """
+SELECT
+    tc.table_name,
+    tc.constraint_name,
+    tc.constraint_type,
+    GROUP_CONCAT(k.column_name ORDER BY k.ordinal_position SEPARATOR ', '),
+    MAX(k.referenced_table_name),
+    GROUP_CONCAT(k.referenced_column_name ORDER BY k.ordinal_position SEPARATOR ', '),
+    MAX(rc.update_rule),
+    MAX(rc.delete_rule)
+FROM information_schema.table_constraints tc
+JOIN information_schema.key_column_usage k
+  ON k.constraint_schema = tc.constraint_schema
+ AND k.constraint_name = tc.constraint_name
+ AND k.table_name = tc.table_name
+LEFT JOIN information_schema.referential_constraints rc
+  ON rc.constraint_schema = tc.constraint_schema
+ AND rc.constraint_name = tc.constraint_name
+ AND rc.table_name = tc.table_name
+WHERE tc.table_schema = DATABASE()
+  AND tc.constraint_type IN ('PRIMARY KEY', 'UNIQUE', 'FOREIGN KEY')
+GROUP BY tc.table_name, tc.constraint_name, tc.constraint_type
+ORDER BY tc.table_name, tc.constraint_name
+"""
+
+MYSQL_CONSTRAINT_KINDS = {"PRIMARY KEY": "p", "UNIQUE": "u", "FOREIGN KEY": "f"}
+
+CONSTRAINT_KINDS = {
+    "p": "PRIMARY KEY",
+    "f": "FOREIGN KEY",
+    "u": "UNIQUE",
+    "c": "CHECK",
+    "x": "EXCLUDE",
+    "t": "TRIGGER",
+}
+
+
+@dataclass
+class IndexInfo:
+    name: str
+    definition: str
+    is_unique: bool
+    is_primary: bool
+    is_valid: bool
+    size_bytes: int
+    columns: List[str]
+    is_partial_or_expression: bool
+
+
+@dataclass
+class ConstraintInfo:
+    name: str
+    kind: str
+    definition: str
+
+    @property
+    def kind_label(self) -> str:
+        return CONSTRAINT_KINDS.get(self.kind, self.kind)
+
+
+@dataclass
+class TableInfo:
+    ref: TableRef
+    kind: str
+    is_partition: bool
+    row_estimate: int
+    table_bytes: int
+    index_bytes: int
+    total_bytes: int
+    columns: List[ColumnInfo] = field(default_factory=list)
+    indexes: List[IndexInfo] = field(default_factory=list)
+    constraints: List[ConstraintInfo] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return self.ref.label
+
+
+@dataclass
+class CatalogSnapshot:
+    tables: List[TableInfo]
+    loaded_at: float = field(default_factory=time.time)
+
+    def __post_init__(self) -> None:
+        self._by_label = {table.label: table for table in self.tables}
+
+    def refs(self) -> List[TableRef]:
+        return [table.ref for table in self.tables]
+
+    def table(self, label: str) -> TableInfo | None:
+        return self._by_label.get(label)
+
+
+def load_snapshot(conn: PgConnection) -> CatalogSnapshot:
+    if dialect_of(conn) is MYSQL:
+        return _load_mysql_snapshot(conn)
+    with conn.cursor() as cur:
+        cur.execute(SNAPSHOT_SQL)
+        rows = cur.fetchall()
+    conn.rollback()
+    return CatalogSnapshot(tables=[_table_from_row(row) for row in rows])
+
+
+def _table_from_row(row) -> TableInfo:
+    (schema, name, kind, is_partition, reltuples, table_bytes, index_bytes, total_bytes, columns, indexes, constraints) = row
+    return TableInfo(
+        ref=TableRef(schema=schema, name=name),
+        kind=str(kind),
+        is_partition=bool(is_partition),
+        row_estimate=int(reltuples or 0),
+        table_bytes=int(table_bytes or 0),
+        index_bytes=int(index_bytes or 0),
+        total_bytes=int(total_bytes or 0),
+        columns=[
+            ColumnInfo(name=item[0], data_type=item[1], is_nullable=not item[2], default_value=item[3])
+            for item in columns
+        ],
+        indexes=[
+            IndexInfo(
+                name=item[0],
+                definition=item[1],
+                is_unique=bool(item[2]),
+                is_primary=bool(item[3]),
+                is_valid=bool(item[4]),
+                size_bytes=int(item[5] or 0),
+                columns=list(item[6] or []),
+                is_partial_or_expression=bool(item[7]),
+            )
+            for item in indexes
+        ],
+        constraints=[ConstraintInfo(name=item[0], kind=item[1], definition=item[2]) for item in constraints],
+    )
+
+
+def _load_mysql_snapshot(conn) -> CatalogSnapshot:
+    with conn.cursor() as cur:
+        cur.execute(MYSQL_TABLES_SQL)
+        table_rows = cur.fetchall()
+        cur.execute(MYSQL_COLUMNS_SQL)
+        column_rows = cur.fetchall()
+        cur.execute(MYSQL_INDEXES_SQL)
+        index_rows = cur.fetchall()
+        cur.execute(MYSQL_CONSTRAINTS_SQL)
+        constraint_rows = cur.fetchall()
+    conn.rollback()
+
+    tables: Dict[str, TableInfo] = {}
+    for schema, name, table_rows_estimate, data_length, index_length in table_rows:
+        tables[name] = TableInfo(
+            ref=TableRef(schema=schema, name=name),
+            kind="r",
+            is_partition=False,
+            row_estimate=int(table_rows_estimate or 0),
+            table_bytes=int(data_length or 0),
+            index_bytes=int(index_length or 0),
+            total_bytes=int(data_length or 0) + int(index_length or 0),
+        )
+
+    for table_name, name, column_type, is_nullable, default_value, extra in column_rows:
+        table = tables.get(table_name)
+        if table is None:
+            continue
+        if "auto_increment" in str(extra or "").lower():
+            default_value = "AUTO_INCREMENT"
+        table.columns.append(
+            ColumnInfo(
+                name=name,
+                data_type=str(column_type),
+                is_nullable=str(is_nullable).upper() == "YES",
+                default_value=None if default_value is None else str(default_value),
+            )
+        )
+
+    index_parts: Dict[tuple, List[tuple]] = {}
+    for table_name, name, non_unique, column_name, sub_part, index_type in index_rows:
+        if table_name in tables:
+            index_parts.setdefault((table_name, name), []).append((non_unique, column_name, sub_part, index_type))
+    for (table_name, name), parts in index_parts.items():
+        is_primary = name == "PRIMARY"
+        is_unique = not int(parts[0][0])
+        keys = [
+            "expression" if column_name is None else column_name + (f"({int(sub_part)})" if sub_part else "")
+            for _non_unique, column_name, sub_part, _index_type in parts
+        ]
+        kind = "PRIMARY KEY" if is_primary else "UNIQUE INDEX" if is_unique else "INDEX"
+        target = "" if is_primary else f"{name} "
+        tables[table_name].indexes.append(
+            IndexInfo(
+                name=name,
+                definition=f"{kind} {target}ON {table_name} USING {str(parts[0][3] or 'BTREE').lower()} ({', '.join(keys)})",
+                is_unique=is_unique,
+                is_primary=is_primary,
+                is_valid=True,
+                size_bytes=0,
+                columns=[column_name for _non_unique, column_name, _sub_part, _index_type in parts if column_name is not None],
+                is_partial_or_expression=any(column_name is None or sub_part for _non_unique, column_name, sub_part, _index_type in parts),
+            )
+        )
+
+    for table_name, name, constraint_type, columns, referenced_table, referenced_columns, on_update, on_delete in constraint_rows:
+        table = tables.get(table_name)
+        if table is None:
+            continue
+        definition = f"{constraint_type} ({columns})"
+        if constraint_type == "FOREIGN KEY":
+            definition += f" REFERENCES {referenced_table}({referenced_columns})"
+            if on_update and on_update != "RESTRICT":
+                definition += f" ON UPDATE {on_update}"
+            if on_delete and on_delete != "RESTRICT":
+                definition += f" ON DELETE {on_delete}"
+        table.constraints.append(
+            ConstraintInfo(name=name, kind=MYSQL_CONSTRAINT_KINDS[constraint_type], definition=definition)
+        )
+
+    return CatalogSnapshot(tables=list(tables.values()))
+
+
+def snapshot_to_dict(snapshot: CatalogSnapshot) -> Dict:
+    return asdict(snapshot)
+
+
+def snapshot_from_dict(node: Dict) -> CatalogSnapshot:
+    tables: List[TableInfo] = []
+    for table in node["tables"]:
+        tables.append(
+            TableInfo(
+                ref=TableRef(**table["ref"]),
+                kind=table["kind"],
+                is_partition=bool(table["is_partition"]),
+                row_estimate=int(table["row_estimate"]),
+                table_bytes=int(table["table_bytes"]),
+                index_bytes=int(table["index_bytes"]),
+                total_bytes=int(table["total_bytes"]),
+                columns=[ColumnInfo(**column) for column in table["columns"]],
+                indexes=[IndexInfo(**index) for index in table["indexes"]],
+                constraints=[ConstraintInfo(**constraint) for constraint in table["constraints"]],
+            )
+        )
+    return CatalogSnapshot(tables=tables, loaded_at=float(node["loaded_at"]))
+
+
+class CatalogCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, CatalogSnapshot] = {}
+
+    def get(self, db_url: str) -> CatalogSnapshot | None:
+        with self._lock:
+            return self._snapshots.get(db_url)
+
+    def put(self, db_url: str, snapshot: CatalogSnapshot) -> None:
+        with self._lock:
+            self._snapshots[db_url] = snapshot
+
+    def load(self, conn: PgConnection, db_url: str, refresh: bool = False) -> CatalogSnapshot:
+        if not refresh:
+            cached = self.get(db_url)
+            if cached is not None:
+                return cached
+        snapshot = load_snapshot(conn)
+        self.put(db_url, snapshot)
+        return snapshot
+
+    def invalidate(self, db_url: str | None = None) -> None:
+        with self._lock:
+            if db_url is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(db_url, None)
+
+
+cache = CatalogCache()
+
+
+def format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "kB", "MB", "GB", "TB"):
+        if abs(value) < 1024 or unit == "TB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{size} B"
@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import asdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from catalog import format_bytes, load_snapshot
+from config import AppConfig, load_config
+from db import EXPORT, TRANSFER_FORMATS, TransferRun, TransferSpec, export_path, parse_table
+from dialects import connect, dialect_for_url
+from migrations import (
+    ApplyOptions,
+    MigrationDriftError,
+    MigrationFile,
+    apply_pending,
+    check_drift,
+    discover_migrations,
+    get_applied_names,
+    pending_migrations,
+    preview_pending_sql,
+    rollback_last,
+)
+from seed import SeedScale, parse_until, seed_database
+from stats import WATCHED_TABLES, sample_stats
+
+__all__ = [
+    "EXIT_OK",
+    "EXIT_FAILED",
+    "EXIT_USAGE",
+    "EXIT_DRIFT",
+    "EXIT_PENDING",
+    "EXIT_INTERRUPTED",
+    "main",
+    "parse_args",
+]
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_DRIFT = 3
+EXIT_PENDING = 4
+EXIT_INTERRUPTED = 130
+
+DB_URL_ENV = "SCHEMA_ADMIN_DB_URL"
+MIGRATIONS_DIR_ENV = "SCHEMA_ADMIN_MIGRATIONS_DIR"
+
+CommandResult = Tuple[int, Dict, str]
+
+
+class _Output:
+    def __init__(self, quiet: bool) -> None:
+        self.quiet = quiet
+
+    def progress(self, message: str) -> None:
+        if not self.quiet:
+            print(message, file=sys.stderr, flush=True)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Path):
+        return str(value)
+    return str(value)
+
+
+def _load_migrations(args: argparse.Namespace) -> List[MigrationFile]:
+    dialect = dialect_for_url(args.db_url)
+    migrations = discover_migrations(args.migrations_dir, dialect)
+    if not migrations:
+        raise ValueError(f"No .sql migration files found in: {dialect.migrations_dir(args.migrations_dir)}")
+    return migrations
+
+
+def _apply_options(args: argparse.Namespace, config: AppConfig) -> ApplyOptions:
+    return ApplyOptions(
+        online=config.online_migrations if args.online is None else args.online,
+        lock_timeout_ms=config.lock_timeout_ms if args.lock_timeout_ms is None else args.lock_timeout_ms,
+        statement_timeout_ms=config.statement_timeout_ms if args.statement_timeout_ms is None else args.statement_timeout_ms,
+        max_retries=config.lock_retries if args.retries is None else args.retries,
+    )
+
+
+def _drift_payload(report) -> Dict:
+    return {
+        "ok": report.ok,
+        "summary": report.describe(),
+        "entries": [asdict(entry) for entry in report.entries],
+    }
+
+
+def cmd_ping(args: argparse.Namespace, output: _Output, config: AppConfig) -> CommandResult:
+    dialect = dialect_for_url(args.db_url)
+    started = time.monotonic()
+    with connect(args.db_url) as conn:
+        version = dialect.server_version(conn)
+    elapsed_ms = (time.monotonic() - started) * 1000
+    payload = {"dialect": dialect.name, "server_version": version, "elapsed_ms": round(elapsed_ms, 1)}
+    return EXIT_OK, payload, f"Connection OK ({elapsed_ms:.0f} ms). Server: {version}"
+
+
+def cmd_tables(args: argparse.Namespace, output: _Output, config: AppConfig) -> CommandResult:
+    with connect(args.db_url) as conn:
+        snapshot = load_snapshot(conn)
+    tables = []
+    lines = [f"{'Table':<48} {'rows':>12} {'size':>10}"]
+    for table in snapshot.tables:
+        item = {
+            "name": table.label,
+            "kind": table.kind,
+            "is_partition": table.is_partition,
+            "row_estimate": table.row_estimate,
+            "table_bytes": table.table_bytes,
+            "index_bytes": table.index_bytes,
+            "total_bytes": table.total_bytes,
+        }
+        if args.detail:
+            item["columns"] = [asdict(column) for column in table.columns]
+            item["indexes"] = [asdict(index) for index in table.indexes]
+            item["constraints"] = [asdict(constraint) for constraint in table.constraints]
+        tables.append(item)
+        lines.append(f"{table.label:<48} {table.row_estimate:>12,} {format_bytes(table.total_bytes):>10}")
+        if args.detail:
+            for column in table.columns:
+                null = "" if column.is_nullable else " NOT NULL"
+                default = f" DEFAULT {column.default_value}" if column.default_value is not None else ""
+                lines.append(f"    {column.name} {column.data_type}{null}{default}")
+            for index in table.indexes:
+                lines.append(f"    {index.definition}")
+    return EXIT_OK, {"tables": tables}, "\n".join(lines)
+
+
+def cmd_preview(args: argparse.Namespace, output: _Output, config: AppConfig) -> CommandResult:
+    migrations = _load_migrations(args)
+    with connect(args.db_url) as conn:
+        drift = check_drift(conn, migrations)
+        sql = preview_pending_sql(conn, migrations)
+        pending = [migration.name for migration in pending_migrations(migrations, get_applied_names(conn))]
+        conn.rollback()
+    if not drift.ok:
+        output.progress(f"Warning: {drift.describe()}")
+    payload = {"pending": pending, "drift": _drift_payload(drift), "sql": sql}
+    code = EXIT_PENDING if args.check and pending else EXIT_OK
+    return code, payload, sql.rstrip()
+
+
+def cmd_apply(args: argparse.Namespace, output: _Output, config: AppConfig) -> CommandResult:
+    migrations = _load_migrations(args)
+    options = _apply_options(args, config)
+    with connect(args.db_url) as conn:
+        names = apply_pending(
+            conn,
+            migrations,
+            dry_run=args.dry_run,
+            progress=output.progress,
+            options=options,
+            allow_drift=args.allow_drift,
+        )
+    verb = "Would apply" if args.dry_run else "Applied"
+    payload = {"dry_run": args.dry_run, "online": options.online, "migrations": names}
+    return EXIT_OK, payload, f"{verb} {len(names)} migration(s): {', '.join(names) if names else '(none)'}"
+
+
+def cmd_rollback(args: argparse.Namespace, output: _Output, config: AppConfig) -> CommandResult:
+    migrations = _load_migrations(args)
+    with connect(args.db_url) as conn:
+        name = rollback_last(conn, migrations, dry_run=args.dry_run, progress=output.progress)
+    verb = "Would roll back" if args.dry_run else "Rolled back"
+    return EXIT_OK, {"dry_run": args.dry_run, "migration": name}, f"{verb} {name}"
+
+
+def cmd_drift(args: argparse.Namespace, output: _Output, config: AppConfig) -> CommandResult:
+    migrations = _load_migrations(args)
+    with connect(args.db_url) as conn:
+        report = check_drift(conn, migrations)
+    lines = [report.describe()]
+    for entry in report.problems:
+        current = entry.current_checksum[:12] if entry.current_checksum else "file not found"
+        lines.append(f"  {entry.status.upper()}: {entry.name} (recorded {entry.recorded_checksum[:12]}, on disk {current})")
+    return (EXIT_OK if report.ok else EXIT_DRIFT), _drift_payload(report), "\n".join(lines)
+
+
+def cmd_stats(args: argparse.Namespace, output: _Output, config: AppConfig) -> CommandResult:
+    dialect_for_url(args.db_url).require("Table statistics")
+    tables = list(args.tables) or (list(WATCHED_TABLES) if args.watched else None)
+    with connect(args.db_url) as conn:
+        sample = sample_stats(conn, tables)
+    items = []
+    lines = [f"{'Table':<40} {'rows':>12} {'dead':>7} {'size':>10} {'seq scans':>10} {'idx scans':>10}"]
+    for stats in sorted(sample.tables.values(), key=lambda item: item.total_bytes, reverse=True):
+        item = asdict(stats)
+        item["dead_ratio"] = round(stats.dead_ratio, 4)
+        item["seq_scan_ratio"] = round(stats.seq_scan_ratio, 4)
+        items.append(item)
+        lines.append(
+            f"{stats.label:<40} {stats.live_rows:>12,} {stats.dead_ratio:>7.1%} {format_bytes(stats.total_bytes):>10} "
+            f"{stats.seq_scan:>10,} {stats.idx_scan:>10,}"
+        )
+    unused = [index for index in sample.indexes if index.is_unused]
+    for index in unused:
+        lines.append(f"unused index {index.table_label}.{index.name} ({format_bytes(index.size_bytes)})")
+    payload = {
+        "sampled_at": sample.sampled_at,
+        "tables": items,
+        "unused_indexes": [asdict(index) for index in unused],
+    }
+    return EXIT_OK, payload, "\n".join(lines)
+
+
+def cmd_export(args: argparse.Namespace, output: _Output, config: AppConfig) -> CommandResult:
+    dialect_for_url(args.db_url).require("Export")
+    if args.workers < 1:
+        raise ValueError("--workers must be at least 1.")
+    tables = [parse_table(item) for value in args.tables for item in value.split(",") if item.strip()]
+    if not tables:
+        raise ValueError("Name at least one table to export.")
+    Path(args.dir).mkdir(parents=True, exist_ok=True)
+    specs = [
+        TransferSpec(table, str(export_path(args.dir, table, args.format, args.session)), EXPORT, args.format, args.where)
+        for table in tables
+    ]
+    results = TransferRun(
+        args.db_url,
+        specs,
+        max_workers=args.workers,
+        exam_session_id=args.session,
+        progress=output.progress,
+    ).run()
+    payload = {
+        "results": [
+            {
+                "table": result.table.label,
+                "path": result.path,
+                "format": result.file_format,
+                "rows": result.rows,
+                "bytes": result.bytes,
+                "seconds": round(result.seconds, 3),
+                "error": result.error or None,
+            }
+            for result in results
+        ]
+    }
+    failed = [result for result in results if not result.ok]
+    text = f"Exported {len(results) - len(failed)}/{len(results)} table(s) to {args.dir}."
+    return (EXIT_FAILED if failed else EXIT_OK), payload, text
+
+
+def cmd_seed(args: argparse.Namespace, output: _Output, config: AppConfig) -> CommandResult:
+    dialect_for_url(args.db_url).require("Seeding")
+    if args.workers < 0:
+        raise ValueError("--workers must be at least 0.")
+    scale = SeedScale(sessions=args.sessions, students=args.students, heartbeats=args.heartbeats, days=args.days)
+    scale.validate()
+    output.progress(f"Seeding about {scale.expected_heartbeats:,} heartbeats (seed {args.seed})")
+    result = seed_database(
+        args.db_url,
+        scale,
+        seed=args.seed,
+        until=parse_until(args.until),
+        workers=args.workers,
+        truncate=args.truncate,
+        skip_fk_checks=args.skip_fk_checks,
+        defer_indexes=args.defer_indexes,
+        progress=output.progress,
+    )
+    payload = asdict(result)
+    payload["rows_per_second"] = round(result.rows_per_second)
+    text = (
+        f"Seeded {result.sessions:,} sessions, {result.tokens:,} tokens, {result.bindings:,} bindings, "
+        f"{result.heartbeats:,} heartbeats and {result.violations:,} violations in {result.seconds:.1f}s "
+        f"({result.rows_per_second:,.0f} rows/s, {result.workers} worker(s))."
+    )
+    return EXIT_OK, payload, text
+
+
+COMMANDS: Dict[str, Callable[[argparse.Namespace, _Output, AppConfig], CommandResult]] = {
+    "ping": cmd_ping,
+    "tables": cmd_tables,
+    "preview": cmd_preview,
+    "apply": cmd_apply,
+    "rollback": cmd_rollback,
+    "drift": cmd_drift,
+    "stats": cmd_stats,
+    "export": cmd_export,
+    "seed": cmd_seed,
+}
+
+
+def _add_apply_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--online", action="store_true", default=None, help="Apply with the online mode.")
+    parser.add_argument("--offline", action="store_false", dest="online", help="Apply in one transaction.")
+    parser.add_argument("--lock-timeout-ms", type=int, default=None)
+    parser.add_argument("--statement-timeout-ms", type=int, default=None)
+    parser.add_argument("--retries", type=int, default=None, help="lock_timeout retries in online mode.")
+
+
+def parse_args(argv: Sequence[str] | None, config: AppConfig | None = None) -> argparse.Namespace:
+    config = config or load_config()
+    parser = argparse.ArgumentParser(
+        prog="schema-admin",
+        description="Inspect and migrate Edufika databases without the GUI.",
+    )
+    parser.add_argument("--db-url", default=os.environ.get(DB_URL_ENV) or config.db_url)
+    parser.add_argument("--migrations-dir", default=os.environ.get(MIGRATIONS_DIR_ENV) or config.migrations_dir)
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON on stdout.")
+    parser.add_argument("--quiet", action="store_true", help="Do not print progress on stderr.")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    commands.add_parser("ping", help="Test the connection and print the server version.")
+
+    tables = commands.add_parser("tables", help="List tables from a catalog snapshot.")
+    tables.add_argument("--detail", action="store_true", help="Include columns, indexes and constraints.")
+
+    preview = commands.add_parser("preview", help="Print the SQL of the pending migrations.")
+    preview.add_argument("--check", action="store_true", help=f"Exit with {EXIT_PENDING} when migrations are pending.")
+
+    apply = commands.add_parser("apply", help="Apply the pending migrations.")
+    apply.add_argument("--dry-run", action="store_true")
+    apply.add_argument("--allow-drift", action="store_true", help="Apply even when applied migrations changed on disk.")
+    _add_apply_options(apply)
+
+    rollback = commands.add_parser("rollback", help="Roll back the latest applied migration.")
+    rollback.add_argument("--dry-run", action="store_true")
+
+    commands.add_parser("drift", help=f"Compare applied migrations with the files; exit {EXIT_DRIFT} on drift.")
+
+    stats = commands.add_parser("stats", help="Sample table and index statistics.")
+    stats.add_argument("tables", nargs="*", help="Table names (default: all tables).")
+    stats.add_argument("--watched", action="store_true", help="Only the high-churn tables.")
+
+    export = commands.add_parser("export", help="Export tables to CSV, gzip CSV or Parquet files.")
+    export.add_argument("tables", nargs="+", help="Table names, for example heartbeats or public.violations.")
+    export.add_argument("--dir", required=True, help="Output directory.")
+    export.add_argument("--format", choices=TRANSFER_FORMATS, default=TRANSFER_FORMATS[0])
+    export.add_argument("--where", default=None, help="Row filter, for example \"created_at > now() - interval '1 day'\".")
+    export.add_argument("--session", default=None, help="Only rows of this exam_session_id.")
+    export.add_argument("--workers", type=int, default=4)
+
+    seed = commands.add_parser("seed", help="Fill the Edufika tables with synthetic data.")
+    seed.add_argument("--sessions", type=int, default=100)
+    seed.add_argument("--students", type=int, default=40, help="Student bindings per session.")
+    seed.add_argument("--heartbeats", type=int, default=200, help="Average heartbeats per student.")
+    seed.add_argument("--days", type=int, default=30, help="Spread sessions over this many days.")
+    seed.add_argument("--until", default=None, help="Last day of data, YYYY-MM-DD (default: today, UTC).")
+    seed.add_argument("--seed", type=int, default=1, help="The same seed and --until produce the same rows.")
+    seed.add_argument("--workers", type=int, default=0, help="Parallel writers (default: one per CPU).")
+    seed.add_argument("--truncate", action="store_true", help="Empty the seeded tables first.")
+    seed.add_argument(
+        "--skip-fk-checks",
+        action="store_true",
+        help="Load with session_replication_role = replica (superuser only).",
+    )
+    seed.add_argument(
+        "--defer-indexes",
+        action="store_true",
+        help="Drop the secondary heartbeats/violations indexes during the load and rebuild them after.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    config = load_config()
+    args = parse_args(argv, config)
+    output = _Output(args.quiet)
+    try:
+        code, payload, text = COMMANDS[args.command](args, output, config)
+    except KeyboardInterrupt:
+        return _fail(args, EXIT_INTERRUPTED, "Interrupted.")
+    except MigrationDriftError as exc:
+        return _fail(args, EXIT_DRIFT, str(exc), {"drift": _drift_payload(exc.report)})
+    except ValueError as exc:
+        return _fail(args, EXIT_USAGE, str(exc))
+    except Exception as exc:  # noqa: BLE001
+        return _fail(args, EXIT_FAILED, str(exc).strip() or type(exc).__name__)
+
+    if args.json:
+        print(json.dumps({"ok": code == EXIT_OK, "command": args.command, **payload}, indent=2, default=_json_default))
+    elif text:
+        print(text)
+    return code
+
+
+def _fail(args: argparse.Namespace, code: int, message: str, extra: Dict | None = None) -> int:
+    if args.json:
+        payload = {"ok": False, "command": args.command, "error": message, **(extra or {})}
+        print(json.dumps(payload, indent=2, default=_json_default))
+    else:
+        print(f"schema-admin {args.command}: {message}", file=sys.stderr)
+    return code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
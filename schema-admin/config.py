@@ -1,14 +1,76 @@
 from __future__ import annotations
 
+import hashlib
 import json
-from dataclasses import dataclass
+import os
+import re
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, List
+
+FORMAT_CSV = "csv"
+FORMAT_CSV_GZIP = "csv.gz"
+FORMAT_PARQUET = "parquet"
+TRANSFER_FORMATS = (FORMAT_CSV_GZIP, FORMAT_CSV, FORMAT_PARQUET)
+
+DESTINATION_ARCHIVE = "archive"
+DESTINATION_FILE = "file"
+DESTINATION_DELETE = "delete"
+DESTINATIONS = (DESTINATION_ARCHIVE, DESTINATION_FILE, DESTINATION_DELETE)
+
+PERIODS = {"day": "1 day", "week": "1 week", "month": "1 month"}
+
+GRID_PAGE_SIZE = 100
+
+CATALOG_CACHE_ENTRIES = 8
+
+_URL_PASSWORD = re.compile(r"(://[^:/@]+:)[^@]*@")
+
+_catalog_cache_lock = threading.Lock()
+
+
+@dataclass
+class Target:
+    name: str
+    db_url: str
+    enabled: bool = True
+
+
+@dataclass
+class RetentionPolicy:
+    table: str
+    max_age_days: int
+    destination: str = DESTINATION_ARCHIVE
+    batch_size: int = 5000
+    enabled: bool = True
+
+
+def default_retention_policies() -> List[RetentionPolicy]:
+    return [
+        RetentionPolicy(table="heartbeats", max_age_days=30),
+        RetentionPolicy(table="violations", max_age_days=180),
+    ]
 
 
 @dataclass
 class AppConfig:
     db_url: str
     migrations_dir: str
+    online_migrations: bool = False
+    lock_timeout_ms: int = 5000
+    statement_timeout_ms: int = 0
+    lock_retries: int = 5
+    targets: List[Target] = field(default_factory=list)
+    fleet_workers: int = 8
+    fleet_fail_fast: bool = False
+    retention_policies: List[RetentionPolicy] = field(default_factory=default_retention_policies)
+    retention_archive_dir: str = ""
+    retention_sleep_seconds: float = 0.5
+
+
+def redact_url(db_url: str) -> str:
+    return _URL_PASSWORD.sub(r"\1***@", db_url)
 
 
 def _default_migrations_dir() -> str:
@@ -42,12 +104,146 @@ def load_config() -> AppConfig:
     return AppConfig(
         db_url=str(node.get("db_url") or fallback.db_url),
         migrations_dir=str(node.get("migrations_dir") or fallback.migrations_dir),
+        online_migrations=bool(node.get("online_migrations", fallback.online_migrations)),
+        lock_timeout_ms=_int_option(node, "lock_timeout_ms", fallback.lock_timeout_ms),
+        statement_timeout_ms=_int_option(node, "statement_timeout_ms", fallback.statement_timeout_ms),
+        lock_retries=_int_option(node, "lock_retries", fallback.lock_retries),
+        targets=_targets(node.get("targets")),
+        fleet_workers=max(1, _int_option(node, "fleet_workers", fallback.fleet_workers)),
+        fleet_fail_fast=bool(node.get("fleet_fail_fast", fallback.fleet_fail_fast)),
+        retention_policies=_retention_policies(node.get("retention_policies"), fallback.retention_policies),
+        retention_archive_dir=str(node.get("retention_archive_dir") or fallback.retention_archive_dir),
+        retention_sleep_seconds=_float_option(node, "retention_sleep_seconds", fallback.retention_sleep_seconds),
     )
 
 
+def _targets(items) -> List[Target]:
+    if not isinstance(items, list):
+        return []
+    targets: List[Target] = []
+    seen = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        name = str(item.get("name") or "").strip()
+        db_url = str(item.get("db_url") or "").strip()
+        if not name or not db_url or name in seen:
+            continue
+        seen.add(name)
+        targets.append(Target(name=name, db_url=db_url, enabled=bool(item.get("enabled", True))))
+    return targets
+
+
+def _retention_policies(items, fallback: List[RetentionPolicy]) -> List[RetentionPolicy]:
+    if not isinstance(items, list):
+        return fallback
+    policies: List[RetentionPolicy] = []
+    seen = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        table = str(item.get("table") or "").strip()
+        if not table or table in seen:
+            continue
+        try:
+            max_age_days = int(item.get("max_age_days"))
+            batch_size = int(item.get("batch_size", 5000))
+        except (TypeError, ValueError):
+            continue
+        if max_age_days < 1 or batch_size < 1:
+            continue
+        seen.add(table)
+        policies.append(
+            RetentionPolicy(
+                table=table,
+                max_age_days=max_age_days,
+                destination=str(item.get("destination") or DESTINATION_ARCHIVE),
+                batch_size=batch_size,
+                enabled=bool(item.get("enabled", True)),
+            )
+        )
+    return policies
+
+
+def _int_option(node: dict, key: str, fallback: int) -> int:
+    try:
+        return max(0, int(node.get(key, fallback)))
+    except (TypeError, ValueError):
+        return fallback
+
+
+def _float_option(node: dict, key: str, fallback: float) -> float:
+    try:
+        return max(0.0, float(node.get(key, fallback)))
+    except (TypeError, ValueError):
+        return fallback
+
+
 def save_config(cfg: AppConfig) -> None:
     payload = {
         "db_url": cfg.db_url,
         "migrations_dir": cfg.migrations_dir,
+        "online_migrations": cfg.online_migrations,
+        "lock_timeout_ms": cfg.lock_timeout_ms,
+        "statement_timeout_ms": cfg.statement_timeout_ms,
+        "lock_retries": cfg.lock_retries,
+        "targets": [
+            {"name": target.name, "db_url": target.db_url, "enabled": target.enabled} for target in cfg.targets
+        ],
+        "fleet_workers": cfg.fleet_workers,
+        "fleet_fail_fast": cfg.fleet_fail_fast,
+        "retention_policies": [
+            {
+                "table": policy.table,
+                "max_age_days": policy.max_age_days,
+                "destination": policy.destination,
+                "batch_size": policy.batch_size,
+                "enabled": policy.enabled,
+            }
+            for policy in cfg.retention_policies
+        ],
+        "retention_archive_dir": cfg.retention_archive_dir,
+        "retention_sleep_seconds": cfg.retention_sleep_seconds,
     }
     _config_path().write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def _catalog_cache_path() -> Path:
+    return _config_path().with_name(".schema_admin.catalog.json")
+
+
+def _catalog_cache_key(db_url: str) -> str:
+    return hashlib.sha256(db_url.encode("utf-8")).hexdigest()
+
+
+def _read_catalog_cache() -> Dict:
+    try:
+        node = json.loads(_catalog_cache_path().read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return {}
+    return node if isinstance(node, dict) else {}
+
+
+def load_catalog_cache(db_url: str) -> Dict | None:
+    with _catalog_cache_lock:
+        entry = _read_catalog_cache().get(_catalog_cache_key(db_url))
+    if not isinstance(entry, dict) or not isinstance(entry.get("tables"), list):
+        return None
+    return entry
+
+
+def save_catalog_cache(db_url: str, snapshot: Dict) -> None:
+    path = _catalog_cache_path()
+    key = _catalog_cache_key(db_url)
+    with _catalog_cache_lock:
+        node = _read_catalog_cache()
+        node.pop(key, None)
+        node[key] = snapshot
+        while len(node) > CATALOG_CACHE_ENTRIES:
+            node.pop(next(iter(node)))
+        temp = path.with_name(path.name + ".tmp")
+        try:
+            temp.write_text(json.dumps(node), encoding="utf-8")
+            os.replace(temp, path)
+        except OSError:
+            temp.unlink(missing_ok=True)
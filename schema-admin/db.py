@@ -1,10 +1,67 @@
 from __future__ import annotations
 
+import csv
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterable, List, Sequence, Tuple
 
 import psycopg
 from psycopg import Connection as PgConnection
+from psycopg import sql as pg_sql
+from psycopg.conninfo import conninfo_to_dict
+
+from config import FORMAT_CSV, FORMAT_CSV_GZIP, FORMAT_PARQUET, TRANSFER_FORMATS
+from sqlscript import Statement, iter_statements
+
+__all__ = [
+    "FORMAT_CSV",
+    "FORMAT_CSV_GZIP",
+    "FORMAT_PARQUET",
+    "TRANSFER_FORMATS",
+    "APPLICATION_NAME",
+    "EXPORT",
+    "IMPORT",
+    "TableRef",
+    "ColumnInfo",
+    "StatementTiming",
+    "StatementFailed",
+    "LockWaitMonitor",
+    "connect",
+    "server_version",
+    "ping",
+    "cancel_backend",
+    "list_tables",
+    "list_columns",
+    "execute_statement",
+    "run_statements",
+    "execute_script",
+    "TransferSpec",
+    "TransferResult",
+    "TransferCancelled",
+    "TransferRun",
+    "parse_table",
+    "file_format_for",
+    "export_path",
+    "table_for_path",
+    "export_table",
+    "import_table",
+]
+
+APPLICATION_NAME = "schema-admin"
+LOCK_WAIT_POLL_SECONDS = 0.1
+
+EXPORT = "export"
+IMPORT = "import"
+TRANSFER_CHUNK_BYTES = 1024 * 1024
+TRANSFER_PROGRESS_SECONDS = 2.0
+PARQUET_BATCH_ROWS = 50_000
 
 
 @dataclass
@@ -25,16 +82,124 @@ class ColumnInfo:
     default_value: str | None
 
 
+@dataclass
+class StatementTiming:
+    label: str
+    position: int
+    line: int
+    summary: str
+    seconds: float
+    rows: int | None
+    lock_wait_seconds: float | None
+
+    def describe(self) -> str:
+        rows = "-" if self.rows is None else f"{self.rows:,}"
+        lock_wait = "" if self.lock_wait_seconds is None else f", lock wait {self.lock_wait_seconds:.2f}s"
+        return (
+            f"{self.label}:{self.line} #{self.position} took {self.seconds:.3f}s, "
+            f"rows {rows}{lock_wait}: {self.summary}"
+        )
+
+
+class StatementFailed(RuntimeError):
+    def __init__(self, label: str, position: int, statement: Statement, error: BaseException) -> None:
+        super().__init__(f"{label} failed at statement #{position} (line {statement.line}): {error}")
+        self.label = label
+        self.position = position
+        self.statement = statement
+
+
+class LockWaitMonitor:
+    def __init__(
+        self,
+        db_url: str,
+        backend_pid: int,
+        interval: float = LOCK_WAIT_POLL_SECONDS,
+        connector: Callable[[str], PgConnection] | None = None,
+    ) -> None:
+        self.db_url = db_url
+        self.backend_pid = backend_pid
+        self.interval = interval
+        self._connector = connector or connect
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._waited = 0.0
+        self._lapped = 0.0
+
+    def __enter__(self) -> LockWaitMonitor:
+        self.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        conn = self._connector(self.db_url)
+        conn.autocommit = True
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(conn,),
+            name=f"schema-admin-lockwait-{self.backend_pid}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(1.0, self.interval * 5))
+            self._thread = None
+
+    def lap(self) -> float:
+        with self._lock:
+            waited = self._waited - self._lapped
+            self._lapped = self._waited
+        return waited
+
+    def _run(self, conn: PgConnection) -> None:
+        try:
+            last = time.monotonic()
+            while not self._stop.wait(self.interval):
+                now = time.monotonic()
+                with conn.cursor() as cur:
+                    cur.execute("SELECT wait_event_type FROM pg_stat_activity WHERE pid = %s", (self.backend_pid,))
+                    row = cur.fetchone()
+                if row and row[0] == "Lock":
+                    with self._lock:
+                        self._waited += now - last
+                last = now
+        except psycopg.Error:
+            pass
+        finally:
+            conn.close()
+
+
 def connect(db_url: str) -> PgConnection:
-    return psycopg.connect(db_url)
+    if "application_name" in conninfo_to_dict(db_url) or os.environ.get("PGAPPNAME"):
+        return psycopg.connect(db_url)
+    return psycopg.connect(db_url, application_name=APPLICATION_NAME)
+
+
+def server_version(conn: PgConnection) -> str:
+    with conn.cursor() as cur:
+        cur.execute("SELECT version()")
+        row = cur.fetchone()
+    conn.rollback()
+    return str(row[0]) if row else "unknown"
 
 
 def ping(db_url: str) -> str:
+    with connect(db_url) as conn:
+        return server_version(conn)
+
+
+def cancel_backend(db_url: str, backend_pid: int) -> bool:
     with connect(db_url) as conn:
         with conn.cursor() as cur:
-            cur.execute("SELECT version()")
+            cur.execute("SELECT pg_cancel_backend(%s)", (backend_pid,))
             row = cur.fetchone()
-    return str(row[0]) if row else "unknown"
+    return bool(row[0]) if row else False
 
 
 def list_tables(conn: PgConnection) -> List[TableRef]:
@@ -72,10 +237,440 @@ def list_columns(conn: PgConnection, table: TableRef) -> List[ColumnInfo]:
     ]
 
 
-def execute_script(conn: PgConnection, sql: str, dry_run: bool) -> None:
+def execute_statement(conn: PgConnection, statement: Statement) -> int | None:
     with conn.cursor() as cur:
-        cur.execute(sql)
+        cur.execute(statement.text)
+        return cur.rowcount if cur.rowcount >= 0 else None
+
+
+def run_statements(
+    conn: PgConnection,
+    statements: Iterable[Statement],
+    label: str,
+    progress: Callable[[str], None] | None = None,
+    cancel_check: Callable[[], None] | None = None,
+    monitor: LockWaitMonitor | None = None,
+    execute: Callable[[PgConnection, Statement], int | None] = execute_statement,
+    errors: Tuple[type, ...] = (psycopg.Error,),
+) -> List[StatementTiming]:
+    timings: List[StatementTiming] = []
+    for position, statement in enumerate(statements, start=1):
+        if cancel_check is not None:
+            cancel_check()
+        if progress is not None:
+            progress(f"{label}:{statement.line} #{position} running: {statement.summary}")
+        if monitor is not None:
+            monitor.lap()
+        started = time.monotonic()
+        try:
+            rows = execute(conn, statement)
+        except errors as exc:
+            raise StatementFailed(label, position, statement, exc) from exc
+        timing = StatementTiming(
+            label=label,
+            position=position,
+            line=statement.line,
+            summary=statement.summary,
+            seconds=time.monotonic() - started,
+            rows=rows,
+            lock_wait_seconds=monitor.lap() if monitor is not None else None,
+        )
+        timings.append(timing)
+        if progress is not None:
+            progress(timing.describe())
+    return timings
+
+
+def execute_script(
+    conn: PgConnection,
+    sql: str,
+    dry_run: bool,
+    progress: Callable[[str], None] | None = None,
+    cancel_check: Callable[[], None] | None = None,
+    monitor: LockWaitMonitor | None = None,
+    errors: Tuple[type, ...] = (psycopg.Error,),
+) -> List[StatementTiming]:
+    timings = run_statements(conn, iter_statements(sql), "script", progress, cancel_check, monitor, errors=errors)
     if dry_run:
         conn.rollback()
     else:
         conn.commit()
+    return timings
+
+
+@dataclass
+class TransferSpec:
+    table: TableRef
+    path: str
+    direction: str = EXPORT
+    file_format: str | None = None
+    where: str | None = None
+    truncate: bool = False
+
+
+@dataclass
+class TransferResult:
+    table: TableRef
+    path: str
+    direction: str
+    file_format: str
+    rows: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+    def describe(self) -> str:
+        if self.error:
+            return f"{self.direction.capitalize()} {self.table.label} failed: {self.error}"
+        verb = "exported to" if self.direction == EXPORT else "imported from"
+        rate = self.rows / self.seconds if self.seconds > 0 else 0.0
+        return (
+            f"{self.table.label}: {self.rows:,} rows {verb} {self.path} "
+            f"({self.bytes / (1024 * 1024):,.1f} MB, {self.seconds:.1f}s, {rate:,.0f} rows/s)"
+        )
+
+
+class TransferCancelled(Exception):
+    pass
+
+
+def parse_table(label: str) -> TableRef:
+    parts = [part.strip() for part in label.strip().split(".") if part.strip()]
+    if len(parts) == 1:
+        return TableRef(schema="public", name=parts[0])
+    if len(parts) == 2:
+        return TableRef(schema=parts[0], name=parts[1])
+    raise ValueError(f"Invalid table name: {label}")
+
+
+def file_format_for(path: str | Path) -> str:
+    name = str(path).lower()
+    for file_format in (FORMAT_CSV_GZIP, FORMAT_CSV, FORMAT_PARQUET):
+        if name.endswith("." + file_format):
+            return file_format
+    raise ValueError(f"Cannot tell the format of {path}; use .csv, .csv.gz or .parquet.")
+
+
+def export_path(directory: str | Path, table: TableRef, file_format: str, exam_session_id: str | None = None) -> Path:
+    suffix = f"-{exam_session_id}" if exam_session_id else ""
+    return Path(directory) / f"{table.label}{suffix}.{file_format}"
+
+
+def table_for_path(path: str | Path) -> TableRef:
+    name = Path(path).name
+    file_format = file_format_for(name)
+    stem = name[: -(len(file_format) + 1)]
+    return parse_table(stem.split("-", 1)[0])
+
+
+def session_filter(conn: PgConnection, table: TableRef) -> str:
+    columns = {column.name for column in list_columns(conn, table)}
+    conn.rollback()
+    if not columns:
+        raise ValueError(f"Table {table.label} does not exist.")
+    if table.name == "exam_sessions" and "id" in columns:
+        return "id = %(exam_session_id)s::uuid"
+    if "exam_session_id" in columns:
+        return "exam_session_id = %(exam_session_id)s::uuid"
+    if "binding_id" in columns:
+        return (
+            "binding_id IN (SELECT b.id FROM device_bindings b JOIN session_tokens st ON st.token = b.token "
+            "WHERE st.exam_session_id = %(exam_session_id)s::uuid)"
+        )
+    if "token" in columns:
+        return "token IN (SELECT token FROM session_tokens WHERE exam_session_id = %(exam_session_id)s::uuid)"
+    raise ValueError(f"{table.label} has no exam_session_id, binding_id or token column to filter on.")
+
+
+def _identifier(table: TableRef) -> pg_sql.Identifier:
+    return pg_sql.Identifier(table.schema, table.name)
+
+
+def _export_query(table: TableRef, where: str | None, session_clause: str | None) -> pg_sql.Composed:
+    conditions = []
+    if where and where.strip():
+        conditions.append(f"({where.strip().replace('%', '%%')})")
+    if session_clause:
+        conditions.append(session_clause)
+    return pg_sql.SQL("SELECT * FROM {table}{where}").format(
+        table=_identifier(table),
+        where=pg_sql.SQL(" WHERE " + " AND ".join(conditions) if conditions else ""),
+    )
+
+
+class _Reporter:
+    def __init__(self, label: str, result: TransferResult, progress, cancel_check) -> None:
+        self._label = label
+        self._result = result
+        self._progress = progress
+        self._cancel_check = cancel_check
+        self._started = time.monotonic()
+        self._last = self._started
+
+    def tick(self) -> None:
+        if self._cancel_check is not None:
+            self._cancel_check()
+        now = time.monotonic()
+        if self._progress is None or now - self._last < TRANSFER_PROGRESS_SECONDS:
+            return
+        self._last = now
+        elapsed = now - self._started
+        rows = f"{self._result.rows:,} rows, " if self._result.rows else ""
+        self._progress(
+            f"{self._label}: {rows}{self._result.bytes / (1024 * 1024):,.1f} MB, "
+            f"{self._result.bytes / (1024 * 1024) / elapsed:,.1f} MB/s"
+        )
+
+
+def _open_binary(path: Path, mode: str, file_format: str) -> IO[bytes]:
+    if file_format == FORMAT_CSV_GZIP:
+        return gzip.open(path, mode + "b", compresslevel=6)
+    return open(path, mode + "b")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet files need the optional pyarrow package (pip install pyarrow).") from None
+    return pyarrow, pyarrow.parquet
+
+
+def export_table(
+    conn: PgConnection,
+    table: TableRef,
+    path: str | Path,
+    file_format: str | None = None,
+    where: str | None = None,
+    exam_session_id: str | None = None,
+    progress: Callable[[str], None] | None = None,
+    cancel_check: Callable[[], None] | None = None,
+) -> TransferResult:
+    path = Path(path)
+    file_format = file_format or file_format_for(path)
+    if file_format not in TRANSFER_FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    session_clause = session_filter(conn, table) if exam_session_id else None
+    query = _export_query(table, where, session_clause)
+    params = {"exam_session_id": exam_session_id} if exam_session_id else {}
+    result = TransferResult(table, str(path), EXPORT, file_format)
+    reporter = _Reporter(f"Export {table.label}", result, progress, cancel_check)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    started = time.monotonic()
+    try:
+        if file_format == FORMAT_PARQUET:
+            _export_parquet(conn, query, params, path, result, reporter)
+        else:
+            with _open_binary(path, "w", file_format) as handle, conn.cursor() as cur:
+                statement = pg_sql.SQL("COPY ({query}) TO STDOUT (FORMAT csv, HEADER)").format(query=query)
+                with cur.copy(statement, params) as copy:
+                    for data in copy:
+                        handle.write(data)
+                        result.bytes += len(data)
+                        reporter.tick()
+                result.rows = max(cur.rowcount, 0)
+    except BaseException:
+        conn.rollback()
+        path.unlink(missing_ok=True)
+        raise
+    conn.rollback()
+    result.seconds = time.monotonic() - started
+    if file_format != FORMAT_CSV:
+        result.bytes = path.stat().st_size
+    return result
+
+
+def _arrow_type(pa, type_name: str | None):
+    return {
+        "int2": pa.int16(),
+        "int4": pa.int32(),
+        "int8": pa.int64(),
+        "float4": pa.float32(),
+        "float8": pa.float64(),
+        "bool": pa.bool_(),
+        "date": pa.date32(),
+        "timestamp": pa.timestamp("us"),
+        "timestamptz": pa.timestamp("us", tz="UTC"),
+    }.get(type_name or "", pa.string())
+
+
+def _arrow_value(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _export_parquet(conn: PgConnection, query, params, path: Path, result: TransferResult, reporter: _Reporter) -> None:
+    pa, pq = _require_pyarrow()
+    with conn.cursor(name="schema_admin_export") as cur:
+        cur.itersize = PARQUET_BATCH_ROWS
+        cur.execute(query, params)
+        fields = []
+        for column in cur.description or []:
+            info = conn.adapters.types.get(column.type_code)
+            fields.append(pa.field(column.name, _arrow_type(pa, info.name if info else None)))
+        schema = pa.schema(fields)
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            while True:
+                rows = cur.fetchmany(PARQUET_BATCH_ROWS)
+                if not rows:
+                    break
+                arrays = []
+                for index, field in enumerate(schema):
+                    values = [row[index] for row in rows]
+                    if pa.types.is_string(field.type):
+                        values = [_arrow_value(value) for value in values]
+                    arrays.append(pa.array(values, type=field.type))
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                result.rows += len(rows)
+                reporter.tick()
+
+
+def _csv_columns(path: Path, file_format: str) -> List[str]:
+    with _open_binary(path, "r", file_format) as handle:
+        header = io.TextIOWrapper(handle, encoding="utf-8", newline="").readline()
+    columns = next(csv.reader([header]), [])
+    if not columns:
+        raise ValueError(f"{path} has no CSV header row.")
+    return columns
+
+
+def import_table(
+    conn: PgConnection,
+    table: TableRef,
+    path: str | Path,
+    file_format: str | None = None,
+    truncate: bool = False,
+    progress: Callable[[str], None] | None = None,
+    cancel_check: Callable[[], None] | None = None,
+) -> TransferResult:
+    path = Path(path)
+    file_format = file_format or file_format_for(path)
+    result = TransferResult(table, str(path), IMPORT, file_format)
+    reporter = _Reporter(f"Import {table.label}", result, progress, cancel_check)
+    started = time.monotonic()
+    try:
+        with conn.cursor() as cur:
+            if truncate:
+                cur.execute(pg_sql.SQL("TRUNCATE {table}").format(table=_identifier(table)))
+            if file_format == FORMAT_PARQUET:
+                _import_parquet(cur, table, path, result, reporter)
+            else:
+                columns = pg_sql.SQL(", ").join(pg_sql.Identifier(name) for name in _csv_columns(path, file_format))
+                statement = pg_sql.SQL("COPY {table} ({columns}) FROM STDIN (FORMAT csv, HEADER)").format(
+                    table=_identifier(table), columns=columns
+                )
+                with _open_binary(path, "r", file_format) as handle, cur.copy(statement) as copy:
+                    for data in iter(lambda: handle.read(TRANSFER_CHUNK_BYTES), b""):
+                        copy.write(data)
+                        result.bytes += len(data)
+                        reporter.tick()
+                result.rows = max(cur.rowcount, 0)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    result.seconds = time.monotonic() - started
+    return result
+
+
+def _import_parquet(cur, table: TableRef, path: Path, result: TransferResult, reporter: _Reporter) -> None:
+    _pa, pq = _require_pyarrow()
+    parquet = pq.ParquetFile(path)
+    names = parquet.schema_arrow.names
+    statement = pg_sql.SQL("COPY {table} ({columns}) FROM STDIN").format(
+        table=_identifier(table), columns=pg_sql.SQL(", ").join(pg_sql.Identifier(name) for name in names)
+    )
+    with cur.copy(statement) as copy:
+        for batch in parquet.iter_batches(batch_size=PARQUET_BATCH_ROWS):
+            columns = [batch.column(index).to_pylist() for index in range(batch.num_columns)]
+            for row in zip(*columns):
+                copy.write_row(row)
+            result.rows += batch.num_rows
+            result.bytes += batch.nbytes
+            reporter.tick()
+
+
+class TransferRun:
+    def __init__(
+        self,
+        db_url: str,
+        specs: Sequence[TransferSpec],
+        max_workers: int = 4,
+        exam_session_id: str | None = None,
+        progress: Callable[[str], None] | None = None,
+        on_result: Callable[[TransferResult], None] | None = None,
+        connector: Callable[[str], PgConnection] = connect,
+    ) -> None:
+        self.db_url = db_url
+        self.specs = list(specs)
+        self.max_workers = max(1, max_workers)
+        self.exam_session_id = exam_session_id
+        self._progress = progress
+        self._on_result = on_result
+        self._connector = connector
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._active: Dict[int, PgConnection] = {}
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        with self._lock:
+            active = list(self._active.values())
+        for conn in active:
+            try:
+                conn.cancel()
+            except Exception:  # noqa: BLE001
+                continue
+
+    def run(self) -> List[TransferResult]:
+        workers = min(self.max_workers, max(1, len(self.specs)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="schema-admin-transfer") as executor:
+            return list(executor.map(self._run_spec, self.specs))
+
+    def _check_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise TransferCancelled("Transfer was cancelled.")
+
+    def _run_spec(self, spec: TransferSpec) -> TransferResult:
+        file_format = spec.file_format or file_format_for(spec.path)
+        try:
+            self._check_cancelled()
+            conn = self._connector(self.db_url)
+            with conn:
+                with self._lock:
+                    self._active[id(spec)] = conn
+                try:
+                    if spec.direction == EXPORT:
+                        result = export_table(
+                            conn,
+                            spec.table,
+                            spec.path,
+                            file_format,
+                            spec.where,
+                            self.exam_session_id,
+                            self._progress,
+                            self._check_cancelled,
+                        )
+                    else:
+                        result = import_table(
+                            conn, spec.table, spec.path, file_format, spec.truncate, self._progress, self._check_cancelled
+                        )
+                finally:
+                    with self._lock:
+                        self._active.pop(id(spec), None)
+        except Exception as exc:  # noqa: BLE001
+            result = TransferResult(spec.table, spec.path, spec.direction, file_format)
+            result.error = "cancelled" if self._cancelled.is_set() else (str(exc).strip().splitlines() or [type(exc).__name__])[0]
+        if self._progress is not None:
+            self._progress(result.describe())
+        if self._on_result is not None:
+            self._on_result(result)
+        return result
@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import hashlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import psycopg
+from psycopg.pq import TransactionStatus
+
+from db import APPLICATION_NAME
+from db import cancel_backend as pg_cancel_backend
+from db import connect as pg_connect
+from db import server_version as pg_server_version
+
+DIALECT_POSTGRES = "postgres"
+DIALECT_MYSQL = "mysql"
+POSTGRES_RESET_SQL = "RESET ALL; DISCARD TEMP; UNLISTEN *; SELECT pg_advisory_unlock_all()"
+MYSQL_RESET_SQL = "SET SESSION lock_wait_timeout = DEFAULT"
+MYSQL_DEFAULT_PORT = 3306
+MIGRATION_LOCK_NAMESPACE = "schema_admin_migrations"
+
+POSTGRES_LOCK_HOLDER_SQL = """
+SELECT a.pid, a.usename, a.application_name, a.client_addr::text, a.state
+FROM pg_locks l
+JOIN pg_stat_activity a ON a.pid = l.pid
+WHERE l.locktype = 'advisory'
+  AND l.granted
+  AND l.database = (SELECT oid FROM pg_database WHERE datname = current_database())
+  AND l.classid = %s::bigint::oid
+  AND l.objid = %s::bigint::oid
+  AND l.objsubid = 1
+"""
+
+MYSQL_LOCK_NAME_SQL = "LEFT(CONCAT(%s, ':', DATABASE()), 64)"
+MYSQL_LOCK_HOLDER_SQL = f"""
+SELECT id, user, host, command, time
+FROM information_schema.processlist
+WHERE id = IS_USED_LOCK({MYSQL_LOCK_NAME_SQL})
+"""
+
+
+def _require_pymysql():
+    try:
+        import pymysql
+    except ImportError:
+        raise RuntimeError("MySQL databases need the optional PyMySQL package (pip install PyMySQL).") from None
+    return pymysql
+
+
+class Dialect(ABC):
+    name = ""
+    label = ""
+    schemes: Tuple[str, ...] = ()
+    migrations_subdir = ""
+    transactional_ddl = True
+    history_ddl: Tuple[str, ...] = ()
+    history_columns_sql = ""
+    record_sql = ""
+
+    @abstractmethod
+    def connect(self, db_url: str):
+        ...
+
+    @property
+    @abstractmethod
+    def errors(self) -> Tuple[type, ...]:
+        ...
+
+    @property
+    @abstractmethod
+    def operational_errors(self) -> Tuple[type, ...]:
+        ...
+
+    @abstractmethod
+    def server_version(self, conn) -> str:
+        ...
+
+    @abstractmethod
+    def backend_id(self, conn) -> int:
+        ...
+
+    @abstractmethod
+    def cancel_backend(self, db_url: str, backend_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def is_usable(self, conn) -> bool:
+        ...
+
+    def ping(self, conn) -> None:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+
+    @abstractmethod
+    def restore(self, conn, reset: bool) -> bool:
+        ...
+
+    @abstractmethod
+    def try_migration_lock(self, conn) -> bool:
+        ...
+
+    @abstractmethod
+    def release_migration_lock(self, conn) -> None:
+        ...
+
+    @abstractmethod
+    def migration_lock_holder(self, conn) -> str | None:
+        ...
+
+    def migrations_dir(self, migrations_dir: str | Path) -> Path:
+        root = Path(migrations_dir).expanduser().resolve()
+        if not self.migrations_subdir or root.name == self.migrations_subdir:
+            return root
+        return root / self.migrations_subdir
+
+    def require(self, feature: str) -> None:
+        if self is not POSTGRES:
+            raise ValueError(f"{feature} is only available for PostgreSQL databases, not {self.label}.")
+
+
+class PostgresDialect(Dialect):
+    name = DIALECT_POSTGRES
+    label = "PostgreSQL"
+    schemes = ("postgres", "postgresql")
+    history_ddl = (
+        """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id BIGSERIAL PRIMARY KEY,
+            migration_name TEXT NOT NULL UNIQUE,
+            checksum TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+        """
+        ALTER TABLE {table}
+            ADD COLUMN IF NOT EXISTS duration_ms BIGINT,
+            ADD COLUMN IF NOT EXISTS rows_touched BIGINT,
+            ADD COLUMN IF NOT EXISTS server_version TEXT
+        """,
+    )
+    history_columns_sql = """
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped
+        """
+    record_sql = """
+        INSERT INTO {table} (migration_name, checksum, duration_ms, rows_touched, server_version)
+        VALUES (%s, %s, %s, %s, current_setting('server_version'))
+        ON CONFLICT (migration_name) DO NOTHING
+        """
+
+    def connect(self, db_url: str):
+        return pg_connect(db_url)
+
+    @property
+    def errors(self) -> Tuple[type, ...]:
+        return (psycopg.Error,)
+
+    @property
+    def operational_errors(self) -> Tuple[type, ...]:
+        return (psycopg.OperationalError,)
+
+    def server_version(self, conn) -> str:
+        return pg_server_version(conn)
+
+    def backend_id(self, conn) -> int:
+        return int(conn.info.backend_pid)
+
+    def cancel_backend(self, db_url: str, backend_id: int) -> bool:
+        return pg_cancel_backend(db_url, backend_id)
+
+    def is_usable(self, conn) -> bool:
+        return not (conn.closed or conn.broken)
+
+    def restore(self, conn, reset: bool) -> bool:
+        if not self.is_usable(conn):
+            return False
+        try:
+            if conn.info.transaction_status != TransactionStatus.IDLE:
+                conn.rollback()
+            if conn.autocommit:
+                conn.autocommit = False
+            if reset:
+                conn.autocommit = True
+                try:
+                    conn.execute(POSTGRES_RESET_SQL)
+                finally:
+                    conn.autocommit = False
+        except psycopg.Error:
+            return False
+        return True
+
+    def migration_lock_key(self, conn) -> int:
+        digest = hashlib.sha256(f"{MIGRATION_LOCK_NAMESPACE}:{conn.info.dbname}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big", signed=True)
+
+    def try_migration_lock(self, conn) -> bool:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (self.migration_lock_key(conn),))
+            return bool(cur.fetchone()[0])
+
+    def release_migration_lock(self, conn) -> None:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (self.migration_lock_key(conn),))
+
+    def migration_lock_holder(self, conn) -> str | None:
+        key = self.migration_lock_key(conn)
+        with conn.cursor() as cur:
+            cur.execute(POSTGRES_LOCK_HOLDER_SQL, ((key >> 32) & 0xFFFFFFFF, key & 0xFFFFFFFF))
+            row = cur.fetchone()
+        if not row:
+            return None
+        pid, user, application, client, state = row
+        return f"pid {pid}, {application or 'unnamed application'}, {user}@{client or 'local socket'}, {state}"
+
+
+class MySQLDialect(Dialect):
+    name = DIALECT_MYSQL
+    label = "MySQL"
+    schemes = ("mysql", "mariadb")
+    migrations_subdir = "mysql"
+    transactional_ddl = False
+    history_ddl = (
+        """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            migration_name VARCHAR(255) NOT NULL UNIQUE,
+            checksum CHAR(64) NOT NULL,
+            applied_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+            duration_ms BIGINT,
+            rows_touched BIGINT,
+            server_version VARCHAR(255)
+        )
+        """,
+    )
+    history_columns_sql = """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+        """
+    record_sql = """
+        INSERT IGNORE INTO {table} (migration_name, checksum, duration_ms, rows_touched, server_version)
+        VALUES (%s, %s, %s, %s, VERSION())
+        """
+
+    def connect(self, db_url: str):
+        pymysql = _require_pymysql()
+        parts = urlsplit(db_url)
+        options = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        kwargs = {
+            "host": parts.hostname or "localhost",
+            "port": parts.port or MYSQL_DEFAULT_PORT,
+            "user": unquote(parts.username or ""),
+            "password": unquote(parts.password or ""),
+            "database": unquote(parts.path.lstrip("/")) or None,
+            "charset": options.get("charset", "utf8mb4"),
+            "autocommit": False,
+            "program_name": APPLICATION_NAME,
+        }
+        if options.get("unix_socket"):
+            kwargs["unix_socket"] = options["unix_socket"]
+        if options.get("ssl_ca"):
+            kwargs["ssl"] = {"ca": options["ssl_ca"]}
+        if options.get("connect_timeout"):
+            kwargs["connect_timeout"] = int(options["connect_timeout"])
+        return pymysql.connect(**kwargs)
+
+    @property
+    def errors(self) -> Tuple[type, ...]:
+        return (_require_pymysql().MySQLError,)
+
+    @property
+    def operational_errors(self) -> Tuple[type, ...]:
+        return (_require_pymysql().OperationalError,)
+
+    def server_version(self, conn) -> str:
+        with conn.cursor() as cur:
+            cur.execute("SELECT CONCAT(VERSION(), ' ', @@version_comment)")
+            row = cur.fetchone()
+        conn.rollback()
+        return str(row[0]) if row else "unknown"
+
+    def backend_id(self, conn) -> int:
+        return int(conn.thread_id())
+
+    def cancel_backend(self, db_url: str, backend_id: int) -> bool:
+        conn = self.connect(db_url)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"KILL QUERY {int(backend_id)}")
+        except self.errors:
+            return False
+        finally:
+            conn.close()
+        return True
+
+    def is_usable(self, conn) -> bool:
+        return bool(conn.open)
+
+    def ping(self, conn) -> None:
+        conn.ping(reconnect=False)
+
+    def restore(self, conn, reset: bool) -> bool:
+        if not self.is_usable(conn):
+            return False
+        try:
+            conn.rollback()
+            conn.autocommit(False)
+            if reset:
+                with conn.cursor() as cur:
+                    cur.execute(MYSQL_RESET_SQL)
+        except self.errors:
+            return False
+        return True
+
+    def try_migration_lock(self, conn) -> bool:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT GET_LOCK({MYSQL_LOCK_NAME_SQL}, 0)", (MIGRATION_LOCK_NAMESPACE,))
+            row = cur.fetchone()
+        return bool(row and row[0] == 1)
+
+    def release_migration_lock(self, conn) -> None:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT RELEASE_LOCK({MYSQL_LOCK_NAME_SQL})", (MIGRATION_LOCK_NAMESPACE,))
+
+    def migration_lock_holder(self, conn) -> str | None:
+        with conn.cursor() as cur:
+            cur.execute(MYSQL_LOCK_HOLDER_SQL, (MIGRATION_LOCK_NAMESPACE,))
+            row = cur.fetchone()
+        if not row:
+            return None
+        connection_id, user, host, command, seconds = row
+        return f"connection {connection_id}, {user}@{host}, {command} for {seconds}s"
+
+
+POSTGRES = PostgresDialect()
+MYSQL = MySQLDialect()
+DIALECTS = (POSTGRES, MYSQL)
+
+
+def dialect_for_url(db_url: str) -> Dialect:
+    if "://" not in db_url:
+        return POSTGRES
+    scheme = urlsplit(db_url).scheme.lower().split("+", 1)[0]
+    for dialect in DIALECTS:
+        if scheme in dialect.schemes:
+            return dialect
+    raise ValueError(f"Unsupported database URL scheme {scheme!r}; use postgresql:// or mysql://.")
+
+
+def dialect_of(conn) -> Dialect:
+    return POSTGRES if isinstance(conn, psycopg.Connection) else MYSQL
+
+
+def connect(db_url: str):
+    return dialect_for_url(db_url).connect(db_url)
+
+
+def server_version(conn) -> str:
+    return dialect_of(conn).server_version(conn)
+
+
+def cancel_backend(db_url: str, backend_id: int) -> bool:
+    return dialect_for_url(db_url).cancel_backend(db_url, backend_id)
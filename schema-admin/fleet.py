@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Sequence
+
+from psycopg import Connection as PgConnection
+
+from config import Target
+from db import connect
+from migrations import (
+    ApplyOptions,
+    MigrationDriftError,
+    MigrationFile,
+    apply_pending,
+    check_drift,
+    ensure_migration_table,
+    get_applied_names,
+    pending_migrations,
+)
+
+OP_PENDING = "pending"
+OP_DRY_RUN = "dry-run"
+OP_APPLY = "apply"
+OP_DRIFT = "drift"
+OPERATIONS = (OP_PENDING, OP_DRY_RUN, OP_APPLY, OP_DRIFT)
+
+RESULT_OK = "ok"
+RESULT_FAILED = "failed"
+RESULT_SKIPPED = "skipped"
+RESULT_CANCELLED = "cancelled"
+RESULT_DRIFT = "drift"
+
+
+class FleetCancelled(Exception):
+    pass
+
+
+@dataclass
+class TargetResult:
+    target: Target
+    operation: str
+    status: str
+    migrations: List[str] = field(default_factory=list)
+    detail: str = ""
+    elapsed_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == RESULT_OK
+
+
+@dataclass
+class FleetSummary:
+    operation: str
+    results: List[TargetResult]
+    elapsed_seconds: float
+
+    def count(self, status: str) -> int:
+        return sum(1 for result in self.results if result.status == status)
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results)
+
+    def headline(self) -> str:
+        return (
+            f"Fleet {self.operation}: {self.count(RESULT_OK)} ok, {self.count(RESULT_DRIFT)} drifted, "
+            f"{self.count(RESULT_FAILED)} failed, "
+            f"{self.count(RESULT_SKIPPED)} skipped, {self.count(RESULT_CANCELLED)} cancelled "
+            f"across {len(self.results)} target(s) in {self.elapsed_seconds:.1f}s"
+        )
+
+    def table(self) -> str:
+        width = max([len("Target")] + [len(result.target.name) for result in self.results])
+        lines = [f"{'Target':<{width}}  {'Status':<9}  {'Count':>5}  {'Time':>7}  Detail"]
+        for result in self.results:
+            lines.append(
+                f"{result.target.name:<{width}}  {result.status:<9}  {len(result.migrations):>5}  "
+                f"{result.elapsed_seconds:>6.1f}s  {result.detail}"
+            )
+        lines.append(self.headline())
+        return "\n".join(lines)
+
+
+class FleetRun:
+    def __init__(
+        self,
+        targets: Sequence[Target],
+        operation: str,
+        migrations: Sequence[MigrationFile],
+        options: ApplyOptions | None = None,
+        max_workers: int = 8,
+        fail_fast: bool = False,
+        progress: Callable[[str], None] | None = None,
+        on_result: Callable[[TargetResult], None] | None = None,
+        connector: Callable[[str], PgConnection] = connect,
+    ) -> None:
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown fleet operation: {operation}")
+        self.targets = list(targets)
+        self.operation = operation
+        self.migrations = list(migrations)
+        self.options = options or ApplyOptions()
+        self.max_workers = max(1, max_workers)
+        self.fail_fast = fail_fast
+        self._progress = progress
+        self._on_result = on_result
+        self._connector = connector
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._stopped = threading.Event()
+        self._active: Dict[str, PgConnection] = {}
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._stopped.set()
+        with self._lock:
+            active = list(self._active.values())
+        for conn in active:
+            try:
+                conn.cancel()
+            except Exception:  # noqa: BLE001
+                continue
+
+    def run(self) -> FleetSummary:
+        started = time.monotonic()
+        workers = min(self.max_workers, max(1, len(self.targets)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="schema-admin-fleet") as executor:
+            results = list(executor.map(self._run_target, self.targets))
+        return FleetSummary(self.operation, results, time.monotonic() - started)
+
+    def _run_target(self, target: Target) -> TargetResult:
+        if self._stopped.is_set():
+            status = RESULT_CANCELLED if self._cancelled.is_set() else RESULT_SKIPPED
+            reason = "cancelled" if self._cancelled.is_set() else "skipped after an earlier failure (fail-fast)"
+            return self._finish(TargetResult(target, self.operation, status, detail=reason))
+
+        started = time.monotonic()
+        result = TargetResult(target, self.operation, RESULT_OK)
+        try:
+            conn = self._connector(target.db_url)
+            with conn:
+                with self._lock:
+                    self._active[target.name] = conn
+                try:
+                    if self.operation == OP_DRIFT:
+                        self._check_drift(conn, result)
+                    else:
+                        result.migrations = self._execute(conn, target)
+                        result.detail = self._describe(result.migrations)
+                finally:
+                    with self._lock:
+                        self._active.pop(target.name, None)
+        except Exception as exc:  # noqa: BLE001
+            if self._cancelled.is_set():
+                result.status = RESULT_CANCELLED
+                result.detail = "cancelled"
+            elif isinstance(exc, MigrationDriftError):
+                result.status = RESULT_DRIFT
+                result.migrations = [entry.name for entry in exc.report.problems]
+                result.detail = f"apply blocked: {exc.report.describe()}"
+                if self.fail_fast:
+                    self._stopped.set()
+            else:
+                result.status = RESULT_FAILED
+                result.detail = str(exc).strip().splitlines()[0] if str(exc).strip() else type(exc).__name__
+                if self.fail_fast:
+                    self._stopped.set()
+        result.elapsed_seconds = time.monotonic() - started
+        return self._finish(result)
+
+    def _execute(self, conn: PgConnection, target: Target) -> List[str]:
+        if self.operation == OP_PENDING:
+            ensure_migration_table(conn)
+            pending = pending_migrations(self.migrations, get_applied_names(conn))
+            conn.rollback()
+            return [migration.name for migration in pending]
+        return apply_pending(
+            conn,
+            self.migrations,
+            dry_run=self.operation == OP_DRY_RUN,
+            progress=self._target_progress(target),
+            options=self.options,
+            cancel_check=self._check_cancelled,
+        )
+
+    def _check_drift(self, conn: PgConnection, result: TargetResult) -> None:
+        report = check_drift(conn, self.migrations)
+        result.migrations = [entry.name for entry in report.problems]
+        result.detail = report.describe()
+        if not report.ok:
+            result.status = RESULT_DRIFT
+
+    def _describe(self, names: Sequence[str]) -> str:
+        if not names:
+            return "up to date" if self.operation != OP_DRY_RUN else "nothing to apply"
+        verb = {OP_PENDING: "pending", OP_DRY_RUN: "would apply", OP_APPLY: "applied"}[self.operation]
+        return f"{verb}: {', '.join(names)}"
+
+    def _check_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise FleetCancelled("Fleet run was cancelled.")
+
+    def _target_progress(self, target: Target) -> Callable[[str], None] | None:
+        progress = self._progress
+        if progress is None:
+            return None
+        return lambda message: progress(f"[{target.name}] {message}")
+
+    def _finish(self, result: TargetResult) -> TargetResult:
+        if self._progress is not None:
+            self._progress(f"[{result.target.name}] {result.status}: {result.detail}")
+        if self._on_result is not None:
+            self._on_result(result)
+        return result
+
+
+def run_fleet(
+    targets: Sequence[Target],
+    operation: str,
+    migrations: Sequence[MigrationFile],
+    options: ApplyOptions | None = None,
+    max_workers: int = 8,
+    fail_fast: bool = False,
+    progress: Callable[[str], None] | None = None,
+) -> FleetSummary:
+    return FleetRun(targets, operation, migrations, options, max_workers, fail_fast, progress).run()
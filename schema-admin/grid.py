@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import List, Sequence
+
+from psycopg import Connection as PgConnection
+from psycopg import sql as pg_sql
+
+from catalog import TableInfo
+from config import GRID_PAGE_SIZE
+
+GRID_ROW_CAP = 10_000
+GRID_STATEMENT_TIMEOUT_MS = 5000
+GRID_CELL_CHARS = 120
+GRID_CURSOR_NAME = "schema_admin_grid"
+
+
+@dataclass
+class GridPage:
+    columns: List[str]
+    rows: List[tuple]
+    offset: int
+    has_more: bool
+    capped: bool
+    elapsed_seconds: float
+    row_cap: int = GRID_ROW_CAP
+
+    @property
+    def has_previous(self) -> bool:
+        return self.offset > 0
+
+    def describe(self) -> str:
+        if not self.rows:
+            return "No rows." if self.offset == 0 else f"No more rows after {self.offset:,}."
+        text = f"Rows {self.offset + 1:,}-{self.offset + len(self.rows):,} in {self.elapsed_seconds * 1000:.0f} ms"
+        if self.capped:
+            text += f" (row cap {self.row_cap:,} reached; add a filter to narrow the rows)"
+        elif self.has_more:
+            text += ", more available"
+        return text
+
+
+def key_columns(table: TableInfo) -> List[str]:
+    not_null = {column.name for column in table.columns if not column.is_nullable}
+    candidates = sorted(
+        (index for index in table.indexes if index.is_unique and index.is_valid and not index.is_partial_or_expression),
+        key=lambda index: (not index.is_primary, len(index.columns)),
+    )
+    for index in candidates:
+        if index.columns and all(name in not_null for name in index.columns):
+            return list(index.columns)
+    return []
+
+
+def sortable_columns(table: TableInfo) -> List[str]:
+    not_null = {column.name for column in table.columns if not column.is_nullable}
+    names: List[str] = []
+    keys = key_columns(table)
+    if keys:
+        names.append(keys[0])
+    for index in table.indexes:
+        if not index.is_valid or index.is_partial_or_expression or "USING btree" not in index.definition:
+            continue
+        if index.columns and index.columns[0] in not_null and index.columns[0] not in names:
+            names.append(index.columns[0])
+    return names
+
+
+def display_value(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (dict, list)):
+        text = json.dumps(value, default=str)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        text = "\\x" + bytes(value).hex()
+    else:
+        text = str(value)
+    text = " ".join(text.split())
+    return text if len(text) <= GRID_CELL_CHARS else text[: GRID_CELL_CHARS - 3] + "..."
+
+
+@dataclass
+class GridBrowser:
+    table: TableInfo
+    sort_column: str | None = None
+    descending: bool = False
+    where: str | None = None
+    page_size: int = GRID_PAGE_SIZE
+    row_cap: int = GRID_ROW_CAP
+    _starts: List[tuple | None] = field(default_factory=list, init=False, repr=False)
+    _last_key: tuple | None = field(default=None, init=False, repr=False)
+    _offset: int = field(default=0, init=False, repr=False)
+    _page_rows: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.page_size < 1:
+            raise ValueError("Page size must be at least 1.")
+        self.keys = key_columns(self.table)
+        sortable = sortable_columns(self.table)
+        if self.sort_column and self.sort_column not in sortable:
+            raise ValueError(
+                f"{self.sort_column} is not backed by an index on a NOT NULL column; "
+                f"sort by one of: {', '.join(sortable) or 'none'}."
+            )
+        if self.sort_column is None and self.keys:
+            self.sort_column = self.keys[0]
+        self.order = [self.sort_column] if self.sort_column else []
+        self.order += [name for name in self.keys if name not in self.order]
+
+    @property
+    def keyset(self) -> bool:
+        return bool(self.keys)
+
+    def first(self, conn: PgConnection) -> GridPage:
+        self._starts = []
+        self._offset = 0
+        self._page_rows = 0
+        return self._fetch(conn, None, 0)
+
+    def next(self, conn: PgConnection) -> GridPage:
+        if not self._starts:
+            return self.first(conn)
+        return self._fetch(conn, self._last_key, self._offset + self._page_rows)
+
+    def previous(self, conn: PgConnection) -> GridPage:
+        if len(self._starts) < 2:
+            return self.first(conn)
+        self._starts.pop()
+        start = self._starts.pop()
+        return self._fetch(conn, start, max(0, self._offset - self.page_size))
+
+    def _query(self, start: tuple | None, offset: int) -> pg_sql.Composed:
+        select_list = pg_sql.SQL(", ").join(pg_sql.Identifier(column.name) for column in self.table.columns)
+        select_keys = pg_sql.SQL(", ").join(pg_sql.Identifier(name) for name in self.order)
+        conditions: List[pg_sql.Composable] = []
+        if self.where and self.where.strip():
+            conditions.append(pg_sql.SQL("(" + self.where.strip().replace("%", "%%") + ")"))
+        if start is not None and self.keyset:
+            conditions.append(
+                pg_sql.SQL("({keys}) {op} ({values})").format(
+                    keys=select_keys,
+                    op=pg_sql.SQL("<" if self.descending else ">"),
+                    values=pg_sql.SQL(", ").join(pg_sql.Placeholder() for _name in self.order),
+                )
+            )
+        direction = pg_sql.SQL(" DESC" if self.descending else "")
+        order_by = (
+            pg_sql.SQL(" ORDER BY ") + pg_sql.SQL(", ").join(pg_sql.Identifier(name) + direction for name in self.order)
+            if self.order
+            else pg_sql.SQL("")
+        )
+        return pg_sql.SQL("SELECT {select_list}, {keys} FROM {table}{where}{order_by}{offset}").format(
+            select_list=select_list,
+            keys=select_keys if self.order else pg_sql.SQL("NULL"),
+            table=pg_sql.Identifier(self.table.ref.schema, self.table.ref.name),
+            where=pg_sql.SQL(" WHERE ") + pg_sql.SQL(" AND ").join(conditions) if conditions else pg_sql.SQL(""),
+            order_by=order_by,
+            offset=pg_sql.SQL(f" OFFSET {int(offset)}") if not self.keyset and offset else pg_sql.SQL(""),
+        )
+
+    def _fetch(self, conn: PgConnection, start: tuple | None, offset: int) -> GridPage:
+        limit = max(0, min(self.page_size, self.row_cap - offset))
+        started = time.monotonic()
+        columns = [column.name for column in self.table.columns]
+        rows: List[tuple] = []
+        more: Sequence[tuple] = []
+        if limit:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(f"SET LOCAL statement_timeout = {GRID_STATEMENT_TIMEOUT_MS}")
+                    cur.execute("SET TRANSACTION READ ONLY")
+                with conn.cursor(name=GRID_CURSOR_NAME) as cur:
+                    cur.execute(self._query(start, offset), list(start) if start is not None and self.keyset else [])
+                    fetched = cur.fetchmany(limit + 1)
+            finally:
+                conn.rollback()
+            rows, more = fetched[:limit], fetched[limit:]
+
+        width = len(columns)
+        self._starts.append(start)
+        self._offset = offset
+        self._page_rows = len(rows)
+        if rows:
+            self._last_key = tuple(rows[-1][width:]) if self.keyset else None
+        return GridPage(
+            columns=columns,
+            rows=[tuple(row[:width]) for row in rows],
+            offset=offset,
+            has_more=bool(more) and offset + len(rows) < self.row_cap,
+            capped=offset + len(rows) >= self.row_cap and (bool(more) or limit == 0),
+            elapsed_seconds=time.monotonic() - started,
+            row_cap=self.row_cap,
+        )
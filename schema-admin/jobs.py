@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: int
+    label: str
+    status: str = JOB_QUEUED
+    detail: str = ""
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: float | None = None
+    finished_at: float | None = None
+    backend_pids: List[int] = field(default_factory=list)
+    db_url: str | None = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+
+def _backend_id(conn) -> int:
+    from dialects import dialect_of
+
+    return dialect_of(conn).backend_id(conn)
+
+
+class JobContext:
+    def __init__(self, runner: JobRunner, job: Job, on_progress: Callable[[str], None] | None) -> None:
+        self._runner = runner
+        self._job = job
+        self._on_progress = on_progress
+        self._cancel_event = threading.Event()
+        self._cancel_callbacks: List[Callable[[], None]] = []
+
+    @property
+    def job(self) -> Job:
+        return self._job
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        if self.cancelled:
+            raise JobCancelled(f"Job '{self._job.label}' was cancelled.")
+
+    def progress(self, message: str) -> None:
+        self._job.detail = message
+        callback = self._on_progress
+        if callback is not None:
+            self._runner._post(lambda: callback(message))
+        self._runner._notify(self._job)
+
+    def post(self, callback: Callable[[], None]) -> None:
+        self._runner._post(callback)
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        with self._runner._lock:
+            self._cancel_callbacks.append(callback)
+            already = self.cancelled
+        if already:
+            callback()
+
+    def track(self, conn, db_url: str) -> None:
+        pid = _backend_id(conn)
+        with self._runner._lock:
+            self._job.db_url = db_url
+            if pid not in self._job.backend_pids:
+                self._job.backend_pids.append(pid)
+        self.check_cancelled()
+
+    def untrack(self, conn) -> None:
+        pid = _backend_id(conn)
+        with self._runner._lock:
+            if pid in self._job.backend_pids:
+                self._job.backend_pids.remove(pid)
+
+    def _request_cancel(self) -> None:
+        self._cancel_event.set()
+        with self._runner._lock:
+            callbacks = list(self._cancel_callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:  # noqa: BLE001
+                continue
+
+
+class JobRunner:
+    def __init__(self, max_workers: int = 4, cancel_backend: Callable[[str, int], None] | None = None) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="schema-admin-job")
+        self._events: queue.Queue[Callable[[], None]] = queue.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs: Dict[int, Job] = {}
+        self._contexts: Dict[int, JobContext] = {}
+        self._listeners: List[Callable[[Job], None]] = []
+        self._cancel_backend = cancel_backend
+
+    def add_listener(self, listener: Callable[[Job], None]) -> None:
+        self._listeners.append(listener)
+
+    def submit(
+        self,
+        label: str,
+        work: Callable[[JobContext], Any],
+        on_success: Callable[[Any], None] | None = None,
+        on_error: Callable[[BaseException], None] | None = None,
+        on_progress: Callable[[str], None] | None = None,
+    ) -> Job:
+        job = Job(id=next(self._ids), label=label)
+        ctx = JobContext(self, job, on_progress)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._contexts[job.id] = ctx
+        self._notify(job)
+        self._executor.submit(self._run, ctx, work, on_success, on_error)
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            ctx = self._contexts.get(job_id)
+            pids = list(job.backend_pids) if job is not None else []
+            db_url = job.db_url if job is not None else None
+        if job is None or ctx is None or job.finished:
+            return False
+
+        ctx._request_cancel()
+        job.detail = "cancel requested"
+        self._notify(job)
+        if pids and db_url and self._cancel_backend is not None:
+            threading.Thread(
+                target=self._cancel_pids,
+                args=(self._cancel_backend, db_url, pids),
+                name=f"schema-admin-cancel-{job_id}",
+                daemon=True,
+            ).start()
+        return True
+
+    def cancel_all(self) -> None:
+        for job in self.jobs():
+            if not job.finished:
+                self.cancel(job.id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active_count(self) -> int:
+        return sum(1 for job in self.jobs() if not job.finished)
+
+    def clear_finished(self) -> None:
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished]:
+                self._jobs.pop(job_id, None)
+                self._contexts.pop(job_id, None)
+
+    def drain(self, limit: int = 200) -> int:
+        handled = 0
+        while handled < limit:
+            try:
+                callback = self._events.get_nowait()
+            except queue.Empty:
+                break
+            callback()
+            handled += 1
+        return handled
+
+    def shutdown(self) -> None:
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(
+        self,
+        ctx: JobContext,
+        work: Callable[[JobContext], Any],
+        on_success: Callable[[Any], None] | None,
+        on_error: Callable[[BaseException], None] | None,
+    ) -> None:
+        job = ctx.job
+        if ctx.cancelled:
+            self._finish(job, JOB_CANCELLED, "cancelled before start")
+            return
+
+        job.status = JOB_RUNNING
+        job.started_at = time.monotonic()
+        self._notify(job)
+        try:
+            result = work(ctx)
+        except BaseException as exc:  # noqa: BLE001
+            if ctx.cancelled:
+                self._finish(job, JOB_CANCELLED, "cancelled")
+                return
+            self._finish(job, JOB_FAILED, str(exc))
+            if on_error is not None:
+                self._post(lambda error=exc: on_error(error))
+            return
+
+        self._finish(job, JOB_DONE, job.detail)
+        if on_success is not None:
+            self._post(lambda: on_success(result))
+
+    def _finish(self, job: Job, status: str, detail: str) -> None:
+        job.status = status
+        job.detail = detail
+        job.finished_at = time.monotonic()
+        with self._lock:
+            job.backend_pids.clear()
+        self._notify(job)
+
+    def _cancel_pids(self, canceller: Callable[[str, int], None], db_url: str, pids: List[int]) -> None:
+        for pid in pids:
+            try:
+                canceller(db_url, pid)
+            except Exception:  # noqa: BLE001
+                continue
+
+    def _notify(self, job: Job) -> None:
+        for listener in self._listeners:
+            self._post(lambda listener=listener: listener(job))
+
+    def _post(self, callback: Callable[[], None]) -> None:
+        self._events.put(callback)
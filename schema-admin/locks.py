@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Sequence, Set, Tuple
+
+import psycopg
+from psycopg import Connection as PgConnection
+
+from db import APPLICATION_NAME, connect
+
+LOCK_MONITOR_INTERVAL = 1.0
+LOCK_WARN_SECONDS = 5.0
+QUERY_PREVIEW_CHARS = 200
+
+ROLE_JOB = "schema-admin job"
+ROLE_BLOCKED_BY_JOB = "blocked by job"
+ROLE_BLOCKED = "blocked"
+ROLE_SCHEMA_ADMIN = "schema-admin"
+ROLE_ACTIVE = "active"
+
+LOCK_ACTIVITY_SQL = """
+SELECT
+    a.pid,
+    a.usename,
+    a.application_name,
+    a.client_addr::text,
+    a.state,
+    a.wait_event_type,
+    a.wait_event,
+    COALESCE(EXTRACT(EPOCH FROM clock_timestamp() - a.query_start), 0)::float8,
+    left(a.query, %(preview)s),
+    a.blocked_by,
+    w.mode,
+    w.target
+FROM (
+    SELECT s.*, pg_blocking_pids(s.pid) AS blocked_by
+    FROM pg_stat_activity s
+    WHERE s.datname = current_database()
+      AND s.pid <> pg_backend_pid()
+      AND s.backend_type = 'client backend'
+) a
+LEFT JOIN LATERAL (
+    SELECT l.mode, COALESCE(l.relation::regclass::text, l.locktype) AS target
+    FROM pg_locks l
+    WHERE l.pid = a.pid AND NOT l.granted
+    LIMIT 1
+) w ON true
+WHERE cardinality(a.blocked_by) > 0
+   OR a.pid = ANY(%(watched)s::int[])
+   OR (a.application_name = %(application)s AND a.state <> 'idle')
+ORDER BY cardinality(a.blocked_by) = 0, a.pid
+"""
+
+
+@dataclass
+class BackendActivity:
+    pid: int
+    user: str
+    application: str
+    client: str
+    state: str
+    wait_event: str
+    running_seconds: float
+    query: str
+    blocked_by: List[int] = field(default_factory=list)
+    lock_mode: str | None = None
+    lock_target: str | None = None
+
+    @property
+    def is_blocked(self) -> bool:
+        return bool(self.blocked_by)
+
+    @property
+    def is_schema_admin(self) -> bool:
+        return self.application == APPLICATION_NAME
+
+
+@dataclass
+class LockSnapshot:
+    captured_at: float
+    watched: List[int] = field(default_factory=list)
+    backends: List[BackendActivity] = field(default_factory=list)
+
+    def blocked_by_watched(self) -> List[BackendActivity]:
+        blockers: Set[int] = set(self.watched)
+        blocked: List[BackendActivity] = []
+        changed = True
+        while changed:
+            changed = False
+            for backend in self.backends:
+                if backend.pid in blockers or not blockers.intersection(backend.blocked_by):
+                    continue
+                blockers.add(backend.pid)
+                blocked.append(backend)
+                changed = True
+        return blocked
+
+    def blocking_pids(self) -> Set[int]:
+        return {pid for backend in self.blocked_by_watched() for pid in backend.blocked_by if pid in self.watched}
+
+    def role(self, backend: BackendActivity, blocked_by_job: Set[int] | None = None) -> str:
+        if backend.pid in self.watched:
+            return ROLE_JOB
+        if blocked_by_job is None:
+            blocked_by_job = {item.pid for item in self.blocked_by_watched()}
+        if backend.pid in blocked_by_job:
+            return ROLE_BLOCKED_BY_JOB
+        if backend.is_blocked:
+            return ROLE_BLOCKED
+        return ROLE_SCHEMA_ADMIN if backend.is_schema_admin else ROLE_ACTIVE
+
+    @property
+    def longest_wait(self) -> float:
+        return max((backend.running_seconds for backend in self.blocked_by_watched()), default=0.0)
+
+
+def sample_locks(conn: PgConnection, watched_pids: Sequence[int] = ()) -> LockSnapshot:
+    watched = sorted(set(int(pid) for pid in watched_pids))
+    with conn.cursor() as cur:
+        cur.execute(
+            LOCK_ACTIVITY_SQL,
+            {"watched": watched, "application": APPLICATION_NAME, "preview": QUERY_PREVIEW_CHARS},
+        )
+        rows = cur.fetchall()
+    if not conn.autocommit:
+        conn.rollback()
+
+    backends = []
+    for pid, user, application, client, state, wait_type, wait_event, seconds, query, blocked_by, mode, target in rows:
+        backends.append(
+            BackendActivity(
+                pid=int(pid),
+                user=user or "",
+                application=application or "",
+                client=client or "local socket",
+                state=state or "",
+                wait_event=f"{wait_type}:{wait_event}" if wait_type else "",
+                running_seconds=float(seconds or 0.0),
+                query=" ".join((query or "").split()),
+                blocked_by=[int(item) for item in blocked_by or []],
+                lock_mode=mode,
+                lock_target=target,
+            )
+        )
+    return LockSnapshot(captured_at=time.time(), watched=watched, backends=backends)
+
+
+class LockMonitor:
+    def __init__(
+        self,
+        db_url: str,
+        interval: float = LOCK_MONITOR_INTERVAL,
+        connector: Callable[[str], PgConnection] | None = None,
+    ) -> None:
+        self.db_url = db_url
+        self.interval = interval
+        self._connector = connector or connect
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._watched: List[int] = []
+        self._snapshot: LockSnapshot | None = None
+        self._error: str | None = None
+
+    def __enter__(self) -> LockMonitor:
+        self.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="schema-admin-lockmonitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(1.0, self.interval * 5))
+            self._thread = None
+
+    def watch(self, pids: Sequence[int]) -> None:
+        with self._lock:
+            self._watched = sorted(set(pids))
+
+    def latest(self) -> Tuple[LockSnapshot | None, str | None]:
+        with self._lock:
+            return self._snapshot, self._error
+
+    def _run(self) -> None:
+        try:
+            conn = self._connector(self.db_url)
+            conn.autocommit = True
+        except psycopg.Error as exc:
+            with self._lock:
+                self._error = str(exc)
+            return
+        try:
+            while not self._stop.is_set():
+                with self._lock:
+                    watched = list(self._watched)
+                snapshot = sample_locks(conn, watched)
+                with self._lock:
+                    self._snapshot = snapshot
+                    self._error = None
+                self._stop.wait(self.interval)
+        except psycopg.Error as exc:
+            with self._lock:
+                self._error = str(exc)
+        finally:
+            conn.close()
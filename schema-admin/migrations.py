@@ -1,13 +1,111 @@
 from __future__ import annotations
 
 import hashlib
+import math
+import os
+import random
+import threading
+import time
 from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, TypeVar
 
 from psycopg import Connection as PgConnection
+from psycopg import errors as pg_errors
+from psycopg import sql as pg_sql
+
+from db import LockWaitMonitor, StatementFailed, StatementTiming, run_statements
+from dialects import POSTGRES, Dialect, dialect_of
+from sqlscript import (
+    Statement,
+    causes_implicit_commit,
+    concurrent_index_name,
+    is_non_transactional,
+    iter_statements,
+    split_statements,
+)
+
+__all__ = [
+    "MIGRATION_TABLE",
+    "BACKFILL_TABLE",
+    "DRIFT_OK",
+    "DRIFT_CHANGED",
+    "DRIFT_MISSING",
+    "ProgressCallback",
+    "CancelCheck",
+    "ApplyOptions",
+    "HistoryEntry",
+    "MigrationFile",
+    "DriftEntry",
+    "DriftReport",
+    "MigrationDriftError",
+    "MigrationLockError",
+    "checksum_cache",
+    "discover_migrations",
+    "ensure_migration_table",
+    "get_history",
+    "get_applied_names",
+    "read_sql",
+    "checksum",
+    "pending_migrations",
+    "check_drift",
+    "preview_pending_sql",
+    "acquire_migration_lock",
+    "release_migration_lock",
+    "apply_pending",
+    "rollback_last",
+    "BackfillSpec",
+    "BackfillProgress",
+    "ensure_backfill_table",
+    "list_backfills",
+    "run_backfill",
+]
 
 MIGRATION_TABLE = "schema_admin_migration_history"
+BACKFILL_TABLE = "schema_admin_backfill_history"
+
+HISTORY_COLUMNS = (
+    "id",
+    "migration_name",
+    "checksum",
+    "applied_at",
+    "duration_ms",
+    "rows_touched",
+    "server_version",
+)
+
+DRIFT_OK = "ok"
+DRIFT_CHANGED = "changed"
+DRIFT_MISSING = "missing"
+
+MIGRATION_LOCK_WAIT_SECONDS = 30.0
+MIGRATION_LOCK_POLL_SECONDS = 0.5
+DRY_RUN_SAVEPOINT = "schema_admin_dry_run"
+
+ProgressCallback = Callable[[str], None]
+CancelCheck = Callable[[], None]
+T = TypeVar("T")
+
+
+@dataclass
+class ApplyOptions:
+    online: bool = False
+    lock_timeout_ms: int = 5000
+    statement_timeout_ms: int = 0
+    max_retries: int = 5
+    retry_backoff_seconds: float = 1.0
+    max_backoff_seconds: float = 30.0
+
+
+@dataclass
+class HistoryEntry:
+    name: str
+    checksum: str
+    applied_at: datetime
+    duration_ms: int | None
+    rows_touched: int | None
+    server_version: str | None
 
 
 @dataclass
@@ -17,8 +115,75 @@ class MigrationFile:
     down_path: Path | None
 
 
-def discover_migrations(migrations_dir: str) -> List[MigrationFile]:
-    root = Path(migrations_dir).expanduser().resolve()
+@dataclass
+class DriftEntry:
+    name: str
+    status: str
+    recorded_checksum: str
+    current_checksum: str | None
+
+    @property
+    def drifted(self) -> bool:
+        return self.status != DRIFT_OK
+
+
+@dataclass
+class DriftReport:
+    entries: List[DriftEntry]
+    elapsed_seconds: float = 0.0
+
+    @property
+    def problems(self) -> List[DriftEntry]:
+        return [entry for entry in self.entries if entry.drifted]
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+    def describe(self) -> str:
+        if self.ok:
+            return f"No drift: {len(self.entries)} applied migration(s) match the files on disk."
+        details = ", ".join(f"{entry.name} ({entry.status})" for entry in self.problems)
+        return f"Drift detected in {len(self.problems)} applied migration(s): {details}"
+
+
+class MigrationDriftError(RuntimeError):
+    def __init__(self, report: DriftReport) -> None:
+        super().__init__(f"{report.describe()}. Apply is blocked until the files match the migration history.")
+        self.report = report
+
+
+class ChecksumCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[int, int, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def checksum(self, path: Path) -> str:
+        key = str(path)
+        stat = os.stat(key)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                self.hits += 1
+                return cached[2]
+        value = checksum(read_sql(path))
+        with self._lock:
+            self._entries[key] = (stat.st_mtime_ns, stat.st_size, value)
+            self.misses += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+checksum_cache = ChecksumCache()
+
+
+def discover_migrations(migrations_dir: str, dialect: Dialect = POSTGRES) -> List[MigrationFile]:
+    root = dialect.migrations_dir(migrations_dir)
     if not root.exists():
         return []
 
@@ -38,19 +203,41 @@ def discover_migrations(migrations_dir: str) -> List[MigrationFile]:
 
 
 def ensure_migration_table(conn: PgConnection) -> None:
-    sql = f"""
-    CREATE TABLE IF NOT EXISTS {MIGRATION_TABLE} (
-        id BIGSERIAL PRIMARY KEY,
-        migration_name TEXT NOT NULL UNIQUE,
-        checksum TEXT NOT NULL,
-        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
-    );
-    """
+    dialect = dialect_of(conn)
     with conn.cursor() as cur:
-        cur.execute(sql)
+        cur.execute(dialect.history_columns_sql, (MIGRATION_TABLE,))
+        existing = {str(row[0]).lower() for row in cur.fetchall()}
+        if not existing.issuperset(HISTORY_COLUMNS):
+            for sql in dialect.history_ddl:
+                cur.execute(sql.format(table=MIGRATION_TABLE))
     conn.commit()
 
 
+def get_history(conn: PgConnection) -> List[HistoryEntry]:
+    ensure_migration_table(conn)
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT migration_name, checksum, applied_at, duration_ms, rows_touched, server_version
+            FROM {MIGRATION_TABLE}
+            ORDER BY applied_at, id
+            """
+        )
+        rows = cur.fetchall()
+    conn.rollback()
+    return [
+        HistoryEntry(
+            name=str(row[0]),
+            checksum=str(row[1]),
+            applied_at=row[2],
+            duration_ms=int(row[3]) if row[3] is not None else None,
+            rows_touched=int(row[4]) if row[4] is not None else None,
+            server_version=row[5],
+        )
+        for row in rows
+    ]
+
+
 def get_applied_names(conn: PgConnection) -> List[str]:
     with conn.cursor() as cur:
         cur.execute(f"SELECT migration_name FROM {MIGRATION_TABLE} ORDER BY applied_at, id")
@@ -71,6 +258,34 @@ def pending_migrations(migrations: Sequence[MigrationFile], applied_names: Itera
     return [migration for migration in migrations if migration.name not in applied]
 
 
+def check_drift(conn: PgConnection, migrations: Sequence[MigrationFile]) -> DriftReport:
+    started = time.monotonic()
+    ensure_migration_table(conn)
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT migration_name, checksum FROM {MIGRATION_TABLE} ORDER BY applied_at, id")
+        rows = cur.fetchall()
+    conn.rollback()
+
+    lookup = {migration.name: migration for migration in migrations}
+    entries: List[DriftEntry] = []
+    for name, recorded in rows:
+        migration = lookup.get(str(name))
+        current = None
+        if migration is not None:
+            try:
+                current = checksum_cache.checksum(migration.path)
+            except FileNotFoundError:
+                current = None
+        if current is None:
+            status = DRIFT_MISSING
+        elif current == recorded:
+            status = DRIFT_OK
+        else:
+            status = DRIFT_CHANGED
+        entries.append(DriftEntry(str(name), status, str(recorded), current))
+    return DriftReport(entries, time.monotonic() - started)
+
+
 def preview_pending_sql(conn: PgConnection, migrations: Sequence[MigrationFile]) -> str:
     ensure_migration_table(conn)
     pending = pending_migrations(migrations, get_applied_names(conn))
@@ -85,25 +300,108 @@ def preview_pending_sql(conn: PgConnection, migrations: Sequence[MigrationFile])
     return "\n".join(blocks).rstrip() + "\n"
 
 
-def apply_pending(conn: PgConnection, migrations: Sequence[MigrationFile], dry_run: bool) -> List[str]:
+def _record_applied(
+    cur,
+    migration: MigrationFile,
+    script_checksum: str,
+    timings: Sequence[StatementTiming],
+    dialect: Dialect = POSTGRES,
+) -> None:
+    duration_ms = round(sum(timing.seconds for timing in timings) * 1000)
+    rows_touched = sum(timing.rows for timing in timings if timing.rows is not None)
+    cur.execute(
+        dialect.record_sql.format(table=MIGRATION_TABLE),
+        (migration.name, script_checksum, duration_ms, rows_touched),
+    )
+
+
+class MigrationLockError(RuntimeError):
+    pass
+
+
+def acquire_migration_lock(
+    conn: PgConnection,
+    progress: ProgressCallback | None = None,
+    cancel_check: CancelCheck | None = None,
+) -> None:
+    dialect = dialect_of(conn)
+    deadline = time.monotonic() + MIGRATION_LOCK_WAIT_SECONDS
+    waiting_for = None
+    while not dialect.try_migration_lock(conn):
+        holder = dialect.migration_lock_holder(conn) or "a session that just finished"
+        if time.monotonic() >= deadline:
+            raise MigrationLockError(
+                f"Another migration run holds the migration lock of this database ({holder}); "
+                f"gave up after {MIGRATION_LOCK_WAIT_SECONDS:.0f}s."
+            )
+        if progress is not None and holder != waiting_for:
+            progress(f"Waiting for the migration lock held by {holder}")
+            waiting_for = holder
+        cancellable_sleep(MIGRATION_LOCK_POLL_SECONDS, cancel_check)
+
+
+def release_migration_lock(conn: PgConnection) -> None:
+    dialect = dialect_of(conn)
+    try:
+        conn.rollback()
+        dialect.release_migration_lock(conn)
+        conn.rollback()
+    except dialect.errors:
+        pass
+
+
+def apply_pending(
+    conn: PgConnection,
+    migrations: Sequence[MigrationFile],
+    dry_run: bool,
+    progress: ProgressCallback | None = None,
+    options: ApplyOptions | None = None,
+    cancel_check: CancelCheck | None = None,
+    monitor: LockWaitMonitor | None = None,
+    allow_drift: bool = False,
+) -> List[str]:
+    acquire_migration_lock(conn, progress, cancel_check)
+    try:
+        return _apply_pending(conn, migrations, dry_run, progress, options, cancel_check, monitor, allow_drift)
+    finally:
+        release_migration_lock(conn)
+
+
+def _apply_pending(
+    conn: PgConnection,
+    migrations: Sequence[MigrationFile],
+    dry_run: bool,
+    progress: ProgressCallback | None,
+    options: ApplyOptions | None,
+    cancel_check: CancelCheck | None,
+    monitor: LockWaitMonitor | None,
+    allow_drift: bool,
+) -> List[str]:
     ensure_migration_table(conn)
+    drift = check_drift(conn, migrations)
+    if not drift.ok:
+        if not (allow_drift or dry_run):
+            raise MigrationDriftError(drift)
+        if progress is not None:
+            progress(f"Warning: {drift.describe()}")
     applied = get_applied_names(conn)
     pending = pending_migrations(migrations, applied)
+    dialect = dialect_of(conn)
+    if not dialect.transactional_ddl:
+        return _apply_implicit_commit(conn, pending, dry_run, dialect, options, progress, cancel_check)
+    if options is not None and options.online:
+        return _apply_online(conn, pending, dry_run, options, progress, cancel_check, monitor)
+
     applied_now: List[str] = []
 
-    for migration in pending:
+    for index, migration in enumerate(pending, start=1):
+        if progress is not None:
+            progress(f"Applying {migration.name} ({index}/{len(pending)})")
         sql = read_sql(migration.path)
-        script_checksum = checksum(sql)
+        timings = run_statements(conn, iter_statements(sql), migration.name, progress, cancel_check, monitor)
         with conn.cursor() as cur:
-            cur.execute(sql)
-            cur.execute(
-                f"""
-                INSERT INTO {MIGRATION_TABLE} (migration_name, checksum)
-                VALUES (%s, %s)
-                ON CONFLICT (migration_name) DO NOTHING
-                """,
-                (migration.name, script_checksum),
-            )
+            _record_applied(cur, migration, checksum(sql), timings)
+        _report_timings(migration, timings, progress)
         applied_now.append(migration.name)
 
     if dry_run:
@@ -114,7 +412,363 @@ def apply_pending(conn: PgConnection, migrations: Sequence[MigrationFile], dry_r
     return applied_now
 
 
-def rollback_last(conn: PgConnection, migrations: Sequence[MigrationFile], dry_run: bool) -> str:
+def _apply_online(
+    conn: PgConnection,
+    pending: Sequence[MigrationFile],
+    dry_run: bool,
+    options: ApplyOptions,
+    progress: ProgressCallback | None,
+    cancel_check: CancelCheck | None,
+    monitor: LockWaitMonitor | None,
+) -> List[str]:
+    if dry_run:
+        return _dry_run_online(conn, pending, options, progress, cancel_check, monitor)
+    applied_now: List[str] = []
+    for index, migration in enumerate(pending, start=1):
+        if cancel_check is not None:
+            cancel_check()
+        sql = read_sql(migration.path)
+        statements = split_statements(sql)
+        non_transactional = [statement for statement in statements if is_non_transactional(statement)]
+        if progress is not None:
+            mode = "outside a transaction" if non_transactional else "in its own transaction"
+            progress(f"Applying {migration.name} ({index}/{len(pending)}) {mode}")
+
+        if not non_transactional:
+            timings = with_lock_retry(
+                lambda: _apply_in_transaction(conn, migration, sql, statements, options, progress, cancel_check, monitor),
+                conn,
+                migration.name,
+                options,
+                progress,
+                cancel_check,
+            )
+        else:
+            timings = _apply_autocommit(conn, migration, sql, statements, options, progress, cancel_check, monitor)
+        _report_timings(migration, timings, progress)
+        applied_now.append(migration.name)
+    return applied_now
+
+
+def _apply_implicit_commit(
+    conn: PgConnection,
+    pending: Sequence[MigrationFile],
+    dry_run: bool,
+    dialect: Dialect,
+    options: ApplyOptions | None,
+    progress: ProgressCallback | None,
+    cancel_check: CancelCheck | None,
+) -> List[str]:
+    previous_wait = None
+    if options is not None and options.online:
+        with conn.cursor() as cur:
+            cur.execute("SELECT @@SESSION.lock_wait_timeout")
+            previous_wait = int(cur.fetchone()[0])
+            cur.execute(f"SET SESSION lock_wait_timeout = {max(1, math.ceil(options.lock_timeout_ms / 1000))}")
+    applied_now: List[str] = []
+    try:
+        for index, migration in enumerate(pending, start=1):
+            if cancel_check is not None:
+                cancel_check()
+            sql = read_sql(migration.path)
+            statements = split_statements(sql)
+            implicit = [position for position, statement in enumerate(statements, start=1) if causes_implicit_commit(statement)]
+            if dry_run and implicit:
+                first = statements[implicit[0] - 1]
+                if progress is not None:
+                    progress(
+                        f"{migration.name} ({index}/{len(pending)}) not executed in dry-run: {dialect.label} commits "
+                        f"{len(implicit)} DDL statement(s) implicitly, first at line {first.line}: {first.summary}"
+                    )
+                applied_now.append(migration.name)
+                continue
+            if progress is not None:
+                mode = f"statement by statement, {dialect.label} commits DDL implicitly" if implicit else "in its own transaction"
+                progress(f"Applying {migration.name} ({index}/{len(pending)}) {mode}")
+            try:
+                timings = run_statements(conn, statements, migration.name, progress, cancel_check, errors=dialect.errors)
+                if not dry_run:
+                    with conn.cursor() as cur:
+                        _record_applied(cur, migration, checksum(sql), timings, dialect)
+            except StatementFailed as exc:
+                conn.rollback()
+                committed = [position for position in implicit if position < exc.position]
+                if not committed:
+                    raise
+                raise RuntimeError(
+                    f"{migration.name} failed at statement {exc.position}/{len(statements)} (line {exc.statement.line}); "
+                    f"statements 1-{committed[-1]} were committed implicitly and are not rolled back: {exc.__cause__}"
+                ) from exc.__cause__
+            except BaseException:
+                conn.rollback()
+                raise
+            if dry_run:
+                conn.rollback()
+            else:
+                conn.commit()
+            _report_timings(migration, timings, progress)
+            applied_now.append(migration.name)
+    finally:
+        if previous_wait is not None and dialect.is_usable(conn):
+            with conn.cursor() as cur:
+                cur.execute(f"SET SESSION lock_wait_timeout = {previous_wait}")
+    return applied_now
+
+
+def _report_timings(
+    migration: MigrationFile,
+    timings: Sequence[StatementTiming],
+    progress: ProgressCallback | None,
+) -> None:
+    if progress is None or not timings:
+        return
+    total = sum(timing.seconds for timing in timings)
+    slowest = max(timings, key=lambda timing: timing.seconds)
+    progress(
+        f"{migration.name} finished {len(timings)} statement(s) in {total:.3f}s; "
+        f"slowest line {slowest.line} ({slowest.seconds:.3f}s): {slowest.summary}"
+    )
+
+
+def _set_timeouts(cur, options: ApplyOptions, local: bool) -> None:
+    scope = "LOCAL " if local else ""
+    cur.execute(f"SET {scope}lock_timeout = {int(options.lock_timeout_ms)}")
+    cur.execute(f"SET {scope}statement_timeout = {int(options.statement_timeout_ms)}")
+
+
+def _apply_in_transaction(
+    conn: PgConnection,
+    migration: MigrationFile,
+    sql: str,
+    statements: Sequence[Statement],
+    options: ApplyOptions,
+    progress: ProgressCallback | None,
+    cancel_check: CancelCheck | None,
+    monitor: LockWaitMonitor | None,
+) -> List[StatementTiming]:
+    try:
+        with conn.cursor() as cur:
+            _set_timeouts(cur, options, local=True)
+        timings = run_statements(conn, statements, migration.name, progress, cancel_check, monitor)
+        with conn.cursor() as cur:
+            _record_applied(cur, migration, checksum(sql), timings)
+    except StatementFailed as exc:
+        conn.rollback()
+        if isinstance(exc.__cause__, pg_errors.LockNotAvailable):
+            raise exc.__cause__ from None
+        raise
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return timings
+
+
+def _dry_run_online(
+    conn: PgConnection,
+    pending: Sequence[MigrationFile],
+    options: ApplyOptions,
+    progress: ProgressCallback | None,
+    cancel_check: CancelCheck | None,
+    monitor: LockWaitMonitor | None,
+) -> List[str]:
+    def rollback_migration() -> None:
+        with conn.cursor() as cur:
+            cur.execute(f"ROLLBACK TO SAVEPOINT {DRY_RUN_SAVEPOINT}")
+
+    applied_now: List[str] = []
+    try:
+        with conn.cursor() as cur:
+            _set_timeouts(cur, options, local=True)
+        for index, migration in enumerate(pending, start=1):
+            if cancel_check is not None:
+                cancel_check()
+            statements = split_statements(read_sql(migration.path))
+            if progress is not None:
+                progress(f"Dry-running {migration.name} ({index}/{len(pending)}) in a savepoint")
+            with conn.cursor() as cur:
+                cur.execute(f"SAVEPOINT {DRY_RUN_SAVEPOINT}")
+            timings = with_lock_retry(
+                lambda: _dry_run_statements(conn, migration, statements, progress, cancel_check, monitor),
+                conn,
+                migration.name,
+                options,
+                progress,
+                cancel_check,
+                rollback=rollback_migration,
+            )
+            with conn.cursor() as cur:
+                cur.execute(f"RELEASE SAVEPOINT {DRY_RUN_SAVEPOINT}")
+            _report_timings(migration, timings, progress)
+            applied_now.append(migration.name)
+    finally:
+        conn.rollback()
+    return applied_now
+
+
+def _dry_run_statements(
+    conn: PgConnection,
+    migration: MigrationFile,
+    statements: Sequence[Statement],
+    progress: ProgressCallback | None,
+    cancel_check: CancelCheck | None,
+    monitor: LockWaitMonitor | None,
+) -> List[StatementTiming]:
+    def transactional() -> Iterator[Statement]:
+        for statement in statements:
+            if not is_non_transactional(statement):
+                yield statement
+            elif progress is not None:
+                progress(
+                    f"{migration.name}:{statement.line} skipped in dry-run "
+                    f"(cannot run inside a transaction): {statement.summary}"
+                )
+
+    try:
+        return run_statements(conn, transactional(), migration.name, progress, cancel_check, monitor)
+    except StatementFailed as exc:
+        if isinstance(exc.__cause__, pg_errors.LockNotAvailable):
+            raise exc.__cause__ from None
+        raise
+
+
+def _apply_autocommit(
+    conn: PgConnection,
+    migration: MigrationFile,
+    sql: str,
+    statements: Sequence[Statement],
+    options: ApplyOptions,
+    progress: ProgressCallback | None,
+    cancel_check: CancelCheck | None,
+    monitor: LockWaitMonitor | None,
+) -> List[StatementTiming]:
+    def execute(conn: PgConnection, statement: Statement) -> int | None:
+        return with_lock_retry(
+            lambda: _execute_autocommit(conn, statement),
+            conn,
+            f"{migration.name}:{statement.line}",
+            options,
+            progress,
+            cancel_check,
+        )
+
+    conn.rollback()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            _set_timeouts(cur, options, local=False)
+        try:
+            timings = run_statements(conn, statements, migration.name, progress, cancel_check, monitor, execute)
+        except StatementFailed as exc:
+            position = exc.position
+            committed = f"; {position - 1} earlier statement(s) already committed" if position > 1 else ""
+            raise RuntimeError(
+                f"{migration.name} failed at statement {position}/{len(statements)} "
+                f"(line {exc.statement.line}){committed}: {exc.__cause__}"
+            ) from exc.__cause__
+        with conn.cursor() as cur:
+            _record_applied(cur, migration, checksum(sql), timings)
+        return timings
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("RESET lock_timeout")
+            cur.execute("RESET statement_timeout")
+        conn.autocommit = False
+
+
+def _execute_autocommit(conn: PgConnection, statement: Statement) -> int | None:
+    index_name = concurrent_index_name(statement)
+    if index_name is not None:
+        _drop_invalid_index(conn, index_name)
+    with conn.cursor() as cur:
+        cur.execute(statement.text)
+        return cur.rowcount if cur.rowcount >= 0 else None
+
+
+def _drop_invalid_index(conn: PgConnection, index_name: str) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT format('%%I.%%I', n.nspname, c.relname)
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_index i ON i.indexrelid = c.oid
+            WHERE c.relname = %s
+              AND NOT i.indisvalid
+              AND pg_table_is_visible(c.oid)
+            """,
+            (index_name,),
+        )
+        row = cur.fetchone()
+        if row:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {row[0]}")
+
+
+def with_lock_retry(
+    action: Callable[[], T],
+    conn: PgConnection,
+    label: str,
+    options: ApplyOptions,
+    progress: ProgressCallback | None,
+    cancel_check: CancelCheck | None,
+    rollback: Callable[[], None] | None = None,
+) -> T:
+    attempt = 0
+    while True:
+        try:
+            return action()
+        except pg_errors.LockNotAvailable:
+            if rollback is not None:
+                rollback()
+            elif not conn.autocommit:
+                conn.rollback()
+            if attempt >= options.max_retries:
+                raise
+            attempt += 1
+            delay = min(options.max_backoff_seconds, options.retry_backoff_seconds * (2 ** (attempt - 1)))
+            delay += random.uniform(0, options.retry_backoff_seconds)
+            if progress is not None:
+                progress(
+                    f"{label}: lock_timeout ({options.lock_timeout_ms} ms) hit, "
+                    f"retry {attempt}/{options.max_retries} in {delay:.1f}s"
+                )
+            cancellable_sleep(delay, cancel_check)
+
+
+def cancellable_sleep(seconds: float, cancel_check: CancelCheck | None) -> None:
+    deadline = time.monotonic() + seconds
+    while True:
+        if cancel_check is not None:
+            cancel_check()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(0.25, remaining))
+
+
+def rollback_last(
+    conn: PgConnection,
+    migrations: Sequence[MigrationFile],
+    dry_run: bool,
+    progress: ProgressCallback | None = None,
+    cancel_check: CancelCheck | None = None,
+    monitor: LockWaitMonitor | None = None,
+) -> str:
+    acquire_migration_lock(conn, progress, cancel_check)
+    try:
+        return _rollback_last(conn, migrations, dry_run, progress, cancel_check, monitor)
+    finally:
+        release_migration_lock(conn)
+
+
+def _rollback_last(
+    conn: PgConnection,
+    migrations: Sequence[MigrationFile],
+    dry_run: bool,
+    progress: ProgressCallback | None,
+    cancel_check: CancelCheck | None,
+    monitor: LockWaitMonitor | None,
+) -> str:
     ensure_migration_table(conn)
     with conn.cursor() as cur:
         cur.execute(
@@ -142,9 +796,21 @@ def rollback_last(conn: PgConnection, migrations: Sequence[MigrationFile], dry_r
             f"Cannot rollback {migration_name}: missing '{migration.path.stem}.down.sql'."
         )
 
+    dialect = dialect_of(conn)
     down_sql = read_sql(migration.down_path)
+    if dry_run and not dialect.transactional_ddl:
+        implicit = [statement for statement in split_statements(down_sql) if causes_implicit_commit(statement)]
+        if implicit:
+            raise ValueError(
+                f"Cannot dry-run the rollback of {migration_name}: {dialect.label} commits DDL implicitly "
+                f"(line {implicit[0].line}: {implicit[0].summary}). Review {migration.down_path.name} instead."
+            )
+    if progress is not None:
+        progress(f"Rolling back {migration_name}")
+    run_statements(
+        conn, iter_statements(down_sql), migration.down_path.name, progress, cancel_check, monitor, errors=dialect.errors
+    )
     with conn.cursor() as cur:
-        cur.execute(down_sql)
         cur.execute(
             f"DELETE FROM {MIGRATION_TABLE} WHERE migration_name = %s",
             (migration_name,),
@@ -155,3 +821,271 @@ def rollback_last(conn: PgConnection, migrations: Sequence[MigrationFile], dry_r
     else:
         conn.commit()
     return migration_name
+
+
+@dataclass
+class BackfillSpec:
+    name: str
+    table: str
+    set_clause: str
+    where: str | None = None
+    key_column: str | None = None
+    batch_size: int = 5000
+    sleep_seconds: float = 0.0
+    lock_timeout_ms: int = 5000
+    max_retries: int = 5
+
+
+@dataclass
+class BackfillProgress:
+    name: str
+    table_name: str
+    rows_done: int
+    batches: int
+    last_key: str | None
+    elapsed_seconds: float
+    rows_per_second: float
+    completed: bool
+
+
+def ensure_backfill_table(conn: PgConnection) -> None:
+    sql = f"""
+    CREATE TABLE IF NOT EXISTS {BACKFILL_TABLE} (
+        backfill_name TEXT PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        last_key TEXT,
+        rows_done BIGINT NOT NULL DEFAULT 0,
+        batches BIGINT NOT NULL DEFAULT 0,
+        started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        completed_at TIMESTAMPTZ
+    );
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql)
+    conn.commit()
+
+
+def list_backfills(conn: PgConnection) -> List[BackfillProgress]:
+    ensure_backfill_table(conn)
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT backfill_name, table_name, rows_done, batches, last_key,
+                   EXTRACT(EPOCH FROM (COALESCE(completed_at, updated_at) - started_at)),
+                   completed_at IS NOT NULL
+            FROM {BACKFILL_TABLE}
+            ORDER BY updated_at DESC
+            """
+        )
+        rows = cur.fetchall()
+    conn.rollback()
+    return [
+        BackfillProgress(
+            name=row[0],
+            table_name=row[1],
+            rows_done=int(row[2]),
+            batches=int(row[3]),
+            last_key=row[4],
+            elapsed_seconds=float(row[5] or 0),
+            rows_per_second=float(row[2]) / float(row[5]) if row[5] else 0.0,
+            completed=bool(row[6]),
+        )
+        for row in rows
+    ]
+
+
+def _table_identifier(table: str) -> pg_sql.Identifier:
+    parts = [part.strip().strip('"') for part in table.split(".")]
+    if not all(parts) or len(parts) > 2:
+        raise ValueError(f"Invalid table name: {table!r}")
+    return pg_sql.Identifier(*parts)
+
+
+def _escape_percent(expression: str) -> str:
+    return expression.replace("%", "%%")
+
+
+def _backfill_key(conn: PgConnection, spec: BackfillSpec) -> tuple[str, str]:
+    regclass = _table_identifier(spec.table).as_string(conn)
+    with conn.cursor() as cur:
+        if spec.key_column:
+            cur.execute(
+                """
+                SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+                FROM pg_attribute a
+                WHERE a.attrelid = %s::regclass AND a.attname = %s AND NOT a.attisdropped
+                """,
+                (regclass, spec.key_column),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                raise ValueError(f"Column {spec.key_column!r} not found on {spec.table}.")
+        else:
+            cur.execute(
+                """
+                SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+                FROM pg_index i
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+                WHERE i.indrelid = %s::regclass AND i.indisprimary
+                """,
+                (regclass,),
+            )
+            rows = cur.fetchall()
+            if len(rows) != 1:
+                raise ValueError(
+                    f"{spec.table} has no single-column primary key; set key_column to a unique, indexed column."
+                )
+    conn.rollback()
+    return str(rows[0][0]), str(rows[0][1])
+
+
+def run_backfill(
+    conn: PgConnection,
+    spec: BackfillSpec,
+    dry_run: bool = False,
+    restart: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel_check: CancelCheck | None = None,
+) -> BackfillProgress:
+    if spec.batch_size < 1:
+        raise ValueError("Backfill batch size must be at least 1.")
+    if not spec.set_clause.strip():
+        raise ValueError("Backfill SET expression cannot be empty.")
+
+    ensure_backfill_table(conn)
+    key_column, key_type = _backfill_key(conn, spec)
+    table = _table_identifier(spec.table)
+    key = pg_sql.Identifier(key_column)
+    where = pg_sql.SQL(f" AND ({_escape_percent(spec.where)})") if spec.where and spec.where.strip() else pg_sql.SQL("")
+    lower_bound = pg_sql.SQL(" AND {key} > CAST(%(last_key)s AS {key_type})").format(
+        key=key, key_type=pg_sql.SQL(key_type)
+    )
+
+    def batch_query(first: bool) -> pg_sql.Composed:
+        return pg_sql.SQL(
+            """
+            WITH batch AS (
+                SELECT {key} AS __backfill_key
+                FROM {table}
+                WHERE TRUE{lower_bound}{where}
+                ORDER BY {key}
+                LIMIT %(batch_size)s
+            ), updated AS (
+                UPDATE {table} AS __target
+                SET {set_clause}
+                FROM batch
+                WHERE __target.{key} = batch.__backfill_key
+                RETURNING 1
+            )
+            SELECT (SELECT max(__backfill_key)::text FROM batch), (SELECT count(*) FROM updated)
+            """
+        ).format(
+            key=key,
+            table=table,
+            lower_bound=pg_sql.SQL("") if first else lower_bound,
+            where=where,
+            set_clause=pg_sql.SQL(_escape_percent(spec.set_clause)),
+        )
+
+    with conn.cursor() as cur:
+        if restart and not dry_run:
+            cur.execute(f"DELETE FROM {BACKFILL_TABLE} WHERE backfill_name = %s", (spec.name,))
+        cur.execute(
+            f"""
+            INSERT INTO {BACKFILL_TABLE} (backfill_name, table_name)
+            VALUES (%s, %s)
+            ON CONFLICT (backfill_name) DO NOTHING
+            """,
+            (spec.name, spec.table),
+        )
+        cur.execute(
+            f"SELECT last_key, rows_done, batches, completed_at IS NOT NULL FROM {BACKFILL_TABLE} WHERE backfill_name = %s",
+            (spec.name,),
+        )
+        row = cur.fetchone()
+    if dry_run:
+        conn.rollback()
+    else:
+        conn.commit()
+
+    last_key = row[0] if row else None
+    rows_done = int(row[1]) if row else 0
+    batches = int(row[2]) if row else 0
+    state = BackfillProgress(spec.name, spec.table, rows_done, batches, last_key, 0.0, 0.0, bool(row and row[3]))
+    if state.completed:
+        if progress is not None:
+            progress(f"Backfill {spec.name} already completed ({rows_done:,} rows); use restart to run it again.")
+        return state
+    if progress is not None and last_key is not None:
+        progress(f"Backfill {spec.name} resuming after key {last_key} ({rows_done:,} rows done).")
+
+    options = ApplyOptions(lock_timeout_ms=spec.lock_timeout_ms, max_retries=spec.max_retries)
+    started = time.monotonic()
+    rows_this_run = 0
+
+    while True:
+        if cancel_check is not None:
+            cancel_check()
+        result: List[tuple] = []
+
+        def run_batch() -> None:
+            with conn.cursor() as cur:
+                cur.execute(f"SET LOCAL lock_timeout = {int(spec.lock_timeout_ms)}")
+                cur.execute(
+                    batch_query(state.last_key is None),
+                    {"last_key": state.last_key, "batch_size": spec.batch_size},
+                )
+                result[:] = [cur.fetchone()]
+                batch_last_key, updated = result[0]
+                if batch_last_key is None:
+                    cur.execute(
+                        f"UPDATE {BACKFILL_TABLE} SET completed_at = now(), updated_at = now() WHERE backfill_name = %s",
+                        (spec.name,),
+                    )
+                else:
+                    cur.execute(
+                        f"""
+                        UPDATE {BACKFILL_TABLE}
+                        SET last_key = %s, rows_done = rows_done + %s, batches = batches + 1, updated_at = now()
+                        WHERE backfill_name = %s
+                        """,
+                        (batch_last_key, updated, spec.name),
+                    )
+            if dry_run:
+                conn.rollback()
+            else:
+                conn.commit()
+
+        with_lock_retry(run_batch, conn, f"Backfill {spec.name}", options, progress, cancel_check)
+        batch_last_key, updated = result[0]
+        state.elapsed_seconds = time.monotonic() - started
+        state.rows_per_second = rows_this_run / state.elapsed_seconds if state.elapsed_seconds > 0 else 0.0
+        if batch_last_key is None:
+            state.completed = not dry_run
+            break
+
+        updated = int(updated or 0)
+        rows_this_run += updated
+        state.rows_done += updated
+        state.batches += 1
+        state.last_key = batch_last_key
+        state.rows_per_second = rows_this_run / state.elapsed_seconds if state.elapsed_seconds > 0 else 0.0
+        if progress is not None:
+            progress(
+                f"Backfill {spec.name}: batch {state.batches:,}, {state.rows_done:,} rows, "
+                f"{state.rows_per_second:,.0f} rows/s, last key {batch_last_key}"
+            )
+        if dry_run:
+            break
+        if spec.sleep_seconds > 0:
+            cancellable_sleep(spec.sleep_seconds, cancel_check)
+
+    if progress is not None:
+        verb = "would update" if dry_run else "updated"
+        progress(
+            f"Backfill {spec.name} {'dry-run finished' if dry_run else 'completed'}: "
+            f"{verb} {rows_this_run:,} rows in {state.elapsed_seconds:.1f}s ({state.rows_per_second:,.0f} rows/s)."
+        )
+    return state
+
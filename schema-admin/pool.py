@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List
+
+from psycopg import Connection as PgConnection
+
+from dialects import dialect_for_url
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+@dataclass
+class PoolStats:
+    size: int
+    idle: int
+    in_use: int
+    created: int
+    discarded: int
+    evicted: int
+
+
+@dataclass
+class _Entry:
+    conn: PgConnection
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        db_url: str,
+        min_size: int = 1,
+        max_size: int = 4,
+        max_idle_seconds: float = 300.0,
+        health_check_after: float = 30.0,
+        acquire_timeout: float = 30.0,
+        connect_retries: int = 2,
+        connector: Callable[[str], PgConnection] | None = None,
+    ) -> None:
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1.")
+        self.db_url = db_url
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self.connect_retries = connect_retries
+        self._dialect = dialect_for_url(db_url)
+        self._connector = connector or self._dialect.connect
+        self._cond = threading.Condition()
+        self._idle: List[_Entry] = []
+        self._in_use: Dict[int, _Entry] = {}
+        self._opening = 0
+        self._closed = False
+        self._created = 0
+        self._discarded = 0
+        self._evicted = 0
+
+    def open(self) -> None:
+        while True:
+            with self._cond:
+                if self._closed or self._total() >= self.min_size:
+                    return
+                self._opening += 1
+            try:
+                entry = _Entry(self._new_connection())
+            finally:
+                with self._cond:
+                    self._opening -= 1
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    @contextmanager
+    def connection(self, reset: bool = False, timeout: float | None = None) -> Iterator[PgConnection]:
+        conn = self.getconn(timeout=timeout)
+        discard = False
+        try:
+            yield conn
+        except self._dialect.operational_errors:
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, reset=reset, discard=discard)
+
+    def getconn(self, timeout: float | None = None) -> PgConnection:
+        deadline = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+        while True:
+            entry = None
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed.")
+                self._evict_idle_locked()
+                if self._idle:
+                    entry = self._idle.pop()
+                elif self._total() < self.max_size:
+                    self._opening += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f"Timed out waiting for a connection (max_size={self.max_size})."
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            if entry is None:
+                try:
+                    entry = _Entry(self._new_connection())
+                finally:
+                    with self._cond:
+                        self._opening -= 1
+            elif not self._is_healthy(entry):
+                self._discard(entry.conn)
+                continue
+
+            entry.last_used = time.monotonic()
+            with self._cond:
+                self._in_use[id(entry.conn)] = entry
+            return entry.conn
+
+    def putconn(self, conn: PgConnection, reset: bool = False, discard: bool = False) -> None:
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None:
+            raise ValueError("Connection does not belong to this pool.")
+
+        if discard or self._closed or not self._restore(conn, reset):
+            self._discard(conn)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def evict_idle(self) -> int:
+        with self._cond:
+            return self._evict_idle_locked()
+
+    def stats(self) -> PoolStats:
+        with self._cond:
+            return PoolStats(
+                size=self._total(),
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                created=self._created,
+                discarded=self._discarded,
+                evicted=self._evicted,
+            )
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_quietly(entry.conn)
+
+    def _total(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def _new_connection(self) -> PgConnection:
+        attempt = 0
+        while True:
+            try:
+                conn = self._connector(self.db_url)
+            except self._dialect.operational_errors:
+                if attempt >= self.connect_retries:
+                    raise
+                attempt += 1
+                time.sleep(0.2 * (2 ** (attempt - 1)))
+                continue
+            with self._cond:
+                self._created += 1
+            return conn
+
+    def _is_healthy(self, entry: _Entry) -> bool:
+        conn = entry.conn
+        if not self._dialect.is_usable(conn):
+            return False
+        if time.monotonic() - entry.last_used < self.health_check_after:
+            return True
+        try:
+            self._dialect.ping(conn)
+        except self._dialect.errors:
+            return False
+        return True
+
+    def _restore(self, conn: PgConnection, reset: bool) -> bool:
+        return self._dialect.restore(conn, reset)
+
+    def _evict_idle_locked(self) -> int:
+        if self.max_idle_seconds <= 0:
+            return 0
+        now = time.monotonic()
+        keep: List[_Entry] = []
+        expired: List[_Entry] = []
+        surplus = self._total() - self.min_size
+        for entry in sorted(self._idle, key=lambda item: item.last_used):
+            if surplus > 0 and now - entry.last_used > self.max_idle_seconds:
+                expired.append(entry)
+                surplus -= 1
+            else:
+                keep.append(entry)
+        if not expired:
+            return 0
+        self._idle = keep
+        self._evicted += len(expired)
+        for entry in expired:
+            self._close_quietly(entry.conn)
+        return len(expired)
+
+    def _discard(self, conn: PgConnection) -> None:
+        with self._cond:
+            self._discarded += 1
+            self._cond.notify()
+        self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn: PgConnection) -> None:
+        try:
+            conn.close()
+        except Exception:  # noqa: BLE001
+            pass
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_url: str, **options) -> ConnectionPool:
+    with _pools_lock:
+        pool = _pools.get(db_url)
+        if pool is None:
+            pool = ConnectionPool(db_url, **options)
+            _pools[db_url] = pool
+        return pool
+
+
+def evict_idle_all() -> int:
+    with _pools_lock:
+        pools = list(_pools.values())
+    return sum(pool.evict_idle() for pool in pools)
+
+
+def close_pool(db_url: str) -> None:
+    with _pools_lock:
+        pool = _pools.pop(db_url, None)
+    if pool is not None:
+        pool.close()
+
+
+def close_all() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple
+
+import psycopg
+from psycopg import Connection as PgConnection
+
+from db import LockWaitMonitor, StatementFailed, run_statements
+from sqlscript import is_non_transactional, normalized, split_statements
+
+EXPLAIN_OPTIONS = "ANALYZE, BUFFERS, FORMAT JSON"
+PLAN_HISTORY = 5
+PLAN_CACHE_QUERIES = 50
+HOT_NODE_SHARE = 0.2
+HOT_NODE_LIMIT = 3
+
+_EXPLAINABLE = re.compile(r"^\(*\s*(SELECT|WITH|VALUES|TABLE|INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+_DETAIL_KEYS = ("Index Cond", "Recheck Cond", "Hash Cond", "Merge Cond", "Join Filter", "Filter", "Sort Key")
+
+
+@dataclass
+class PlanNode:
+    node_type: str
+    relation: str | None
+    index_name: str | None
+    total_ms: float
+    self_ms: float
+    actual_rows: int
+    plan_rows: int
+    loops: int
+    shared_hit: int
+    shared_read: int
+    detail: str = ""
+    children: List[PlanNode] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        text = self.node_type
+        if self.index_name:
+            text += f" using {self.index_name}"
+        if self.relation:
+            text += f" on {self.relation}"
+        return text
+
+    @property
+    def is_scan(self) -> bool:
+        return self.relation is not None and self.node_type.endswith("Scan")
+
+
+@dataclass
+class QueryPlan:
+    query: str
+    root: PlanNode
+    planning_ms: float
+    execution_ms: float
+    setup: List[str] = field(default_factory=list)
+    captured_at: float = field(default_factory=time.time)
+
+    def nodes(self) -> List[PlanNode]:
+        found: List[PlanNode] = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            found.append(node)
+            stack.extend(reversed(node.children))
+        return found
+
+    def hot_nodes(self, limit: int = HOT_NODE_LIMIT) -> List[PlanNode]:
+        total = max(self.root.total_ms, 0.001)
+        ranked = sorted(self.nodes(), key=lambda node: node.self_ms, reverse=True)
+        return [node for node in ranked[:limit] if node.self_ms / total >= HOT_NODE_SHARE]
+
+    def share(self, node: PlanNode) -> float:
+        return node.self_ms / self.root.total_ms if self.root.total_ms > 0 else 0.0
+
+    def scans(self) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        for node in self.nodes():
+            if node.is_scan:
+                label = node.node_type + (f" using {node.index_name}" if node.index_name else "")
+                found[node.relation] = label if node.relation not in found else f"{found[node.relation]}, {label}"
+        return found
+
+    def summary(self) -> str:
+        text = (
+            f"{self.execution_ms:.3f} ms execution, {self.planning_ms:.3f} ms planning, "
+            f"buffers {self.root.shared_hit:,} hit / {self.root.shared_read:,} read"
+        )
+        if self.setup:
+            text += f" (after setup: {'; '.join(self.setup)})"
+        return text
+
+
+def parse_plan(query: str, document, setup: List[str] | None = None) -> QueryPlan:
+    if isinstance(document, (str, bytes)):
+        document = json.loads(document)
+    if isinstance(document, list):
+        document = document[0]
+    return QueryPlan(
+        query=query,
+        root=_parse_node(document["Plan"]),
+        planning_ms=float(document.get("Planning Time", 0.0)),
+        execution_ms=float(document.get("Execution Time", 0.0)),
+        setup=list(setup or []),
+    )
+
+
+def _parse_node(raw: Dict) -> PlanNode:
+    loops = int(raw.get("Actual Loops", 1) or 0)
+    children = [_parse_node(child) for child in raw.get("Plans", [])]
+    total_ms = float(raw.get("Actual Total Time", 0.0)) * max(loops, 1)
+    relation = raw.get("Relation Name")
+    if relation and raw.get("Alias") and raw["Alias"] != relation:
+        relation = f"{relation} {raw['Alias']}"
+    return PlanNode(
+        node_type=_node_type(raw),
+        relation=relation,
+        index_name=raw.get("Index Name"),
+        total_ms=total_ms,
+        self_ms=max(0.0, total_ms - sum(child.total_ms for child in children)),
+        actual_rows=int(raw.get("Actual Rows", 0)) * max(loops, 1),
+        plan_rows=int(raw.get("Plan Rows", 0)),
+        loops=loops,
+        shared_hit=int(raw.get("Shared Hit Blocks", 0)),
+        shared_read=int(raw.get("Shared Read Blocks", 0)),
+        detail="; ".join(
+            f"{key}: {', '.join(raw[key]) if isinstance(raw[key], list) else raw[key]}" for key in _DETAIL_KEYS if key in raw
+        ),
+        children=children,
+    )
+
+
+def _node_type(raw: Dict) -> str:
+    node_type = raw.get("Node Type", "?")
+    if raw.get("Join Type") and raw["Join Type"] != "Inner":
+        node_type = f"{node_type} ({raw['Join Type']})"
+    if raw.get("Operation") and node_type == "ModifyTable":
+        node_type = raw["Operation"]
+    return node_type
+
+
+def profile_script(
+    conn: PgConnection,
+    sql: str,
+    progress: Callable[[str], None] | None = None,
+    cancel_check: Callable[[], None] | None = None,
+    monitor: LockWaitMonitor | None = None,
+) -> QueryPlan:
+    statements = split_statements(sql)
+    if not statements:
+        raise ValueError("Query is empty.")
+    setup, target = statements[:-1], statements[-1]
+    for statement in setup:
+        if is_non_transactional(statement):
+            raise ValueError(
+                f"Line {statement.line}: {statement.summary} cannot run inside the profiler transaction; "
+                "use the plain form (for example CREATE INDEX without CONCURRENTLY), it is rolled back anyway."
+            )
+    if not _EXPLAINABLE.match(normalized(target)):
+        raise ValueError(f"Only the last statement is profiled and it must be a query or DML: {target.summary}")
+
+    try:
+        run_statements(conn, setup, "profile setup", progress, cancel_check, monitor)
+        if cancel_check is not None:
+            cancel_check()
+        if progress is not None:
+            progress(f"profile:{target.line} explaining: {target.summary}")
+        with conn.cursor() as cur:
+            try:
+                cur.execute(f"EXPLAIN ({EXPLAIN_OPTIONS}) {target.text}")
+            except psycopg.Error as exc:
+                raise StatementFailed("profile", len(statements), target, exc) from exc
+            document = cur.fetchone()[0]
+    finally:
+        conn.rollback()
+    return parse_plan(normalized(target), document, [statement.summary for statement in setup])
+
+
+def compare_plans(before: QueryPlan, after: QueryPlan) -> List[str]:
+    lines = [
+        f"Execution: {before.execution_ms:.3f} ms -> {after.execution_ms:.3f} ms ({_change(before.execution_ms, after.execution_ms)})",
+        f"Planning: {before.planning_ms:.3f} ms -> {after.planning_ms:.3f} ms",
+        f"Buffers hit: {before.root.shared_hit:,} -> {after.root.shared_hit:,}",
+        f"Buffers read: {before.root.shared_read:,} -> {after.root.shared_read:,}",
+        f"Rows: {before.root.actual_rows:,} -> {after.root.actual_rows:,}",
+    ]
+    before_scans = before.scans()
+    after_scans = after.scans()
+    for relation in sorted(set(before_scans) | set(after_scans)):
+        old = before_scans.get(relation, "-")
+        new = after_scans.get(relation, "-")
+        lines.append(f"{relation}: {old}" + ("" if old == new else f" -> {new}"))
+    before_hot = before.hot_nodes(1)
+    after_hot = after.hot_nodes(1)
+    lines.append(
+        f"Hottest node: {before_hot[0].label if before_hot else '-'} -> {after_hot[0].label if after_hot else '-'}"
+    )
+    if before.setup != after.setup:
+        lines.append(f"Setup: {'; '.join(before.setup) or '-'} -> {'; '.join(after.setup) or '-'}")
+    return lines
+
+
+def _change(before: float, after: float) -> str:
+    if before <= 0:
+        return "n/a"
+    change = (after - before) / before * 100
+    return f"{change:+.1f}%"
+
+
+class PlanCache:
+    def __init__(self, history: int = PLAN_HISTORY, max_queries: int = PLAN_CACHE_QUERIES) -> None:
+        self.history_size = history
+        self.max_queries = max_queries
+        self._lock = threading.Lock()
+        self._plans: OrderedDict[Tuple[str, str], List[QueryPlan]] = OrderedDict()
+
+    def add(self, db_url: str, plan: QueryPlan) -> None:
+        key = (db_url, plan.query)
+        with self._lock:
+            plans = self._plans.pop(key, [])
+            plans.append(plan)
+            self._plans[key] = plans[-self.history_size :]
+            while len(self._plans) > self.max_queries:
+                self._plans.popitem(last=False)
+
+    def history(self, db_url: str, query: str) -> List[QueryPlan]:
+        with self._lock:
+            return list(self._plans.get((db_url, normalized(query)), []))
+
+    def invalidate(self, db_url: str | None = None) -> None:
+        with self._lock:
+            if db_url is None:
+                self._plans.clear()
+                return
+            for key in [key for key in self._plans if key[0] == db_url]:
+                del self._plans[key]
+
+
+cache = PlanCache()
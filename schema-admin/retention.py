@@ -0,0 +1,910 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, List, Sequence, Tuple
+
+from psycopg import Connection as PgConnection
+from psycopg import sql as pg_sql
+
+from config import DESTINATION_ARCHIVE, DESTINATION_DELETE, DESTINATION_FILE, DESTINATIONS, PERIODS, RetentionPolicy
+from migrations import ApplyOptions, CancelCheck, ProgressCallback, cancellable_sleep, with_lock_retry
+
+AUDIT_TABLE = "session_cleanup_audit"
+
+KEY_COLUMN = "id"
+TIME_COLUMN = "created_at"
+BINDING_COLUMN = "binding_id"
+
+PARTITIONS_SQL = """
+SELECT
+    c.relname,
+    (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'FROM \\(''([^'']+)''\\)'))[1]::timestamptz,
+    (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \\(''([^'']+)''\\)'))[1]::timestamptz,
+    GREATEST(c.reltuples, 0)::bigint,
+    pg_total_relation_size(c.oid),
+    {detach_pending}
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = %s::regclass
+ORDER BY 3 NULLS LAST, 1
+"""
+
+AUDIT_SQL = """
+INSERT INTO {audit} (exam_session_id, session_status, archive_payload)
+SELECT
+    st.exam_session_id,
+    COALESCE(es.status, 'UNKNOWN'),
+    jsonb_build_object(
+        'kind', 'retention',
+        'table', %(table)s::text,
+        'rows', count(*),
+        'oldest', min(t.{time}),
+        'newest', max(t.{time}),
+        'max_age_days', %(max_age_days)s::int,
+        'destination', %(destination)s::text
+    )
+FROM {source} t
+JOIN device_bindings b ON b.id = t.{binding}
+JOIN session_tokens st ON st.token = b.token
+LEFT JOIN exam_sessions es ON es.id = st.exam_session_id
+{where}
+GROUP BY st.exam_session_id, es.status
+"""
+
+_INDEX_DEF = re.compile(r"^(CREATE (?:UNIQUE )?INDEX )(\S+)( ON )(?:ONLY )?(\S+)( .*)$", re.IGNORECASE | re.DOTALL)
+
+
+@dataclass
+class RetentionOptions:
+    archive_dir: str = ""
+    sleep_seconds: float = 0.5
+    vacuum_every: int = 20
+    lock_timeout_ms: int = 5000
+    max_retries: int = 5
+    max_batches: int = 0
+
+
+@dataclass
+class PartitionInfo:
+    name: str
+    lower: datetime | None
+    upper: datetime | None
+    row_estimate: int
+    total_bytes: int
+    detach_pending: bool = False
+
+    @property
+    def bounds(self) -> str:
+        lower = self.lower.isoformat() if self.lower else "MINVALUE"
+        upper = self.upper.isoformat() if self.upper else "MAXVALUE"
+        return f"[{lower}, {upper})" if self.lower or self.upper else "DEFAULT"
+
+
+@dataclass
+class RetentionResult:
+    table: str
+    destination: str
+    cutoff: datetime | None = None
+    dry_run: bool = False
+    rows: int = 0
+    batches: int = 0
+    audit_rows: int = 0
+    partitions: List[str] = field(default_factory=list)
+    files: List[str] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    def describe(self) -> str:
+        verb = "would archive" if self.dry_run else "archived"
+        if self.destination == DESTINATION_DELETE:
+            verb = "would delete" if self.dry_run else "deleted"
+        parts = [f"{self.table}: {verb} {self.rows:,} row(s) older than {self.cutoff:%Y-%m-%d %H:%M %Z}"]
+        if self.partitions:
+            parts.append(f"{len(self.partitions)} partition(s) detached ({', '.join(self.partitions)})")
+        if self.batches:
+            parts.append(f"{self.batches:,} batch(es)")
+        if self.audit_rows:
+            parts.append(f"{self.audit_rows:,} audit row(s)")
+        if self.files:
+            parts.append(f"file(s): {', '.join(self.files)}")
+        return ", ".join(parts) + f" in {self.elapsed_seconds:.1f}s"
+
+
+def _identifier(name: str) -> pg_sql.Identifier:
+    parts = [part.strip() for part in name.split(".") if part.strip()]
+    if not parts or len(parts) > 2:
+        raise ValueError(f"Invalid table name: {name}")
+    return pg_sql.Identifier(*parts)
+
+
+def _qualified(base: str, name: str) -> str:
+    schema, dot, _table = base.rpartition(".")
+    return f"{schema}{dot}{name}"
+
+
+def _relname(name: str) -> str:
+    return name.rpartition(".")[2]
+
+
+def validate_policy(policy: RetentionPolicy) -> None:
+    _identifier(policy.table)
+    if policy.max_age_days < 1:
+        raise ValueError(f"{policy.table}: max age must be at least 1 day.")
+    if policy.batch_size < 1:
+        raise ValueError(f"{policy.table}: batch size must be at least 1.")
+    if policy.destination not in DESTINATIONS:
+        raise ValueError(f"{policy.table}: destination must be one of {', '.join(DESTINATIONS)}.")
+
+
+def archive_table_name(table: str) -> str:
+    return _qualified(table, f"{_relname(table)}_archive")
+
+
+def is_partitioned(conn: PgConnection, table: str) -> bool:
+    with conn.cursor() as cur:
+        cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+        row = cur.fetchone()
+    conn.rollback()
+    if row is None:
+        raise ValueError(f"Table {table} does not exist.")
+    return row[0] == "p"
+
+
+def list_partitions(conn: PgConnection, table: str) -> List[PartitionInfo]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT current_setting('server_version_num')::int")
+        version = int(cur.fetchone()[0])
+        detach_pending = "i.inhdetachpending" if version >= 140000 else "FALSE"
+        cur.execute(PARTITIONS_SQL.format(detach_pending=detach_pending), (table,))
+        rows = cur.fetchall()
+    conn.rollback()
+    return [
+        PartitionInfo(
+            name=_qualified(table, row[0]),
+            lower=row[1],
+            upper=row[2],
+            row_estimate=int(row[3] or 0),
+            total_bytes=int(row[4] or 0),
+            detach_pending=bool(row[5]),
+        )
+        for row in rows
+    ]
+
+
+def run_retention(
+    conn: PgConnection,
+    policies: Sequence[RetentionPolicy],
+    options: RetentionOptions | None = None,
+    dry_run: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel_check: CancelCheck | None = None,
+) -> List[RetentionResult]:
+    options = options or RetentionOptions()
+    active = [policy for policy in policies if policy.enabled]
+    for policy in active:
+        validate_policy(policy)
+        if policy.destination == DESTINATION_FILE and not options.archive_dir.strip():
+            raise ValueError(f"{policy.table}: choose an archive directory for file archival.")
+
+    results: List[RetentionResult] = []
+    for policy in active:
+        if cancel_check is not None:
+            cancel_check()
+        results.append(apply_policy(conn, policy, options, dry_run, progress, cancel_check))
+    return results
+
+
+def apply_policy(
+    conn: PgConnection,
+    policy: RetentionPolicy,
+    options: RetentionOptions | None = None,
+    dry_run: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel_check: CancelCheck | None = None,
+) -> RetentionResult:
+    options = options or RetentionOptions()
+    validate_policy(policy)
+    started = time.monotonic()
+    with conn.cursor() as cur:
+        cur.execute("SELECT now() - make_interval(days => %s)", (policy.max_age_days,))
+        cutoff = cur.fetchone()[0]
+    conn.rollback()
+
+    result = RetentionResult(policy.table, policy.destination, cutoff=cutoff, dry_run=dry_run)
+    if is_partitioned(conn, policy.table):
+        _purge_partitions(conn, policy, cutoff, options, dry_run, progress, cancel_check, result)
+    elif dry_run:
+        result.rows = _count_expired(conn, policy.table, cutoff)
+    else:
+        _archive_batches(conn, policy, cutoff, options, progress, cancel_check, result)
+
+    result.elapsed_seconds = time.monotonic() - started
+    if progress is not None:
+        progress(f"Retention {result.describe()}")
+    return result
+
+
+def _count_expired(conn: PgConnection, table: str, cutoff: datetime) -> int:
+    with conn.cursor() as cur:
+        cur.execute(
+            pg_sql.SQL("SELECT count(*) FROM {table} WHERE {time} < %s").format(
+                table=_identifier(table), time=pg_sql.Identifier(TIME_COLUMN)
+            ),
+            (cutoff,),
+        )
+        count = int(cur.fetchone()[0])
+    conn.rollback()
+    return count
+
+
+def _columns(conn: PgConnection, table: str) -> List[Tuple[str, str]]:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT attname, format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+            ORDER BY attnum
+            """,
+            (table,),
+        )
+        rows = cur.fetchall()
+    conn.rollback()
+    return [(str(row[0]), str(row[1])) for row in rows]
+
+
+def ensure_archive_table(conn: PgConnection, table: str) -> str:
+    archive = archive_table_name(table)
+    with conn.cursor() as cur:
+        cur.execute(
+            pg_sql.SQL("CREATE TABLE IF NOT EXISTS {archive} (LIKE {table})").format(
+                archive=_identifier(archive), table=_identifier(table)
+            )
+        )
+        cur.execute(
+            """
+            SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+            FROM pg_attribute a
+            WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+              AND NOT EXISTS (
+                  SELECT 1 FROM pg_attribute x
+                  WHERE x.attrelid = %s::regclass AND x.attname = a.attname AND NOT x.attisdropped
+              )
+            ORDER BY a.attnum
+            """,
+            (table, archive),
+        )
+        for name, data_type in cur.fetchall():
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {archive} ADD COLUMN IF NOT EXISTS {column} {data_type}").format(
+                    archive=_identifier(archive), column=pg_sql.Identifier(name), data_type=pg_sql.SQL(data_type)
+                )
+            )
+    conn.commit()
+    return archive
+
+
+def _archive_file(options: RetentionOptions, name: str) -> Path:
+    directory = Path(options.archive_dir).expanduser()
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return directory / f"{name.replace('.', '-')}-{stamp}.csv.gz"
+
+
+def _copy_out(cur, statement: pg_sql.Composable, params=None) -> bytes:
+    buffer = io.BytesIO()
+    with cur.copy(statement, params) as copy:
+        for data in copy:
+            buffer.write(data)
+    return buffer.getvalue()
+
+
+def _csv_header(columns: Sequence[Tuple[str, str]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow([name for name, _type in columns])
+    return buffer.getvalue().encode("utf-8")
+
+
+def _vacuum(conn: PgConnection, table: str, progress: ProgressCallback | None) -> None:
+    started = time.monotonic()
+    conn.autocommit = True
+    try:
+        conn.execute(pg_sql.SQL("VACUUM (ANALYZE) {table}").format(table=_identifier(table)))
+    finally:
+        conn.autocommit = False
+    if progress is not None:
+        progress(f"Retention {table}: VACUUM (ANALYZE) took {time.monotonic() - started:.1f}s")
+
+
+def _archive_batches(
+    conn: PgConnection,
+    policy: RetentionPolicy,
+    cutoff: datetime,
+    options: RetentionOptions,
+    progress: ProgressCallback | None,
+    cancel_check: CancelCheck | None,
+    result: RetentionResult,
+    source: str | None = None,
+) -> None:
+    source = source or policy.table
+    table = _identifier(source)
+    key = pg_sql.Identifier(KEY_COLUMN)
+    columns = _columns(conn, source)
+    column_list = pg_sql.SQL(", ").join(pg_sql.Identifier(name) for name, _type in columns)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            pg_sql.SQL("SELECT {key} FROM {table} WHERE {time} >= %s ORDER BY {key} LIMIT 1").format(
+                key=key, table=table, time=pg_sql.Identifier(TIME_COLUMN)
+            ),
+            (cutoff,),
+        )
+        row = cur.fetchone()
+    conn.rollback()
+    boundary = row[0] if row else None
+
+    select_keys = pg_sql.SQL(
+        """
+        SELECT {key} FROM {table}
+        WHERE {time} < %(cutoff)s{lower}{upper}
+        ORDER BY {key}
+        LIMIT %(limit)s
+        """
+    )
+    audit = pg_sql.SQL(AUDIT_SQL).format(
+        audit=pg_sql.Identifier(AUDIT_TABLE),
+        time=pg_sql.Identifier(TIME_COLUMN),
+        binding=pg_sql.Identifier(BINDING_COLUMN),
+        source=table,
+        where=pg_sql.SQL("WHERE t.{key} = ANY(%(ids)s)").format(key=key),
+    )
+    if policy.destination == DESTINATION_ARCHIVE:
+        archive = ensure_archive_table(conn, policy.table)
+        move = pg_sql.SQL(
+            """
+            WITH moved AS (DELETE FROM {table} WHERE {key} = ANY(%(ids)s) RETURNING {columns})
+            INSERT INTO {archive} ({columns}) SELECT {columns} FROM moved
+            """
+        ).format(table=table, key=key, columns=column_list, archive=_identifier(archive))
+    elif policy.destination == DESTINATION_FILE:
+        move = pg_sql.SQL(
+            "COPY (DELETE FROM {table} WHERE {key} = ANY(%(ids)s) RETURNING {columns}) TO STDOUT (FORMAT csv)"
+        ).format(
+            table=table, key=key, columns=column_list
+        )
+    else:
+        move = pg_sql.SQL("DELETE FROM {table} WHERE {key} = ANY(%(ids)s)").format(table=table, key=key)
+
+    handle: IO[bytes] | None = None
+
+    def _archive_handle(current: IO[bytes] | None) -> IO[bytes]:
+        if current is not None:
+            return current
+        path = _archive_file(options, policy.table)
+        opened = gzip.open(path, "wb")
+        opened.write(_csv_header(columns))
+        result.files.append(str(path))
+        return opened
+
+    apply_options = ApplyOptions(lock_timeout_ms=options.lock_timeout_ms, max_retries=options.max_retries)
+    last_key = None
+    started = time.monotonic()
+    try:
+        while True:
+            if cancel_check is not None:
+                cancel_check()
+            if options.max_batches and result.batches >= options.max_batches:
+                if progress is not None:
+                    progress(f"Retention {source}: stopping after {result.batches} batch(es) (batch limit).")
+                break
+
+            params = {
+                "cutoff": cutoff,
+                "limit": policy.batch_size,
+                "after": last_key,
+                "boundary": boundary,
+                "table": policy.table,
+                "max_age_days": policy.max_age_days,
+                "destination": policy.destination,
+            }
+            query = select_keys.format(
+                key=key,
+                table=table,
+                time=pg_sql.Identifier(TIME_COLUMN),
+                lower=pg_sql.SQL("") if last_key is None else pg_sql.SQL(" AND {key} > %(after)s").format(key=key),
+                upper=pg_sql.SQL("") if boundary is None else pg_sql.SQL(" AND {key} < %(boundary)s").format(key=key),
+            )
+            batch: List[Tuple[list, int, int]] = []
+
+            def run_batch() -> None:
+                nonlocal handle
+                with conn.cursor() as cur:
+                    cur.execute(f"SET LOCAL lock_timeout = {int(options.lock_timeout_ms)}")
+                    cur.execute(query, params)
+                    ids = [row[0] for row in cur.fetchall()]
+                    if not ids:
+                        conn.rollback()
+                        batch[:] = [(ids, 0, 0)]
+                        return
+                    params["ids"] = ids
+                    cur.execute(audit, params)
+                    audit_rows = max(cur.rowcount, 0)
+                    if policy.destination == DESTINATION_FILE:
+                        data = _copy_out(cur, move, params)
+                        moved = max(cur.rowcount, 0)
+                        handle = _archive_handle(handle)
+                        handle.write(data)
+                        handle.flush()
+                    else:
+                        cur.execute(move, params)
+                        moved = max(cur.rowcount, 0)
+                conn.commit()
+                batch[:] = [(ids, moved, audit_rows)]
+
+            with_lock_retry(run_batch, conn, f"Retention {source}", apply_options, progress, cancel_check)
+            ids, moved, audit_rows = batch[0]
+            if not ids:
+                break
+
+            last_key = ids[-1]
+            result.rows += moved
+            result.audit_rows += audit_rows
+            result.batches += 1
+            if progress is not None:
+                elapsed = time.monotonic() - started
+                rate = result.rows / elapsed if elapsed > 0 else 0.0
+                progress(
+                    f"Retention {source}: batch {result.batches:,}, {result.rows:,} rows, "
+                    f"{rate:,.0f} rows/s, last key {last_key}"
+                )
+            if options.vacuum_every and result.batches % options.vacuum_every == 0:
+                _vacuum(conn, source, progress)
+            if options.sleep_seconds > 0:
+                cancellable_sleep(options.sleep_seconds, cancel_check)
+    finally:
+        if handle is not None:
+            handle.close()
+
+    if result.batches and not (options.vacuum_every and result.batches % options.vacuum_every == 0):
+        _vacuum(conn, source, progress)
+
+
+def _purge_partitions(
+    conn: PgConnection,
+    policy: RetentionPolicy,
+    cutoff: datetime,
+    options: RetentionOptions,
+    dry_run: bool,
+    progress: ProgressCallback | None,
+    cancel_check: CancelCheck | None,
+    result: RetentionResult,
+) -> None:
+    partitions = list_partitions(conn, policy.table)
+    expired = [part for part in partitions if part.detach_pending or (part.upper is not None and part.upper <= cutoff)]
+    straddling = [
+        part
+        for part in partitions
+        if not part.detach_pending and part.lower is None and part.upper is not None and part.upper > cutoff
+    ]
+    if not dry_run:
+        ensure_partitions(conn, policy.table, progress=progress)
+    if dry_run:
+        result.partitions = [_relname(part.name) for part in expired]
+        result.rows = sum(part.row_estimate for part in expired)
+        result.rows += sum(_count_expired(conn, part.name, cutoff) for part in straddling)
+        return
+
+    apply_options = ApplyOptions(lock_timeout_ms=options.lock_timeout_ms, max_retries=options.max_retries)
+    concurrent = _server_version(conn) >= 140000
+    parent = _identifier(policy.table)
+    for part in expired:
+        if cancel_check is not None:
+            cancel_check()
+        name = _identifier(part.name)
+        if not part.detach_pending:
+            with conn.cursor() as cur:
+                cur.execute(
+                    pg_sql.SQL(AUDIT_SQL).format(
+                        audit=pg_sql.Identifier(AUDIT_TABLE),
+                        time=pg_sql.Identifier(TIME_COLUMN),
+                        binding=pg_sql.Identifier(BINDING_COLUMN),
+                        source=name,
+                        where=pg_sql.SQL(""),
+                    ),
+                    {"table": policy.table, "max_age_days": policy.max_age_days, "destination": policy.destination},
+                )
+                result.audit_rows += max(cur.rowcount, 0)
+                cur.execute(pg_sql.SQL("SELECT count(*) FROM {name}").format(name=name))
+                result.rows += int(cur.fetchone()[0])
+            conn.commit()
+
+        if part.detach_pending:
+            detach = pg_sql.SQL("ALTER TABLE {parent} DETACH PARTITION {name} FINALIZE")
+        elif concurrent:
+            detach = pg_sql.SQL("ALTER TABLE {parent} DETACH PARTITION {name} CONCURRENTLY")
+        else:
+            detach = pg_sql.SQL("ALTER TABLE {parent} DETACH PARTITION {name}")
+        statement = detach.format(parent=parent, name=name)
+
+        def run_detach() -> None:
+            conn.autocommit = True
+            try:
+                conn.execute(f"SET lock_timeout = {int(options.lock_timeout_ms)}")
+                conn.execute(statement)
+            finally:
+                conn.execute("RESET lock_timeout")
+                conn.autocommit = False
+
+        with_lock_retry(run_detach, conn, f"Retention {part.name}", apply_options, progress, cancel_check)
+        _dispose_partition(conn, policy, part, options, progress, result)
+        result.partitions.append(_relname(part.name))
+        if progress is not None:
+            progress(f"Retention {policy.table}: detached {_relname(part.name)} {part.bounds}")
+
+    for part in straddling:
+        if cancel_check is not None:
+            cancel_check()
+        if progress is not None:
+            progress(f"Retention {policy.table}: {_relname(part.name)} {part.bounds} ends after the cutoff; purging it in batches")
+        _archive_batches(conn, policy, cutoff, options, progress, cancel_check, result, source=part.name)
+
+
+def _dispose_partition(
+    conn: PgConnection,
+    policy: RetentionPolicy,
+    part: PartitionInfo,
+    options: RetentionOptions,
+    progress: ProgressCallback | None,
+    result: RetentionResult,
+) -> None:
+    name = _identifier(part.name)
+    with conn.cursor() as cur:
+        if policy.destination == DESTINATION_ARCHIVE:
+            suffix = _relname(part.name)[len(_relname(policy.table)) :].lstrip("_") or "partition"
+            archive = f"{_relname(archive_table_name(policy.table))}_{suffix}"
+            cur.execute(
+                "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                (part.name,),
+            )
+            for (constraint,) in cur.fetchall():
+                cur.execute(
+                    pg_sql.SQL("ALTER TABLE {name} DROP CONSTRAINT {constraint}").format(
+                        name=name, constraint=pg_sql.Identifier(constraint)
+                    )
+                )
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {name} RENAME TO {archive}").format(
+                    name=name, archive=pg_sql.Identifier(archive)
+                )
+            )
+            if progress is not None:
+                progress(f"Retention {policy.table}: kept {_relname(part.name)} as {archive}")
+        else:
+            if policy.destination == DESTINATION_FILE:
+                path = _archive_file(options, part.name)
+                with gzip.open(path, "wb") as handle:
+                    handle.write(_csv_header(_columns(conn, part.name)))
+                    with cur.copy(pg_sql.SQL("COPY {name} TO STDOUT (FORMAT csv)").format(name=name)) as copy:
+                        for data in copy:
+                            handle.write(data)
+                result.files.append(str(path))
+            cur.execute(pg_sql.SQL("DROP TABLE {name}").format(name=name))
+    conn.commit()
+
+
+def _server_version(conn: PgConnection) -> int:
+    with conn.cursor() as cur:
+        cur.execute("SELECT current_setting('server_version_num')::int")
+        version = int(cur.fetchone()[0])
+    conn.rollback()
+    return version
+
+
+def _partition_name(table: str, lower: datetime) -> str:
+    return _qualified(table, f"{_relname(table)}_p{lower.astimezone(timezone.utc):%Y%m%d}")
+
+
+def ensure_partitions(
+    conn: PgConnection,
+    table: str,
+    premake: int = 3,
+    progress: ProgressCallback | None = None,
+) -> List[str]:
+    bounded = [part for part in list_partitions(conn, table) if part.upper is not None]
+    if not bounded:
+        return []
+    last = bounded[-1]
+    created: List[str] = []
+    with conn.cursor() as cur:
+        cur.execute("SET LOCAL TIME ZONE 'UTC'")
+        if last.lower is None:
+            raise ValueError(f"{table} has no ranged partitions to extend; convert it with a period first.")
+        cur.execute(
+            """
+            SELECT lower, lower + step
+            FROM (SELECT age(%(upper)s, %(lower)s) AS step) s,
+                 generate_series(%(upper)s::timestamptz, now() + %(premake)s * step, step) AS lower
+            """,
+            {"upper": last.upper, "lower": last.lower, "premake": max(1, premake)},
+        )
+        ranges = cur.fetchall()
+        for lower, upper in ranges:
+            name = _partition_name(table, lower)
+            cur.execute(_create_partition(table, name, lower, upper))
+            created.append(_relname(name))
+    conn.commit()
+    if progress is not None and created:
+        progress(f"Retention {table}: created partition(s) {', '.join(created)}")
+    return created
+
+
+def _create_partition(table: str, name: str, lower: datetime | None, upper: datetime) -> pg_sql.Composed:
+    return pg_sql.SQL("CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES FROM ({lower}) TO ({upper})").format(
+        name=_identifier(name),
+        table=_identifier(table),
+        lower=pg_sql.SQL("MINVALUE") if lower is None else pg_sql.Literal(lower),
+        upper=pg_sql.Literal(upper),
+    )
+
+
+def partition_table(
+    conn: PgConnection,
+    table: str = "heartbeats",
+    period: str = "month",
+    premake: int = 3,
+    options: RetentionOptions | None = None,
+    progress: ProgressCallback | None = None,
+    cancel_check: CancelCheck | None = None,
+) -> List[str]:
+    options = options or RetentionOptions()
+    if period not in PERIODS:
+        raise ValueError(f"Partition period must be one of {', '.join(PERIODS)}.")
+    if is_partitioned(conn, table):
+        raise ValueError(f"{table} is already partitioned.")
+
+    relname = _relname(table)
+    legacy = _qualified(table, f"{relname}_legacy")
+    staging = _qualified(table, f"{relname}_partitioned")
+    check_name = f"{relname}_legacy_range"
+    unique_name = f"{relname}_legacy_{KEY_COLUMN}_{TIME_COLUMN}_key"
+    step = PERIODS[period]
+    apply_options = ApplyOptions(lock_timeout_ms=options.lock_timeout_ms, max_retries=options.max_retries)
+
+    with conn.cursor() as cur:
+        cur.execute("SET LOCAL TIME ZONE 'UTC'")
+        for candidate in (legacy, staging):
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL", (candidate,))
+            if cur.fetchone()[0]:
+                raise ValueError(f"{candidate} already exists; remove it before converting {table}.")
+        cur.execute(
+            "SELECT conrelid::regclass::text FROM pg_constraint WHERE confrelid = %s::regclass AND contype = 'f'",
+            (table,),
+        )
+        referencing = [row[0] for row in cur.fetchall()]
+        if referencing:
+            raise ValueError(f"{table} is referenced by foreign keys from {', '.join(referencing)}; cannot partition it.")
+        cur.execute("SELECT pg_get_serial_sequence(%s, %s)", (table, KEY_COLUMN))
+        sequence = cur.fetchone()[0]
+        cur.execute(
+            """
+            SELECT ic.relname, pg_get_indexdef(i.indexrelid), i.indisprimary, i.indisunique
+            FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            WHERE i.indrelid = %s::regclass
+            ORDER BY ic.relname
+            """,
+            (table,),
+        )
+        indexes = cur.fetchall()
+        cur.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype = 'f'
+            ORDER BY conname
+            """,
+            (table,),
+        )
+        foreign_keys = cur.fetchall()
+        cur.execute(
+            "SELECT date_trunc(%s, now()) + 2 * %s::interval",
+            (period, step),
+        )
+        cutover = cur.fetchone()[0]
+    conn.rollback()
+
+    primary = [row for row in indexes if row[2]]
+    if len(primary) != 1:
+        raise ValueError(f"{table} needs a primary key on {KEY_COLUMN} to be partitioned.")
+    for name, definition, is_primary, is_unique in indexes:
+        if is_unique and not is_primary and name != unique_name:
+            raise ValueError(f"{table} has unique index {name}; unique indexes must include {TIME_COLUMN} to partition.")
+    secondary = [(name, definition) for name, definition, is_primary, is_unique in indexes if not is_unique]
+
+    def step_progress(message: str) -> None:
+        if progress is not None:
+            progress(f"Partition {table}: {message}")
+
+    started = time.monotonic()
+    step_progress(f"building unique index on ({KEY_COLUMN}, {TIME_COLUMN}) concurrently")
+    conn.autocommit = True
+    try:
+        row = conn.execute(
+            """
+            SELECT i.indisvalid
+            FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            WHERE ic.relname = %s AND i.indrelid = %s::regclass
+            """,
+            (unique_name, table),
+        ).fetchone()
+        if row is not None and not row[0]:
+            conn.execute(pg_sql.SQL("DROP INDEX CONCURRENTLY {name}").format(name=_identifier(_qualified(table, unique_name))))
+            row = None
+        if row is None:
+            conn.execute(
+                pg_sql.SQL("CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} ({key}, {time})").format(
+                    name=pg_sql.Identifier(unique_name),
+                    table=_identifier(table),
+                    key=pg_sql.Identifier(KEY_COLUMN),
+                    time=pg_sql.Identifier(TIME_COLUMN),
+                )
+            )
+    finally:
+        conn.autocommit = False
+    if cancel_check is not None:
+        cancel_check()
+
+    step_progress(f"creating partitioned table {_relname(staging)} with {period} partitions from {cutover:%Y-%m-%d}")
+    temp_names: List[Tuple[str, str]] = []
+    with conn.cursor() as cur:
+        cur.execute("SET LOCAL TIME ZONE 'UTC'")
+        cur.execute(
+            pg_sql.SQL(
+                "CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+                "INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE ({time})"
+            ).format(staging=_identifier(staging), table=_identifier(table), time=pg_sql.Identifier(TIME_COLUMN))
+        )
+        cur.execute(
+            pg_sql.SQL("ALTER TABLE {staging} ADD CONSTRAINT {name} PRIMARY KEY ({key}, {time})").format(
+                staging=_identifier(staging),
+                name=pg_sql.Identifier(f"{relname}_partitioned_pkey"),
+                key=pg_sql.Identifier(KEY_COLUMN),
+                time=pg_sql.Identifier(TIME_COLUMN),
+            )
+        )
+        temp_names.append((f"{relname}_partitioned_pkey", primary[0][0]))
+        for name, definition in secondary:
+            match = _INDEX_DEF.match(definition)
+            if match is None:
+                raise ValueError(f"Cannot copy index definition: {definition}")
+            temp = f"{name[:50]}_partitioned"
+            cur.execute(
+                pg_sql.SQL("{head}{name}{on}{staging}{tail}").format(
+                    head=pg_sql.SQL(match.group(1)),
+                    name=pg_sql.Identifier(temp),
+                    on=pg_sql.SQL(match.group(3)),
+                    staging=_identifier(staging),
+                    tail=pg_sql.SQL(match.group(5).replace("%", "%%")),
+                )
+            )
+            temp_names.append((temp, name))
+        for name, definition in foreign_keys:
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {staging} ADD CONSTRAINT {name} {definition}").format(
+                    staging=_identifier(staging),
+                    name=pg_sql.Identifier(name),
+                    definition=pg_sql.SQL(definition.replace("%", "%%")),
+                )
+            )
+        cur.execute(
+            "SELECT lower, lower + %(step)s::interval FROM generate_series(%(cutover)s::timestamptz, "
+            "%(cutover)s::timestamptz + %(premake)s * %(step)s::interval, %(step)s::interval) AS lower",
+            {"cutover": cutover, "step": step, "premake": max(0, premake - 1)},
+        )
+        created = []
+        for lower, upper in cur.fetchall():
+            name = _partition_name(table, lower)
+            cur.execute(_create_partition(staging, name, lower, upper))
+            created.append(_relname(name))
+    conn.commit()
+
+    step_progress(f"validating {TIME_COLUMN} < {cutover:%Y-%m-%d} on existing rows")
+
+    def add_check() -> None:
+        with conn.cursor() as cur:
+            cur.execute(f"SET LOCAL lock_timeout = {int(options.lock_timeout_ms)}")
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({time} < {cutover}) NOT VALID").format(
+                    table=_identifier(table),
+                    name=pg_sql.Identifier(check_name),
+                    time=pg_sql.Identifier(TIME_COLUMN),
+                    cutover=pg_sql.Literal(cutover),
+                )
+            )
+        conn.commit()
+
+    with_lock_retry(add_check, conn, f"Partition {table}", apply_options, progress, cancel_check)
+    with conn.cursor() as cur:
+        cur.execute(
+            pg_sql.SQL("ALTER TABLE {table} VALIDATE CONSTRAINT {name}").format(
+                table=_identifier(table), name=pg_sql.Identifier(check_name)
+            )
+        )
+    conn.commit()
+    if cancel_check is not None:
+        cancel_check()
+
+    step_progress(f"swapping {relname} for the partitioned table and attaching the old rows as {_relname(legacy)}")
+
+    def swap() -> None:
+        with conn.cursor() as cur:
+            cur.execute(f"SET LOCAL lock_timeout = {int(options.lock_timeout_ms)}")
+            cur.execute(pg_sql.SQL("LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE").format(table=_identifier(table)))
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {table} RENAME TO {legacy}").format(
+                    table=_identifier(table), legacy=pg_sql.Identifier(_relname(legacy))
+                )
+            )
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {legacy} DROP CONSTRAINT {name}").format(
+                    legacy=_identifier(legacy), name=pg_sql.Identifier(primary[0][0])
+                )
+            )
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {legacy} ADD CONSTRAINT {name} PRIMARY KEY USING INDEX {index}").format(
+                    legacy=_identifier(legacy),
+                    name=pg_sql.Identifier(f"{_relname(legacy)}_pkey"),
+                    index=pg_sql.Identifier(unique_name),
+                )
+            )
+            for temp, original in temp_names:
+                if original != primary[0][0]:
+                    cur.execute(
+                        pg_sql.SQL("ALTER INDEX {original} RENAME TO {renamed}").format(
+                            original=_identifier(_qualified(table, original)),
+                            renamed=pg_sql.Identifier(f"{original[:56]}_legacy"),
+                        )
+                    )
+                cur.execute(
+                    pg_sql.SQL("ALTER INDEX {temp} RENAME TO {original}").format(
+                        temp=_identifier(_qualified(table, temp)), original=pg_sql.Identifier(original)
+                    )
+                )
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {staging} RENAME TO {table}").format(
+                    staging=_identifier(staging), table=pg_sql.Identifier(relname)
+                )
+            )
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO ({cutover})").format(
+                    table=_identifier(table), legacy=_identifier(legacy), cutover=pg_sql.Literal(cutover)
+                )
+            )
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {legacy} DROP CONSTRAINT {name}").format(
+                    legacy=_identifier(legacy), name=pg_sql.Identifier(check_name)
+                )
+            )
+            if sequence:
+                cur.execute(
+                    pg_sql.SQL("ALTER SEQUENCE {sequence} OWNED BY {table}.{key}").format(
+                        sequence=pg_sql.SQL(sequence),
+                        table=_identifier(table),
+                        key=pg_sql.Identifier(KEY_COLUMN),
+                    )
+                )
+        conn.commit()
+
+    with_lock_retry(swap, conn, f"Partition {table}", apply_options, progress, cancel_check)
+    step_progress(
+        f"done in {time.monotonic() - started:.1f}s; {_relname(legacy)} holds rows before {cutover:%Y-%m-%d}, "
+        f"new partitions: {', '.join(created)}"
+    )
+    return [_relname(legacy)] + created
@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from psycopg import sql as pg_sql
+from psycopg.conninfo import make_conninfo
+
+from catalog import CatalogSnapshot, TableInfo, load_snapshot
+from db import ColumnInfo, connect
+from migrations import ApplyOptions, MigrationFile, apply_pending, read_sql
+
+SCRATCH_PREFIX = "schema_admin_scratch"
+DEFAULT_IGNORE = ("schema_admin_*", "*_archive", "*_archive_*", "*_legacy")
+SERIAL_TYPES = {"smallint": "smallserial", "integer": "serial", "bigint": "bigserial"}
+
+DIFF_MISSING = "missing"
+DIFF_EXTRA = "extra"
+DIFF_CHANGED = "changed"
+
+OBJECT_TABLE = "table"
+OBJECT_COLUMN = "column"
+OBJECT_INDEX = "index"
+OBJECT_CONSTRAINT = "constraint"
+
+
+@dataclass
+class Difference:
+    status: str
+    object_type: str
+    table: str
+    name: str
+    expected: str = ""
+    actual: str = ""
+
+    def describe(self) -> str:
+        target = self.table if self.object_type == OBJECT_TABLE else f"{self.table}.{self.name}"
+        if self.status == DIFF_MISSING:
+            return f"{self.object_type} {target} is missing"
+        if self.status == DIFF_EXTRA:
+            return f"{self.object_type} {target} is not in the migrations"
+        return f"{self.object_type} {target}: expected {self.expected}, found {self.actual}"
+
+
+@dataclass
+class SchemaDiff:
+    differences: List[Difference]
+    statements: List[str]
+    destructive: List[str]
+    expected_tables: int
+    actual_tables: int
+    elapsed_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.differences
+
+    def count(self, status: str) -> int:
+        return sum(1 for item in self.differences if item.status == status)
+
+    def describe(self) -> str:
+        if self.ok:
+            return f"Schema matches the migrations ({self.actual_tables} table(s) compared in {self.elapsed_seconds:.1f}s)."
+        return (
+            f"Schema differs from the migrations: {self.count(DIFF_MISSING)} missing, {self.count(DIFF_EXTRA)} extra, "
+            f"{self.count(DIFF_CHANGED)} changed ({self.elapsed_seconds:.1f}s)."
+        )
+
+    def script(self) -> str:
+        if self.ok:
+            return "-- No differences.\n"
+        lines = ["-- Reconciles the database with the schema produced by the migrations.", "-- Review before running."]
+        lines += [""] + self.statements if self.statements else []
+        if self.destructive:
+            lines += ["", "-- Objects that are not in the migrations. Uncomment to drop them:"]
+            lines += [f"-- {line}" for statement in self.destructive for line in statement.splitlines()]
+        return "\n".join(lines) + "\n"
+
+
+class ExpectedSchemaCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshots: Dict[Tuple[str, str], CatalogSnapshot] = {}
+
+    def get(self, db_url: str, digest: str) -> CatalogSnapshot | None:
+        with self._lock:
+            return self._snapshots.get((db_url, digest))
+
+    def put(self, db_url: str, digest: str, snapshot: CatalogSnapshot) -> None:
+        with self._lock:
+            self._snapshots = {key: value for key, value in self._snapshots.items() if key[0] != db_url}
+            self._snapshots[(db_url, digest)] = snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+
+
+cache = ExpectedSchemaCache()
+
+
+def chain_digest(migrations: Sequence[MigrationFile]) -> str:
+    digest = hashlib.sha256()
+    for migration in migrations:
+        digest.update(migration.name.encode("utf-8"))
+        digest.update(read_sql(migration.path).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_expected_snapshot(
+    db_url: str,
+    migrations: Sequence[MigrationFile],
+    progress: Callable[[str], None] | None = None,
+    cancel_check: Callable[[], None] | None = None,
+    refresh: bool = False,
+) -> CatalogSnapshot:
+    digest = chain_digest(migrations)
+    if not refresh:
+        cached = cache.get(db_url, digest)
+        if cached is not None:
+            if progress is not None:
+                progress("Using the cached migration schema (migration files unchanged).")
+            return cached
+
+    scratch = f"{SCRATCH_PREFIX}_{os.getpid()}_{int(time.time())}"
+    with connect(db_url) as admin:
+        admin.autocommit = True
+        if progress is not None:
+            progress(f"Creating scratch database {scratch}")
+        admin.execute(pg_sql.SQL("CREATE DATABASE {} TEMPLATE template0").format(pg_sql.Identifier(scratch)))
+        try:
+            with connect(make_conninfo(db_url, dbname=scratch)) as conn:
+                apply_pending(
+                    conn,
+                    migrations,
+                    dry_run=False,
+                    progress=progress,
+                    options=ApplyOptions(online=True),
+                    cancel_check=cancel_check,
+                )
+                snapshot = load_snapshot(conn)
+        finally:
+            if progress is not None:
+                progress(f"Dropping scratch database {scratch}")
+            admin.execute(pg_sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(pg_sql.Identifier(scratch)))
+    cache.put(db_url, digest, snapshot)
+    return snapshot
+
+
+def diff_schema(
+    expected: CatalogSnapshot,
+    actual: CatalogSnapshot,
+    ignore: Sequence[str] = DEFAULT_IGNORE,
+) -> SchemaDiff:
+    started = time.monotonic()
+    expected_tables = _tables(expected, ignore)
+    actual_tables = _tables(actual, ignore)
+    differences: List[Difference] = []
+    creates: List[str] = []
+    alters: List[str] = []
+    drops: List[str] = []
+    constraint_drops: List[str] = []
+    constraint_adds: List[str] = []
+    foreign_keys: List[str] = []
+    index_drops: List[str] = []
+    index_adds: List[str] = []
+    destructive: List[str] = []
+
+    for label, table in expected_tables.items():
+        live = actual_tables.get(label)
+        if live is None:
+            differences.append(Difference(DIFF_MISSING, OBJECT_TABLE, label, table.ref.name))
+            creates.append(_create_table(table))
+            for constraint in table.constraints:
+                target = foreign_keys if constraint.kind == "f" else constraint_adds
+                target.append(_add_constraint(table, constraint.name, constraint.definition))
+            index_adds += [_index_sql(index.definition) for index in _plain_indexes(table)]
+            continue
+        if table.kind != live.kind:
+            differences.append(
+                Difference(DIFF_CHANGED, OBJECT_TABLE, label, table.ref.name, _kind(table.kind), _kind(live.kind))
+            )
+        _diff_columns(table, live, differences, alters, destructive)
+        _diff_constraints(table, live, differences, constraint_drops, constraint_adds, foreign_keys, destructive)
+        _diff_indexes(table, live, differences, index_drops, index_adds, destructive)
+
+    for label, live in actual_tables.items():
+        if label not in expected_tables:
+            differences.append(Difference(DIFF_EXTRA, OBJECT_TABLE, label, live.ref.name))
+            drops.append(f"DROP TABLE IF EXISTS {_table_name(live)};")
+
+    statements = constraint_drops + index_drops + creates + alters + constraint_adds + foreign_keys + index_adds
+    return SchemaDiff(
+        differences=differences,
+        statements=statements,
+        destructive=destructive + drops,
+        expected_tables=len(expected_tables),
+        actual_tables=len(actual_tables),
+        elapsed_seconds=time.monotonic() - started,
+    )
+
+
+def _tables(snapshot: CatalogSnapshot, ignore: Sequence[str]) -> Dict[str, TableInfo]:
+    return {
+        table.label: table
+        for table in snapshot.tables
+        if not table.is_partition and not any(fnmatch.fnmatchcase(table.ref.name, pattern) for pattern in ignore)
+    }
+
+
+def _kind(kind: str) -> str:
+    return "partitioned table" if kind == "p" else "table"
+
+
+def _table_name(table: TableInfo) -> str:
+    return pg_sql.Identifier(table.ref.schema, table.ref.name).as_string(None)
+
+
+def _ident(name: str) -> str:
+    return pg_sql.Identifier(name).as_string(None)
+
+
+def _column_sql(column: ColumnInfo, create: bool = False) -> str:
+    if create and column.data_type in SERIAL_TYPES and (column.default_value or "").startswith("nextval("):
+        return f"{_ident(column.name)} {SERIAL_TYPES[column.data_type]}"
+    text = f"{_ident(column.name)} {column.data_type}"
+    if column.default_value is not None:
+        text += f" DEFAULT {column.default_value}"
+    if not column.is_nullable:
+        text += " NOT NULL"
+    return text
+
+
+def _create_table(table: TableInfo) -> str:
+    columns = ",\n".join(f"    {_column_sql(column, create=True)}" for column in table.columns)
+    return f"CREATE TABLE IF NOT EXISTS {_table_name(table)} (\n{columns}\n);"
+
+
+def _add_constraint(table: TableInfo, name: str, definition: str) -> str:
+    return f"ALTER TABLE {_table_name(table)} ADD CONSTRAINT {_ident(name)} {definition};"
+
+
+def _index_sql(definition: str) -> str:
+    return f"{definition};"
+
+
+def _plain_indexes(table: TableInfo):
+    constraint_names = {constraint.name for constraint in table.constraints}
+    return [index for index in table.indexes if index.name not in constraint_names]
+
+
+def _diff_columns(
+    expected: TableInfo,
+    actual: TableInfo,
+    differences: List[Difference],
+    alters: List[str],
+    destructive: List[str],
+) -> None:
+    live_columns = {column.name: column for column in actual.columns}
+    table = _table_name(expected)
+    for column in expected.columns:
+        live = live_columns.get(column.name)
+        if live is None:
+            differences.append(Difference(DIFF_MISSING, OBJECT_COLUMN, expected.label, column.name))
+            alters.append(f"ALTER TABLE {table} ADD COLUMN {_column_sql(column)};")
+            continue
+        name = _ident(column.name)
+        if live.data_type != column.data_type:
+            differences.append(
+                Difference(DIFF_CHANGED, OBJECT_COLUMN, expected.label, column.name, column.data_type, live.data_type)
+            )
+            alters.append(
+                f"ALTER TABLE {table} ALTER COLUMN {name} TYPE {column.data_type} USING {name}::{column.data_type};"
+            )
+        if live.default_value != column.default_value:
+            differences.append(
+                Difference(
+                    DIFF_CHANGED,
+                    OBJECT_COLUMN,
+                    expected.label,
+                    column.name,
+                    f"default {column.default_value or 'none'}",
+                    f"default {live.default_value or 'none'}",
+                )
+            )
+            alters.append(
+                f"ALTER TABLE {table} ALTER COLUMN {name} SET DEFAULT {column.default_value};"
+                if column.default_value is not None
+                else f"ALTER TABLE {table} ALTER COLUMN {name} DROP DEFAULT;"
+            )
+        if live.is_nullable != column.is_nullable:
+            differences.append(
+                Difference(
+                    DIFF_CHANGED,
+                    OBJECT_COLUMN,
+                    expected.label,
+                    column.name,
+                    "NULL" if column.is_nullable else "NOT NULL",
+                    "NULL" if live.is_nullable else "NOT NULL",
+                )
+            )
+            alters.append(
+                f"ALTER TABLE {table} ALTER COLUMN {name} {'DROP' if column.is_nullable else 'SET'} NOT NULL;"
+            )
+
+    expected_names = {column.name for column in expected.columns}
+    for column in actual.columns:
+        if column.name not in expected_names:
+            differences.append(Difference(DIFF_EXTRA, OBJECT_COLUMN, expected.label, column.name))
+            destructive.append(f"ALTER TABLE {table} DROP COLUMN IF EXISTS {_ident(column.name)};")
+
+
+def _diff_constraints(
+    expected: TableInfo,
+    actual: TableInfo,
+    differences: List[Difference],
+    drops: List[str],
+    adds: List[str],
+    foreign_keys: List[str],
+    destructive: List[str],
+) -> None:
+    live = {constraint.name: constraint for constraint in actual.constraints}
+    table = _table_name(expected)
+    for constraint in expected.constraints:
+        current = live.get(constraint.name)
+        target = foreign_keys if constraint.kind == "f" else adds
+        if current is None:
+            differences.append(Difference(DIFF_MISSING, OBJECT_CONSTRAINT, expected.label, constraint.name))
+            target.append(_add_constraint(expected, constraint.name, constraint.definition))
+        elif current.definition != constraint.definition:
+            differences.append(
+                Difference(
+                    DIFF_CHANGED,
+                    OBJECT_CONSTRAINT,
+                    expected.label,
+                    constraint.name,
+                    constraint.definition,
+                    current.definition,
+                )
+            )
+            drops.append(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {_ident(constraint.name)};")
+            target.append(_add_constraint(expected, constraint.name, constraint.definition))
+
+    expected_names = {constraint.name for constraint in expected.constraints}
+    for constraint in actual.constraints:
+        if constraint.name not in expected_names:
+            differences.append(Difference(DIFF_EXTRA, OBJECT_CONSTRAINT, expected.label, constraint.name))
+            destructive.append(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {_ident(constraint.name)};")
+
+
+def _diff_indexes(
+    expected: TableInfo,
+    actual: TableInfo,
+    differences: List[Difference],
+    drops: List[str],
+    adds: List[str],
+    destructive: List[str],
+) -> None:
+    live = {index.name: index for index in _plain_indexes(actual)}
+    schema = expected.ref.schema
+    for index in _plain_indexes(expected):
+        current = live.get(index.name)
+        if current is None:
+            differences.append(Difference(DIFF_MISSING, OBJECT_INDEX, expected.label, index.name))
+            adds.append(_index_sql(index.definition))
+        elif current.definition != index.definition or not current.is_valid:
+            differences.append(
+                Difference(
+                    DIFF_CHANGED,
+                    OBJECT_INDEX,
+                    expected.label,
+                    index.name,
+                    index.definition,
+                    current.definition if current.is_valid else f"{current.definition} (INVALID)",
+                )
+            )
+            drops.append(f"DROP INDEX IF EXISTS {pg_sql.Identifier(schema, index.name).as_string(None)};")
+            adds.append(_index_sql(index.definition))
+
+    expected_names = {index.name for index in _plain_indexes(expected)}
+    for name in live:
+        if name not in expected_names:
+            differences.append(Difference(DIFF_EXTRA, OBJECT_INDEX, expected.label, name))
+            destructive.append(f"DROP INDEX IF EXISTS {pg_sql.Identifier(schema, name).as_string(None)};")
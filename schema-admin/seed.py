@@ -0,0 +1,536 @@
+from __future__ import annotations
+
+import math
+import os
+import random
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from psycopg import Connection as PgConnection
+from psycopg import sql as pg_sql
+
+from db import connect
+
+SEED_TABLES = ("exam_sessions", "session_tokens", "device_bindings", "heartbeats", "violations")
+
+SESSION_COLUMNS = ("id", "exam_name", "created_by", "start_time", "end_time", "status", "created_at")
+TOKEN_COLUMNS = ("token", "exam_session_id", "claimed", "claimed_at", "expires_at", "role")
+BINDING_COLUMNS = (
+    "id",
+    "token",
+    "role",
+    "device_fingerprint",
+    "ip_address",
+    "signature_version",
+    "risk_score",
+    "locked",
+    "lock_reason",
+    "created_at",
+    "last_seen_at",
+)
+HEARTBEAT_COLUMNS = ("binding_id", "focus", "multi_window", "risk_score", "network_state", "payload", "created_at")
+VIOLATION_COLUMNS = ("binding_id", "type", "severity", "metadata", "created_at")
+
+COLUMNS_SQL = """
+SELECT table_name, column_name
+FROM information_schema.columns
+WHERE table_schema = current_schema() AND table_name = ANY(%s)
+"""
+
+SHARED_TOKEN_SQL = """
+SELECT EXISTS (
+    SELECT 1
+    FROM pg_indexes
+    WHERE schemaname = current_schema()
+      AND tablename = 'session_tokens'
+      AND indexdef LIKE 'CREATE UNIQUE INDEX %(exam_session_id, role)'
+)
+"""
+
+DEFERRABLE_INDEXES_SQL = """
+SELECT i.relname, pg_get_indexdef(x.indexrelid)
+FROM pg_index x
+JOIN pg_class i ON i.oid = x.indexrelid
+JOIN pg_class t ON t.oid = x.indrelid
+WHERE t.relnamespace = current_schema()::regnamespace
+  AND t.relname = ANY(%s)
+  AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+ORDER BY t.relname, i.relname
+"""
+
+DEFERRED_TABLES = ("heartbeats", "violations")
+INDEX_BUILD_MEMORY = "512MB"
+HEARTBEAT_SECONDS = 15
+DEFAULT_DAYS = 30
+RECENT_BIAS = 4.0
+CHUNK_HEARTBEATS = 1_000_000
+COPY_BUFFER_ROWS = 20_000
+RISK_LOCK_THRESHOLD = 12
+RISK_CAP = 100
+RISKY_STUDENT_RATIO = 0.1
+DROPOUT_RATIO = 0.08
+VIOLATIONS_PER_HEARTBEAT = 0.02
+TOKEN_SPACE = 1 << 40
+TOKEN_MULTIPLIER = 0x9E3779B97F
+
+NETWORK_STATES = ("wifi",) * 12 + ("cellular",) * 3 + ("offline",)
+VIOLATION_TYPES = (
+    ("FOCUS_LOST", 3, 30),
+    ("APP_BACKGROUND", 3, 20),
+    ("NETWORK_DROP", 0, 15),
+    ("MULTI_WINDOW", 4, 8),
+    ("OVERLAY_DETECTED", 1, 8),
+    ("RESTART_RECOVERY", 0, 6),
+    ("ACCESSIBILITY_ACTIVE", 1, 5),
+    ("POWER_WARNING", 0, 4),
+    ("MEDIA_PROJECTION_ATTEMPT", 2, 2),
+    ("REPEATED_VIOLATION", 3, 2),
+)
+VIOLATION_TABLE = tuple(
+    (kind, severity)
+    for kind, severity, weight in VIOLATION_TYPES
+    for _ in range(round(weight * 1024 / sum(item[2] for item in VIOLATION_TYPES)))
+)
+EXAM_NAMES = ("Mathematics", "Physics", "Chemistry", "Biology", "English", "History", "Geography", "Economics")
+
+
+@dataclass(frozen=True)
+class SeedScale:
+    sessions: int = 100
+    students: int = 40
+    heartbeats: int = 200
+    days: int = DEFAULT_DAYS
+
+    @property
+    def expected_heartbeats(self) -> int:
+        return self.sessions * self.students * self.heartbeats
+
+    def validate(self) -> None:
+        if min(self.sessions, self.students, self.heartbeats, self.days) < 1:
+            raise ValueError("Sessions, students, heartbeats and days must be at least 1.")
+
+
+@dataclass(frozen=True)
+class SeedPlan:
+    scale: SeedScale
+    seed: int
+    until: datetime
+    columns: Dict[str, Tuple[str, ...]]
+    shared_student_token: bool = False
+    skip_fk_checks: bool = False
+
+
+@dataclass
+class SeedResult:
+    sessions: int = 0
+    tokens: int = 0
+    bindings: int = 0
+    heartbeats: int = 0
+    violations: int = 0
+    seconds: float = 0.0
+    workers: int = 1
+    seed: int = 0
+
+    @property
+    def rows(self) -> int:
+        return self.sessions + self.tokens + self.bindings + self.heartbeats + self.violations
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def add(self, other: SeedResult) -> None:
+        self.sessions += other.sessions
+        self.tokens += other.tokens
+        self.bindings += other.bindings
+        self.heartbeats += other.heartbeats
+        self.violations += other.violations
+
+
+def default_until() -> datetime:
+    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def parse_until(value: str | None) -> datetime:
+    if not value:
+        return default_until()
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid --until date: {value!r} (use YYYY-MM-DD).") from None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def table_columns(conn: PgConnection) -> Dict[str, Tuple[str, ...]]:
+    with conn.cursor() as cur:
+        cur.execute(COLUMNS_SQL, (list(SEED_TABLES),))
+        found: Dict[str, set] = {}
+        for table, column in cur.fetchall():
+            found.setdefault(table, set()).add(column)
+    conn.rollback()
+    missing = [table for table in SEED_TABLES if table not in found]
+    if missing:
+        raise ValueError(f"Tables not found: {', '.join(missing)}. Apply the migrations before seeding.")
+    for table, wanted in (("heartbeats", HEARTBEAT_COLUMNS), ("violations", VIOLATION_COLUMNS)):
+        absent = [column for column in wanted if column not in found[table]]
+        if absent:
+            raise ValueError(f"{table} has no column(s) {', '.join(absent)}; cannot seed this schema.")
+    known = {
+        "exam_sessions": SESSION_COLUMNS,
+        "session_tokens": TOKEN_COLUMNS,
+        "device_bindings": BINDING_COLUMNS,
+        "heartbeats": HEARTBEAT_COLUMNS,
+        "violations": VIOLATION_COLUMNS,
+    }
+    return {table: tuple(column for column in known[table] if column in found[table]) for table in SEED_TABLES}
+
+
+def shared_student_token(conn: PgConnection) -> bool:
+    with conn.cursor() as cur:
+        cur.execute(SHARED_TOKEN_SQL)
+        row = cur.fetchone()
+    conn.rollback()
+    return bool(row and row[0])
+
+
+def truncate_tables(conn: PgConnection) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            pg_sql.SQL("TRUNCATE {tables} CASCADE").format(
+                tables=pg_sql.SQL(", ").join(pg_sql.Identifier(table) for table in SEED_TABLES)
+            )
+        )
+    conn.commit()
+
+
+def drop_indexes(conn: PgConnection, tables: Sequence[str] = DEFERRED_TABLES) -> List[Tuple[str, str]]:
+    with conn.cursor() as cur:
+        cur.execute(DEFERRABLE_INDEXES_SQL, (list(tables),))
+        indexes = [(name, definition.replace(" ON ONLY ", " ON ", 1)) for name, definition in cur.fetchall()]
+        for name, _ in indexes:
+            cur.execute(pg_sql.SQL("DROP INDEX {name}").format(name=pg_sql.Identifier(name)))
+    conn.commit()
+    return indexes
+
+
+def restore_indexes(
+    conn: PgConnection,
+    indexes: Sequence[Tuple[str, str]],
+    progress: Callable[[str], None] | None = None,
+) -> None:
+    with conn.cursor() as cur:
+        cur.execute(pg_sql.SQL("SET maintenance_work_mem = {memory}").format(memory=pg_sql.Literal(INDEX_BUILD_MEMORY)))
+        for name, definition in indexes:
+            if progress is not None:
+                progress(f"Rebuilding index {name}")
+            cur.execute(definition)
+            conn.commit()
+
+
+def _token(number: int, seed: int, prefix: str) -> str:
+    scrambled = (number * TOKEN_MULTIPLIER + seed * 0x5851F42D) % TOKEN_SPACE
+    return f"{prefix}{scrambled:010X}"
+
+
+def _session_start(rng: random.Random, scale: SeedScale, until: datetime) -> datetime:
+    spread = scale.days / RECENT_BIAS
+    age = -spread * math.log(1 - rng.random() * (1 - math.exp(-scale.days / spread)))
+    day = until - timedelta(days=min(int(age) + 1, scale.days))
+    return day + timedelta(minutes=rng.randrange(7 * 60, 16 * 60))
+
+
+class _TimeFormatter:
+    def __init__(self) -> None:
+        self.minutes: Dict[int, str] = {}
+        self.seconds = tuple(f"{ms // 1000:02d}.{ms % 1000:03d}+00" for ms in range(60_000))
+
+    def minute(self, minute: int) -> str:
+        prefix = datetime.fromtimestamp(minute * 60, timezone.utc).strftime("%Y-%m-%d %H:%M:")
+        self.minutes[minute] = prefix
+        return prefix
+
+    def __call__(self, epoch_ms: int) -> str:
+        minute, rest = divmod(epoch_ms, 60_000)
+        return (self.minutes.get(minute) or self.minute(minute)) + self.seconds[rest]
+
+
+def _select(row: Dict[str, object], columns: Sequence[str]) -> Tuple:
+    return tuple(row[column] for column in columns)
+
+
+def _copy(cur, table: str, columns: Sequence[str]):
+    return cur.copy(
+        pg_sql.SQL("COPY {table} ({columns}) FROM STDIN").format(
+            table=pg_sql.Identifier(table),
+            columns=pg_sql.SQL(", ").join(pg_sql.Identifier(column) for column in columns),
+        )
+    )
+
+
+def _copy_rows(cur, table: str, columns: Sequence[str], rows: Sequence[Tuple]) -> None:
+    with _copy(cur, table, columns) as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+class _SessionData:
+    def __init__(self) -> None:
+        self.sessions: List[Tuple] = []
+        self.tokens: List[Tuple] = []
+        self.bindings: List[Tuple] = []
+        self.students: List[Tuple[str, int, int, bool, str]] = []
+
+
+def _event_limits(risky: bool) -> Tuple[int, int]:
+    return (50, 10) if risky else (5, 0)
+
+
+def _final_risk(key: str, count: int, risky: bool) -> int:
+    unfocused, multi_window = _event_limits(risky)
+    bits = random.Random(key).getrandbits
+    risk = 0
+    for _ in range(count):
+        roll = bits(64)
+        risk += ((roll & 1023) < unfocused) + 5 * ((roll >> 10 & 1023) < multi_window)
+    return min(risk, RISK_CAP)
+
+
+def _build_session(plan: SeedPlan, index: int, data: _SessionData) -> None:
+    scale = plan.scale
+    rng = random.Random(f"{plan.seed}:{index}")
+    session_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+    start = _session_start(rng, scale, plan.until)
+    end = start + timedelta(seconds=scale.heartbeats * HEARTBEAT_SECONDS, minutes=10)
+    data.sessions.append(
+        _select(
+            {
+                "id": session_id,
+                "exam_name": f"{rng.choice(EXAM_NAMES)} {index + 1}",
+                "created_by": f"proctor-{rng.randrange(1, scale.sessions // 20 + 2)}",
+                "start_time": start,
+                "end_time": end,
+                "status": "REVOKED" if rng.random() < 0.03 else "FINISHED",
+                "created_at": start - timedelta(minutes=rng.randrange(5, 60)),
+            },
+            plan.columns["exam_sessions"],
+        )
+    )
+
+    first_token = index * (scale.students + 1)
+    admin_token = _token(first_token + scale.students, plan.seed, "A-")
+    if plan.shared_student_token:
+        student_tokens = [_token(first_token, plan.seed, "S-")] * scale.students
+    else:
+        student_tokens = [_token(first_token + k, plan.seed, "S-") for k in range(scale.students)]
+    for token, role in [(admin_token, "admin")] + [(token, "student") for token in dict.fromkeys(student_tokens)]:
+        data.tokens.append(
+            _select(
+                {
+                    "token": token,
+                    "exam_session_id": session_id,
+                    "claimed": True,
+                    "claimed_at": start,
+                    "expires_at": end + timedelta(minutes=30),
+                    "role": role,
+                },
+                plan.columns["session_tokens"],
+            )
+        )
+
+    for position, token in enumerate(student_tokens + [admin_token]):
+        role = "admin" if position == scale.students else "student"
+        binding_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        joined = start + timedelta(seconds=rng.randrange(0, 600) if role == "student" else 0)
+        count = 0
+        risky = False
+        if role == "student":
+            factor = rng.uniform(0.05, 0.9) if rng.random() < DROPOUT_RATIO else rng.uniform(0.9, 1.1)
+            count = max(1, round(scale.heartbeats * factor))
+            risky = rng.random() < RISKY_STUDENT_RATIO
+        key = f"{plan.seed}:{index}:{position}"
+        risk = _final_risk(key, count, risky)
+        locked = risk >= RISK_LOCK_THRESHOLD
+        data.bindings.append(
+            _select(
+                {
+                    "id": binding_id,
+                    "token": token,
+                    "role": role,
+                    "device_fingerprint": f"{rng.getrandbits(256):064x}",
+                    "ip_address": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+                    "signature_version": 1,
+                    "risk_score": risk,
+                    "locked": locked,
+                    "lock_reason": "RISK_THRESHOLD" if locked else None,
+                    "created_at": joined,
+                    "last_seen_at": joined + timedelta(seconds=count * HEARTBEAT_SECONDS),
+                },
+                plan.columns["device_bindings"],
+            )
+        )
+        if count:
+            data.students.append((str(binding_id), int(joined.timestamp() * 1000), count, risky, key))
+
+
+def _heartbeat_parts() -> Tuple[Dict[Tuple[bool, bool], str], Dict[Tuple[bool, bool, str], str]]:
+    flags: Dict[Tuple[bool, bool], str] = {}
+    payloads: Dict[Tuple[bool, bool, str], str] = {}
+    for focus in (False, True):
+        for multi in (False, True):
+            flags[focus, multi] = f"\t{'t' if focus else 'f'}\t{'t' if multi else 'f'}\t"
+            for network in set(NETWORK_STATES):
+                payloads[focus, multi, network] = (
+                    f'\t{network}\t{{"focus": {"true" if focus else "false"}, '
+                    f'"multi_window": {"true" if multi else "false"}, "network_state": "{network}", "timestamp": '
+                )
+    return flags, payloads
+
+
+def _write_heartbeats(cur, students, fmt: _TimeFormatter) -> Tuple[int, int]:
+    heartbeats = 0
+    violations: List[str] = []
+    flags, payloads = _heartbeat_parts()
+    violation_limit = int(VIOLATIONS_PER_HEARTBEAT * (1 << 19))
+    interval_ms = HEARTBEAT_SECONDS * 1000
+    minutes, seconds = fmt.minutes, fmt.seconds
+    with _copy(cur, "heartbeats", HEARTBEAT_COLUMNS) as copy:
+        buffer: List[str] = []
+        append = buffer.append
+        for binding_id, at_base, count, risky, key in students:
+            unfocused, multi_window = _event_limits(risky)
+            bits = random.Random(key).getrandbits
+            risk = 0
+            for seq in range(1, count + 1):
+                roll = bits(64)
+                focus = (roll & 1023) >= unfocused
+                multi = (roll >> 10 & 1023) < multi_window
+                if multi or not focus:
+                    risk = min(RISK_CAP, risk + (not focus) + 5 * multi)
+                network = NETWORK_STATES[roll >> 20 & 15]
+                at = at_base + (roll >> 24 & 2047)
+                at_base += interval_ms
+                minute, rest = divmod(at, 60_000)
+                append(
+                    f"{binding_id}{flags[focus, multi]}{risk}{payloads[focus, multi, network]}{at}, "
+                    f'"heartbeat_seq": {seq}}}\t{minutes.get(minute) or fmt.minute(minute)}{seconds[rest]}\n'
+                )
+                if len(buffer) >= COPY_BUFFER_ROWS:
+                    copy.write("".join(buffer))
+                    heartbeats += len(buffer)
+                    buffer.clear()
+                if multi:
+                    kind = ("MULTI_WINDOW", 4)
+                elif not focus:
+                    kind = ("FOCUS_LOST", 3)
+                elif roll >> 45 < violation_limit:
+                    kind = VIOLATION_TABLE[(roll >> 35 & 1023) % len(VIOLATION_TABLE)]
+                else:
+                    continue
+                violations.append(
+                    f'{binding_id}\t{kind[0]}\t{kind[1]}\t{{"detail": "", "heartbeat_seq": {seq}}}\t'
+                    f"{fmt(at + 500 + (roll >> 35 & 4095))}\n"
+                )
+        if buffer:
+            copy.write("".join(buffer))
+            heartbeats += len(buffer)
+    with _copy(cur, "violations", VIOLATION_COLUMNS) as copy:
+        for start in range(0, len(violations), COPY_BUFFER_ROWS):
+            copy.write("".join(violations[start : start + COPY_BUFFER_ROWS]))
+    return heartbeats, len(violations)
+
+
+def seed_chunk(db_url: str, plan: SeedPlan, first: int, last: int) -> SeedResult:
+    data = _SessionData()
+    for index in range(first, last):
+        _build_session(plan, index, data)
+    result = SeedResult(sessions=len(data.sessions), tokens=len(data.tokens), bindings=len(data.bindings), seed=plan.seed)
+    with connect(db_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SET synchronous_commit = off")
+            if plan.skip_fk_checks:
+                cur.execute("SET session_replication_role = replica")
+            _copy_rows(cur, "exam_sessions", plan.columns["exam_sessions"], data.sessions)
+            _copy_rows(cur, "session_tokens", plan.columns["session_tokens"], data.tokens)
+            _copy_rows(cur, "device_bindings", plan.columns["device_bindings"], data.bindings)
+            result.heartbeats, result.violations = _write_heartbeats(cur, data.students, _TimeFormatter())
+        conn.commit()
+    return result
+
+
+def plan_chunks(scale: SeedScale) -> List[Tuple[int, int]]:
+    per_chunk = max(1, CHUNK_HEARTBEATS // max(1, scale.students * scale.heartbeats))
+    return [(start, min(start + per_chunk, scale.sessions)) for start in range(0, scale.sessions, per_chunk)]
+
+
+def seed_database(
+    db_url: str,
+    scale: SeedScale,
+    seed: int = 1,
+    until: datetime | None = None,
+    workers: int = 0,
+    truncate: bool = False,
+    skip_fk_checks: bool = False,
+    defer_indexes: bool = False,
+    progress: Callable[[str], None] | None = None,
+) -> SeedResult:
+    scale.validate()
+    with connect(db_url) as conn:
+        columns = table_columns(conn)
+        shared = shared_student_token(conn)
+        if truncate:
+            truncate_tables(conn)
+        deferred = drop_indexes(conn) if defer_indexes else []
+    plan = SeedPlan(
+        scale=scale,
+        seed=seed,
+        until=until or default_until(),
+        columns=columns,
+        shared_student_token=shared,
+        skip_fk_checks=skip_fk_checks,
+    )
+    chunks = plan_chunks(scale)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+    result = SeedResult(workers=workers, seed=seed)
+    started = time.monotonic()
+
+    def report(done: SeedResult) -> None:
+        result.add(done)
+        if progress is not None:
+            elapsed = time.monotonic() - started
+            progress(
+                f"Seeded {result.sessions:,}/{scale.sessions:,} sessions, {result.heartbeats:,} heartbeats "
+                f"({result.rows / elapsed if elapsed > 0 else 0:,.0f} rows/s)"
+            )
+
+    try:
+        if workers == 1:
+            for first, last in chunks:
+                report(seed_chunk(db_url, plan, first, last))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = {executor.submit(seed_chunk, db_url, plan, first, last) for first, last in chunks}
+                try:
+                    while pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            report(future.result())
+                except BaseException:
+                    for future in pending:
+                        future.cancel()
+                    raise
+    finally:
+        if deferred:
+            with connect(db_url) as conn:
+                restore_indexes(conn, deferred, progress)
+
+    with connect(db_url) as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for table in SEED_TABLES:
+                cur.execute(pg_sql.SQL("ANALYZE {table}").format(table=pg_sql.Identifier(table)))
+    result.seconds = time.monotonic() - started
+    return result
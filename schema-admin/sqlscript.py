@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_DOLLAR_TAG = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+_NON_TRANSACTIONAL = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"^CREATE\s+(UNIQUE\s+)?INDEX\s+CONCURRENTLY\b",
+        r"^DROP\s+INDEX\s+CONCURRENTLY\b",
+        r"^REINDEX\b.*\bCONCURRENTLY\b",
+        r"^ALTER\s+TABLE\b.*\bDETACH\s+PARTITION\b.*\bCONCURRENTLY\b",
+        r"^VACUUM\b",
+        r"^CREATE\s+DATABASE\b",
+        r"^DROP\s+DATABASE\b",
+        r"^ALTER\s+SYSTEM\b",
+        r"^CREATE\s+TABLESPACE\b",
+        r"^DROP\s+TABLESPACE\b",
+    )
+]
+_IMPLICIT_COMMIT = re.compile(
+    r"^(CREATE|ALTER|DROP|RENAME|TRUNCATE|GRANT|REVOKE|LOCK\s+TABLES|UNLOCK\s+TABLES|ANALYZE|OPTIMIZE|REPAIR|EXECUTE)\b",
+    re.IGNORECASE,
+)
+_TEMPORARY_TABLE = re.compile(r"^(CREATE|DROP)\s+TEMPORARY\s+TABLE\b", re.IGNORECASE)
+_CONCURRENT_INDEX_NAME = re.compile(
+    r"^CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\"[^\"]+\"|[\w$]+)",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Statement:
+    text: str
+    line: int
+
+    @property
+    def summary(self) -> str:
+        collapsed = " ".join(strip_comments(self.text).split())
+        return collapsed if len(collapsed) <= 80 else collapsed[:77] + "..."
+
+
+def split_statements(sql: str) -> List[Statement]:
+    return list(iter_statements(sql))
+
+
+def iter_statements(source: str | Iterable[str]) -> Iterator[Statement]:
+    chunks = [source] if isinstance(source, str) else source
+    buffer = ""
+    line = 1
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        statements, consumed, line = _scan(buffer, line, final=False)
+        yield from statements
+        buffer = buffer[consumed:]
+    statements, _consumed, _line = _scan(buffer, line, final=True)
+    yield from statements
+
+
+def iter_file_statements(path: str | Path, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Statement]:
+    with open(path, "r", encoding="utf-8") as handle:
+        yield from iter_statements(iter(lambda: handle.read(chunk_size), ""))
+
+
+def _scan(sql: str, first_line: int, final: bool) -> Tuple[List[Statement], int, int]:
+    statements: List[Statement] = []
+    start = 0
+    start_line = first_line
+    line = first_line
+    consumed = 0
+    consumed_line = first_line
+    i = 0
+    length = len(sql)
+    has_code = False
+
+    while i < length:
+        ch = sql[i]
+        nxt = sql[i + 1] if i + 1 < length else ""
+
+        if ch == "\n":
+            line += 1
+            i += 1
+            continue
+        if ch == "-" and nxt == "-":
+            end = sql.find("\n", i)
+            i = length if end < 0 else end
+            continue
+        if ch == "/" and nxt == "*":
+            depth = 1
+            i += 2
+            while i < length and depth:
+                if sql.startswith("/*", i):
+                    depth += 1
+                    i += 2
+                elif sql.startswith("*/", i):
+                    depth -= 1
+                    i += 2
+                else:
+                    if sql[i] == "\n":
+                        line += 1
+                    i += 1
+            continue
+        if ch == ";":
+            if has_code:
+                statements.append(Statement(text=sql[start:i].strip(), line=start_line))
+            i += 1
+            start = i
+            consumed = i
+            consumed_line = line
+            has_code = False
+            continue
+
+        if not has_code and not ch.isspace():
+            has_code = True
+            start = i
+            start_line = line
+
+        if ch == "'" or ch == '"':
+            escapes = ch == "'" and i > 0 and sql[i - 1] in "eE" and (i < 2 or not (sql[i - 2].isalnum() or sql[i - 2] == "_"))
+            i += 1
+            while i < length:
+                if sql[i] == "\n":
+                    line += 1
+                if escapes and sql[i] == "\\":
+                    i += 2
+                    continue
+                if sql[i] == ch:
+                    if i + 1 < length and sql[i + 1] == ch:
+                        i += 2
+                        continue
+                    break
+                i += 1
+            i += 1
+            continue
+        if ch == "$" and (i == 0 or not (sql[i - 1].isalnum() or sql[i - 1] == "_")):
+            match = _DOLLAR_TAG.match(sql, i)
+            if match:
+                tag = match.group(0)
+                end = sql.find(tag, match.end())
+                end = length if end < 0 else end + len(tag)
+                line += sql.count("\n", i, end)
+                i = end
+                continue
+        i += 1
+
+    if not final:
+        return statements, consumed, consumed_line
+    if has_code:
+        tail = sql[start:].strip()
+        if strip_comments(tail).strip():
+            statements.append(Statement(text=tail, line=start_line))
+    return statements, length, line
+
+
+def strip_comments(sql: str) -> str:
+    out: List[str] = []
+    i = 0
+    length = len(sql)
+    while i < length:
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = length if end < 0 else end
+            continue
+        if sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = length if end < 0 else end + 2
+            out.append(" ")
+            continue
+        out.append(sql[i])
+        i += 1
+    return "".join(out)
+
+
+def normalized(statement: Statement | str) -> str:
+    text = statement.text if isinstance(statement, Statement) else statement
+    return " ".join(strip_comments(text).split())
+
+
+def is_non_transactional(statement: Statement | str) -> bool:
+    text = normalized(statement)
+    return any(pattern.search(text) for pattern in _NON_TRANSACTIONAL)
+
+
+def causes_implicit_commit(statement: Statement | str) -> bool:
+    text = normalized(statement)
+    return bool(_IMPLICIT_COMMIT.search(text)) and not _TEMPORARY_TABLE.search(text)
+
+
+def concurrent_index_name(statement: Statement | str) -> str | None:
+    match = _CONCURRENT_INDEX_NAME.search(normalized(statement))
+    if not match:
+        return None
+    name = match.group(1)
+    return name[1:-1] if name.startswith('"') else name.lower()
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Deque, Dict, List, Sequence
+
+if TYPE_CHECKING:
+    from psycopg import Connection as PgConnection
+
+WATCHED_TABLES = ("heartbeats", "violations", "device_bindings", "session_tokens")
+
+TABLE_STATS_SQL = """
+SELECT
+    s.schemaname,
+    s.relname,
+    GREATEST(c.reltuples, 0)::bigint,
+    s.n_live_tup,
+    s.n_dead_tup,
+    pg_relation_size(s.relid),
+    pg_indexes_size(s.relid),
+    pg_total_relation_size(s.relid),
+    s.seq_scan,
+    s.seq_tup_read,
+    COALESCE(s.idx_scan, 0),
+    COALESCE(s.idx_tup_fetch, 0),
+    s.n_tup_ins,
+    s.n_tup_upd,
+    s.n_tup_del,
+    s.last_autovacuum,
+    s.last_autoanalyze
+FROM pg_stat_user_tables s
+JOIN pg_class c ON c.oid = s.relid
+WHERE %(tables)s::text[] IS NULL OR s.relname = ANY(%(tables)s::text[])
+ORDER BY s.schemaname, s.relname
+"""
+
+INDEX_STATS_SQL = """
+SELECT
+    i.schemaname,
+    i.relname,
+    i.indexrelname,
+    i.idx_scan,
+    i.idx_tup_read,
+    pg_relation_size(i.indexrelid),
+    x.indisunique,
+    x.indisprimary
+FROM pg_stat_user_indexes i
+JOIN pg_index x ON x.indexrelid = i.indexrelid
+WHERE %(tables)s::text[] IS NULL OR i.relname = ANY(%(tables)s::text[])
+ORDER BY i.schemaname, i.relname, i.indexrelname
+"""
+
+
+@dataclass
+class TableStats:
+    schema: str
+    name: str
+    row_estimate: int
+    live_rows: int
+    dead_rows: int
+    heap_bytes: int
+    index_bytes: int
+    total_bytes: int
+    seq_scan: int
+    seq_tup_read: int
+    idx_scan: int
+    idx_tup_fetch: int
+    n_tup_ins: int
+    n_tup_upd: int
+    n_tup_del: int
+    last_autovacuum: datetime | None
+    last_autoanalyze: datetime | None
+
+    @property
+    def label(self) -> str:
+        return f"{self.schema}.{self.name}"
+
+    @property
+    def dead_ratio(self) -> float:
+        total = self.live_rows + self.dead_rows
+        return self.dead_rows / total if total else 0.0
+
+    @property
+    def seq_scan_ratio(self) -> float:
+        total = self.seq_scan + self.idx_scan
+        return self.seq_scan / total if total else 0.0
+
+
+@dataclass
+class IndexStats:
+    schema: str
+    table: str
+    name: str
+    idx_scan: int
+    idx_tup_read: int
+    size_bytes: int
+    is_unique: bool
+    is_primary: bool
+
+    @property
+    def table_label(self) -> str:
+        return f"{self.schema}.{self.table}"
+
+    @property
+    def is_unused(self) -> bool:
+        return self.idx_scan == 0 and not (self.is_unique or self.is_primary)
+
+
+@dataclass
+class StatsSample:
+    sampled_at: float
+    tables: Dict[str, TableStats] = field(default_factory=dict)
+    indexes: List[IndexStats] = field(default_factory=list)
+
+
+@dataclass
+class GrowthRate:
+    label: str
+    window_seconds: float
+    rows_per_hour: float
+    bytes_per_hour: float
+    inserts_per_second: float
+    seq_scans_per_hour: float
+
+
+def sample_stats(conn: PgConnection, tables: Sequence[str] | None = None) -> StatsSample:
+    params = {"tables": list(tables) if tables else None}
+    with conn.cursor() as cur:
+        cur.execute(TABLE_STATS_SQL, params)
+        table_rows = cur.fetchall()
+        cur.execute(INDEX_STATS_SQL, params)
+        index_rows = cur.fetchall()
+    conn.rollback()
+
+    sample = StatsSample(sampled_at=time.time())
+    for row in table_rows:
+        stats = TableStats(
+            schema=row[0],
+            name=row[1],
+            row_estimate=int(row[2] or 0),
+            live_rows=int(row[3] or 0),
+            dead_rows=int(row[4] or 0),
+            heap_bytes=int(row[5] or 0),
+            index_bytes=int(row[6] or 0),
+            total_bytes=int(row[7] or 0),
+            seq_scan=int(row[8] or 0),
+            seq_tup_read=int(row[9] or 0),
+            idx_scan=int(row[10] or 0),
+            idx_tup_fetch=int(row[11] or 0),
+            n_tup_ins=int(row[12] or 0),
+            n_tup_upd=int(row[13] or 0),
+            n_tup_del=int(row[14] or 0),
+            last_autovacuum=row[15],
+            last_autoanalyze=row[16],
+        )
+        sample.tables[stats.label] = stats
+    sample.indexes = [
+        IndexStats(
+            schema=row[0],
+            table=row[1],
+            name=row[2],
+            idx_scan=int(row[3] or 0),
+            idx_tup_read=int(row[4] or 0),
+            size_bytes=int(row[5] or 0),
+            is_unique=bool(row[6]),
+            is_primary=bool(row[7]),
+        )
+        for row in index_rows
+    ]
+    return sample
+
+
+class StatsSampler:
+    def __init__(self, max_samples: int = 720) -> None:
+        self._lock = threading.Lock()
+        self._samples: Deque[StatsSample] = deque(maxlen=max_samples)
+
+    def add(self, sample: StatsSample) -> None:
+        with self._lock:
+            self._samples.append(sample)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+    def latest(self) -> StatsSample | None:
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    def sample_count(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def growth(self, label: str, window_seconds: float | None = None) -> GrowthRate | None:
+        with self._lock:
+            samples = list(self._samples)
+        if len(samples) < 2:
+            return None
+
+        last = samples[-1]
+        current = last.tables.get(label)
+        if current is None:
+            return None
+
+        first = None
+        first_stats = None
+        for sample in samples[:-1]:
+            if window_seconds is not None and last.sampled_at - sample.sampled_at > window_seconds:
+                continue
+            stats = sample.tables.get(label)
+            if stats is not None:
+                first, first_stats = sample, stats
+                break
+        if first is None or first_stats is None:
+            return None
+
+        elapsed = last.sampled_at - first.sampled_at
+        if elapsed <= 0:
+            return None
+        inserted = current.n_tup_ins - first_stats.n_tup_ins
+        seq_scans = current.seq_scan - first_stats.seq_scan
+        if inserted < 0 or seq_scans < 0:
+            return None
+
+        per_hour = 3600.0 / elapsed
+        return GrowthRate(
+            label=label,
+            window_seconds=elapsed,
+            rows_per_hour=(current.live_rows - first_stats.live_rows) * per_hour,
+            bytes_per_hour=(current.total_bytes - first_stats.total_bytes) * per_hour,
+            inserts_per_second=inserted / elapsed,
+            seq_scans_per_hour=seq_scans * per_hour,
+        )
@@ -1,12 +1,56 @@
 from __future__ import annotations
 
+import sys
+import time
 import tkinter as tk
 from pathlib import Path
-from tkinter import filedialog, messagebox, ttk
+from tkinter import messagebox, ttk
+from typing import TYPE_CHECKING, Dict
 
-from config import AppConfig, load_config, save_config
-from db import ColumnInfo, connect, execute_script, list_columns, list_tables, ping
-from migrations import apply_pending, discover_migrations, preview_pending_sql, rollback_last
+from config import (
+    DESTINATIONS,
+    GRID_PAGE_SIZE,
+    PERIODS,
+    TRANSFER_FORMATS,
+    AppConfig,
+    RetentionPolicy,
+    Target,
+    load_catalog_cache,
+    load_config,
+    redact_url,
+    save_catalog_cache,
+    save_config,
+)
+from jobs import JOB_CANCELLED, Job, JobContext, JobRunner
+from sqlscript import causes_implicit_commit, split_statements
+from stats import WATCHED_TABLES, StatsSample, StatsSampler, sample_stats
+
+if TYPE_CHECKING:
+    from advisor import AdvisorReport, IndexAdvice
+    from catalog import CatalogSnapshot, TableInfo
+    from db import TransferResult
+    from fleet import FleetSummary, TargetResult
+    from grid import GridBrowser, GridPage
+    from locks import LockMonitor, LockSnapshot
+    from migrations import ApplyOptions, BackfillProgress, BackfillSpec, DriftReport
+    from profiler import PlanNode, QueryPlan
+    from retention import RetentionOptions, RetentionResult
+    from schemadiff import SchemaDiff
+
+JOB_POLL_MS = 50
+JOB_REFRESH_MS = 1000
+JOB_WORKERS = 4
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = JOB_WORKERS + 1
+POOL_EVICT_MS = 60_000
+STATS_INTERVAL_MS = 60_000
+LOCK_REFRESH_MS = 1000
+
+
+def _cancel_backend(db_url: str, backend_id: int) -> bool:
+    from dialects import cancel_backend
+
+    return cancel_backend(db_url, backend_id)
 
 
 class SchemaAdminApp(tk.Tk):
@@ -15,16 +59,84 @@ class SchemaAdminApp(tk.Tk):
         self.title("Edufika Schema Admin")
         self.geometry("1220x780")
         self.minsize(980, 640)
+        splash = ttk.Label(self, text="Starting Schema Admin...", anchor=tk.CENTER)
+        splash.pack(fill=tk.BOTH, expand=True)
+        self.update()
 
         cfg = load_config()
         self.db_url_var = tk.StringVar(value=cfg.db_url)
         self.migrations_dir_var = tk.StringVar(value=cfg.migrations_dir)
+        self.online_var = tk.BooleanVar(value=cfg.online_migrations)
+        self.lock_timeout_var = tk.StringVar(value=str(cfg.lock_timeout_ms))
+        self.statement_timeout_var = tk.StringVar(value=str(cfg.statement_timeout_ms))
+        self.lock_retries_var = tk.StringVar(value=str(cfg.lock_retries))
         self.status_var = tk.StringVar(value="Ready.")
 
         self._table_refs = []
+        self._catalog: CatalogSnapshot | None = None
+        self._cached_catalog: Dict | None = None
+        self._stats_sampler = StatsSampler()
+        self._stats_url: str | None = None
+        self._stats_pending = False
+        self.stats_watched_var = tk.BooleanVar(value=True)
+        self._grid: GridBrowser | None = None
+        self._grid_job: Job | None = None
+        self.grid_sort_var = tk.StringVar()
+        self.grid_desc_var = tk.BooleanVar(value=False)
+        self.grid_where_var = tk.StringVar()
+        self.grid_page_size_var = tk.StringVar(value=str(GRID_PAGE_SIZE))
+        self.grid_status_var = tk.StringVar(value="Select a table and press Load Rows.")
+        self.stats_auto_var = tk.BooleanVar(value=False)
+        self._advisor_report: AdvisorReport | None = None
+        self.advisor_unused_var = tk.BooleanVar(value=False)
+        self._schema_diff: SchemaDiff | None = None
+        self.diff_rebuild_var = tk.BooleanVar(value=False)
+        self.backfill_name_var = tk.StringVar()
+        self.backfill_table_var = tk.StringVar()
+        self.backfill_set_var = tk.StringVar()
+        self.backfill_where_var = tk.StringVar()
+        self.backfill_key_var = tk.StringVar()
+        self.backfill_batch_var = tk.StringVar(value="5000")
+        self.backfill_sleep_var = tk.StringVar(value="0")
+        self.backfill_restart_var = tk.BooleanVar(value=False)
+        self._targets = list(cfg.targets)
+        self.target_name_var = tk.StringVar()
+        self.target_url_var = tk.StringVar()
+        self.fleet_workers_var = tk.StringVar(value=str(cfg.fleet_workers))
+        self.fleet_fail_fast_var = tk.BooleanVar(value=cfg.fleet_fail_fast)
+        self._fleet_job: Job | None = None
+        self.transfer_tables_var = tk.StringVar(value="heartbeats, violations")
+        self.transfer_where_var = tk.StringVar()
+        self.transfer_session_var = tk.StringVar()
+        self.transfer_format_var = tk.StringVar(value=TRANSFER_FORMATS[0])
+        self.transfer_dir_var = tk.StringVar(value=str(Path.cwd() / "exports"))
+        self.transfer_workers_var = tk.StringVar(value="4")
+        self.transfer_truncate_var = tk.BooleanVar(value=False)
+        self._retention_policies = list(cfg.retention_policies)
+        self.retention_table_var = tk.StringVar()
+        self.retention_days_var = tk.StringVar(value="30")
+        self.retention_destination_var = tk.StringVar(value=DESTINATIONS[0])
+        self.retention_batch_var = tk.StringVar(value="5000")
+        self.retention_dir_var = tk.StringVar(value=cfg.retention_archive_dir)
+        self.retention_sleep_var = tk.StringVar(value=str(cfg.retention_sleep_seconds))
+        self.partition_period_var = tk.StringVar(value="month")
+        self.partition_premake_var = tk.StringVar(value="3")
+        self._lock_monitor: LockMonitor | None = None
+        self._lock_warned = False
+        self.locks_status_var = tk.StringVar(value="Lock monitor stopped.")
+        self._jobs = JobRunner(max_workers=JOB_WORKERS, cancel_backend=_cancel_backend)
+        self._jobs.add_listener(self._on_job_changed)
+        splash.destroy()
         self._build_ui()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after(JOB_POLL_MS, self._poll_jobs)
+        self.after(JOB_REFRESH_MS, self._refresh_running_jobs)
+        self.after(POOL_EVICT_MS, self._evict_idle_connections)
+        self.after(STATS_INTERVAL_MS, self._auto_sample_stats)
+        self.after(LOCK_REFRESH_MS, self._refresh_locks)
         self._append_log("Schema Admin initialized.")
         self._append_log(f"Default migrations dir: {self.migrations_dir_var.get()}")
+        self.after_idle(self._show_cached_catalog)
 
     def _build_ui(self) -> None:
         root = ttk.Frame(self, padding=10)
@@ -48,6 +160,21 @@ class SchemaAdminApp(tk.Tk):
         ttk.Button(conn_frame, text="Browse", command=self._on_browse_migrations).grid(
             row=1, column=2, sticky=tk.EW, padx=6, pady=6
         )
+
+        ttk.Label(conn_frame, text="Apply Mode").grid(row=2, column=0, sticky=tk.W, padx=6, pady=6)
+        apply_mode = ttk.Frame(conn_frame)
+        apply_mode.grid(row=2, column=1, columnspan=2, sticky=tk.W, padx=6, pady=6)
+        ttk.Checkbutton(
+            apply_mode,
+            text="Online (commit per migration, CONCURRENTLY outside transactions)",
+            variable=self.online_var,
+        ).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Label(apply_mode, text="lock_timeout ms").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(apply_mode, textvariable=self.lock_timeout_var, width=8).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Label(apply_mode, text="statement_timeout ms").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(apply_mode, textvariable=self.statement_timeout_var, width=8).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Label(apply_mode, text="Retries").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(apply_mode, textvariable=self.lock_retries_var, width=4).pack(side=tk.LEFT)
         conn_frame.columnconfigure(1, weight=1)
 
         controls = ttk.Frame(root)
@@ -57,6 +184,7 @@ class SchemaAdminApp(tk.Tk):
         ttk.Button(controls, text="Preview Pending SQL", command=self._on_preview_pending).pack(
             side=tk.LEFT, padx=(0, 6)
         )
+        ttk.Button(controls, text="Check Drift", command=self._on_check_drift).pack(side=tk.LEFT, padx=(0, 6))
         ttk.Button(controls, text="Apply Pending", command=self._on_apply_pending).pack(side=tk.LEFT, padx=(0, 6))
         ttk.Button(controls, text="Dry-Run Pending", command=self._on_dry_run_pending).pack(
             side=tk.LEFT, padx=(0, 6)
@@ -82,20 +210,48 @@ class SchemaAdminApp(tk.Tk):
         notebook.pack(fill=tk.BOTH, expand=True)
 
         schema_tab = ttk.Frame(notebook)
+        data_tab = ttk.Frame(notebook)
+        stats_tab = ttk.Frame(notebook)
+        advisor_tab = ttk.Frame(notebook)
         preview_tab = ttk.Frame(notebook)
+        diff_tab = ttk.Frame(notebook)
         sql_tab = ttk.Frame(notebook)
+        profiler_tab = ttk.Frame(notebook)
+        backfill_tab = ttk.Frame(notebook)
+        fleet_tab = ttk.Frame(notebook)
+        transfer_tab = ttk.Frame(notebook)
+        retention_tab = ttk.Frame(notebook)
+        locks_tab = ttk.Frame(notebook)
+        jobs_tab = ttk.Frame(notebook)
         logs_tab = ttk.Frame(notebook)
         notebook.add(schema_tab, text="Schema Details")
+        notebook.add(data_tab, text="Data")
+        notebook.add(stats_tab, text="Statistics")
+        notebook.add(advisor_tab, text="Index Advisor")
         notebook.add(preview_tab, text="Migration Preview")
+        notebook.add(diff_tab, text="Schema Diff")
         notebook.add(sql_tab, text="Custom SQL")
+        notebook.add(profiler_tab, text="Profiler")
+        notebook.add(backfill_tab, text="Backfill")
+        notebook.add(fleet_tab, text="Fleet")
+        notebook.add(transfer_tab, text="Export / Import")
+        notebook.add(retention_tab, text="Retention")
+        notebook.add(locks_tab, text="Locks")
+        notebook.add(jobs_tab, text="Jobs")
         notebook.add(logs_tab, text="Logs")
 
         self.schema_text = tk.Text(schema_tab, wrap=tk.NONE, height=18)
         self.schema_text.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
 
+        self._build_data_tab(data_tab)
+        self._build_stats_tab(stats_tab)
+        self._build_advisor_tab(advisor_tab)
+
         self.preview_text = tk.Text(preview_tab, wrap=tk.NONE, height=18)
         self.preview_text.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
 
+        self._build_diff_tab(diff_tab)
+
         sql_controls = ttk.Frame(sql_tab)
         sql_controls.pack(fill=tk.X, padx=6, pady=(6, 0))
         ttk.Button(sql_controls, text="Execute SQL", command=self._on_execute_sql).pack(side=tk.LEFT, padx=(0, 6))
@@ -109,12 +265,425 @@ class SchemaAdminApp(tk.Tk):
             "-- ALTER TABLE session_tokens ADD COLUMN IF NOT EXISTS note TEXT;\n",
         )
 
+        self._build_profiler_tab(profiler_tab)
+        self._build_backfill_tab(backfill_tab)
+        self._build_fleet_tab(fleet_tab)
+        self._build_transfer_tab(transfer_tab)
+        self._build_retention_tab(retention_tab)
+        self._build_locks_tab(locks_tab)
+
+        jobs_controls = ttk.Frame(jobs_tab)
+        jobs_controls.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Button(jobs_controls, text="Cancel Selected", command=self._on_cancel_job).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(jobs_controls, text="Clear Finished", command=self._on_clear_jobs).pack(side=tk.LEFT)
+
+        self.jobs_tree = self._make_tree(
+            jobs_tab,
+            [
+                ("job", "Job", 220, tk.W),
+                ("status", "Status", 90, tk.W),
+                ("elapsed", "Elapsed", 80, tk.E),
+                ("detail", "Detail", 480, tk.W),
+            ],
+        )
+        self.jobs_tree.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+
         self.logs_text = tk.Text(logs_tab, wrap=tk.WORD, state=tk.DISABLED, height=18)
         self.logs_text.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
 
         status_bar = ttk.Label(root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         status_bar.pack(fill=tk.X, pady=(8, 0))
 
+    def _build_data_tab(self, parent: ttk.Frame) -> None:
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Label(controls, text="Sort by").pack(side=tk.LEFT, padx=(0, 4))
+        self.grid_sort_combo = ttk.Combobox(controls, textvariable=self.grid_sort_var, state="readonly", width=18)
+        self.grid_sort_combo.pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Checkbutton(controls, text="Descending", variable=self.grid_desc_var).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Label(controls, text="Page size").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(controls, textvariable=self.grid_page_size_var, width=6).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Button(controls, text="Load Rows", command=self._on_grid_load).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="< Prev", command=self._on_grid_previous).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Next >", command=self._on_grid_next).pack(side=tk.LEFT)
+
+        where = ttk.Frame(parent)
+        where.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Label(where, text="WHERE").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(where, textvariable=self.grid_where_var).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Label(parent, textvariable=self.grid_status_var).pack(fill=tk.X, padx=6, pady=(6, 0))
+
+        frame = ttk.Frame(parent)
+        frame.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        self.grid_tree = ttk.Treeview(frame, show="headings", selectmode=tk.BROWSE)
+        x_scroll = ttk.Scrollbar(frame, orient=tk.HORIZONTAL, command=self.grid_tree.xview)
+        y_scroll = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.grid_tree.yview)
+        self.grid_tree.configure(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
+        self.grid_tree.grid(row=0, column=0, sticky=tk.NSEW)
+        y_scroll.grid(row=0, column=1, sticky=tk.NS)
+        x_scroll.grid(row=1, column=0, sticky=tk.EW)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+
+    def _build_diff_tab(self, parent: ttk.Frame) -> None:
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Button(controls, text="Compare With Migrations", command=self._on_schema_diff).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Checkbutton(controls, text="Rebuild migration schema", variable=self.diff_rebuild_var).pack(
+            side=tk.LEFT, padx=(0, 12)
+        )
+        ttk.Button(controls, text="Save Script...", command=self._on_save_diff_script).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Open in Custom SQL", command=self._on_open_diff_script).pack(side=tk.LEFT)
+
+        split = ttk.Panedwindow(parent, orient=tk.VERTICAL)
+        split.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        diff_frame = ttk.LabelFrame(split, text="Differences")
+        script_frame = ttk.LabelFrame(split, text="Reconciling SQL")
+        split.add(diff_frame, weight=2)
+        split.add(script_frame, weight=3)
+
+        self.diff_tree = self._make_tree(
+            diff_frame,
+            [
+                ("status", "Status", 80, tk.W),
+                ("object", "Object", 90, tk.W),
+                ("table", "Table", 200, tk.W),
+                ("name", "Name", 220, tk.W),
+                ("detail", "Expected / Found", 420, tk.W),
+            ],
+        )
+        self.diff_tree.pack(fill=tk.BOTH, expand=True, padx=4, pady=4)
+        self.diff_script_text = tk.Text(script_frame, wrap=tk.NONE, height=12)
+        self.diff_script_text.pack(fill=tk.BOTH, expand=True, padx=4, pady=4)
+
+    def _build_stats_tab(self, parent: ttk.Frame) -> None:
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Button(controls, text="Sample Now", command=self._on_sample_stats).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Checkbutton(
+            controls,
+            text="Watched tables only (" + ", ".join(WATCHED_TABLES) + ")",
+            variable=self.stats_watched_var,
+        ).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Checkbutton(
+            controls,
+            text=f"Auto-sample every {STATS_INTERVAL_MS // 1000}s",
+            variable=self.stats_auto_var,
+        ).pack(side=tk.LEFT)
+
+        split = ttk.Panedwindow(parent, orient=tk.VERTICAL)
+        split.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        table_frame = ttk.LabelFrame(split, text="Tables")
+        index_frame = ttk.LabelFrame(split, text="Indexes")
+        split.add(table_frame, weight=3)
+        split.add(index_frame, weight=2)
+
+        self.stats_tree = self._make_tree(
+            table_frame,
+            [
+                ("table", "Table", 200, tk.W),
+                ("rows", "Rows (est.)", 100, tk.E),
+                ("heap", "Heap", 80, tk.E),
+                ("index", "Indexes", 80, tk.E),
+                ("dead", "Dead %", 60, tk.E),
+                ("scans", "Seq / Idx scans", 130, tk.E),
+                ("rows_h", "Rows/h", 90, tk.E),
+                ("size_h", "Size/h", 90, tk.E),
+                ("autovacuum", "Last autovacuum", 150, tk.W),
+            ],
+        )
+        self.stats_tree.pack(fill=tk.BOTH, expand=True, padx=4, pady=4)
+
+        self.index_stats_tree = self._make_tree(
+            index_frame,
+            [
+                ("table", "Table", 200, tk.W),
+                ("index", "Index", 260, tk.W),
+                ("scans", "Scans", 90, tk.E),
+                ("size", "Size", 80, tk.E),
+                ("note", "Note", 160, tk.W),
+            ],
+        )
+        self.index_stats_tree.pack(fill=tk.BOTH, expand=True, padx=4, pady=4)
+
+    def _build_profiler_tab(self, parent: ttk.Frame) -> None:
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Button(controls, text="Profile Query", command=self._on_profile_query).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Clear Plan Cache", command=self._on_clear_plan_cache).pack(side=tk.LEFT)
+
+        self.profile_text = tk.Text(parent, wrap=tk.NONE, height=6)
+        self.profile_text.pack(fill=tk.X, padx=6, pady=(6, 0))
+        self.profile_text.insert(
+            "1.0",
+            "-- The last statement runs under EXPLAIN (ANALYZE, BUFFERS); earlier statements run first.\n"
+            "-- Everything is rolled back, so a CREATE INDEX here is a what-if.\n"
+            "SELECT COUNT(*) FROM session_tokens WHERE exam_session_id = '00000000-0000-0000-0000-000000000000' AND role = 'student';\n",
+        )
+
+        frame = ttk.Frame(parent)
+        frame.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        columns = [
+            ("total", "Total ms", 90, tk.E),
+            ("self", "Self ms", 90, tk.E),
+            ("share", "Self %", 60, tk.E),
+            ("rows", "Rows", 80, tk.E),
+            ("estimate", "Est. Rows", 80, tk.E),
+            ("loops", "Loops", 60, tk.E),
+            ("buffers", "Hit/Read", 100, tk.E),
+            ("detail", "Detail", 320, tk.W),
+        ]
+        self.plan_tree = ttk.Treeview(frame, columns=[key for key, _, _, _ in columns], show="tree headings")
+        self.plan_tree.heading("#0", text="Node")
+        self.plan_tree.column("#0", width=300, anchor=tk.W)
+        for key, heading, width, anchor in columns:
+            self.plan_tree.heading(key, text=heading)
+            self.plan_tree.column(key, width=width, anchor=anchor)
+        self.plan_tree.tag_configure("hot", background="#ffd6d6")
+        y_scroll = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.plan_tree.yview)
+        self.plan_tree.configure(yscrollcommand=y_scroll.set)
+        self.plan_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.profile_summary_text = tk.Text(parent, wrap=tk.WORD, height=9, state=tk.DISABLED)
+        self.profile_summary_text.pack(fill=tk.X, padx=6, pady=(0, 6))
+
+    def _build_advisor_tab(self, parent: ttk.Frame) -> None:
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Button(controls, text="Run Advisor", command=self._on_run_advisor).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Write Migration", command=self._on_write_advisor_migration).pack(
+            side=tk.LEFT, padx=(0, 6)
+        )
+        ttk.Checkbutton(controls, text="Include unused index drops", variable=self.advisor_unused_var).pack(side=tk.LEFT)
+
+        self.advisor_tree = self._make_tree(
+            parent,
+            [
+                ("kind", "Kind", 80, tk.W),
+                ("table", "Table", 180, tk.W),
+                ("index", "Index", 260, tk.W),
+                ("reason", "Reason", 520, tk.W),
+            ],
+        )
+        self.advisor_tree.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        self.advisor_tree.bind("<<TreeviewSelect>>", self._on_advice_selected)
+
+        self.advisor_text = tk.Text(parent, wrap=tk.WORD, height=8, state=tk.DISABLED)
+        self.advisor_text.pack(fill=tk.X, padx=6, pady=(0, 6))
+
+    def _build_backfill_tab(self, parent: ttk.Frame) -> None:
+        form = ttk.Frame(parent)
+        form.pack(fill=tk.X, padx=6, pady=(6, 0))
+        for row, (label, var) in enumerate(
+            (
+                ("Name", self.backfill_name_var),
+                ("Table", self.backfill_table_var),
+                ("SET", self.backfill_set_var),
+                ("WHERE", self.backfill_where_var),
+            )
+        ):
+            ttk.Label(form, text=label).grid(row=row, column=0, sticky=tk.W, padx=(0, 6), pady=2)
+            ttk.Entry(form, textvariable=var).grid(row=row, column=1, sticky=tk.EW, pady=2)
+        form.columnconfigure(1, weight=1)
+
+        options = ttk.Frame(parent)
+        options.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Label(options, text="Key column").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(options, textvariable=self.backfill_key_var, width=14).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Label(options, text="Batch size").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(options, textvariable=self.backfill_batch_var, width=8).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Label(options, text="Sleep s").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(options, textvariable=self.backfill_sleep_var, width=6).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Checkbutton(options, text="Restart from scratch", variable=self.backfill_restart_var).pack(side=tk.LEFT)
+
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Button(controls, text="Run Backfill", command=self._on_run_backfill).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Dry-Run Batch", command=self._on_dry_run_backfill).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Refresh Checkpoints", command=self._on_refresh_backfills).pack(side=tk.LEFT)
+
+        self.backfill_tree = self._make_tree(
+            parent,
+            [
+                ("name", "Backfill", 180, tk.W),
+                ("table", "Table", 180, tk.W),
+                ("rows", "Rows", 100, tk.E),
+                ("batches", "Batches", 70, tk.E),
+                ("rate", "Rows/s", 90, tk.E),
+                ("last_key", "Last key", 120, tk.W),
+                ("status", "Status", 90, tk.W),
+            ],
+        )
+        self.backfill_tree.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        self.backfill_tree.bind("<<TreeviewSelect>>", self._on_backfill_selected)
+
+    def _build_fleet_tab(self, parent: ttk.Frame) -> None:
+        form = ttk.Frame(parent)
+        form.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Label(form, text="Name").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(form, textvariable=self.target_name_var, width=16).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Label(form, text="Database URL").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(form, textvariable=self.target_url_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 8))
+        ttk.Button(form, text="Add / Update", command=self._on_add_target).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(form, text="Remove", command=self._on_remove_target).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(form, text="Enable / Disable", command=self._on_toggle_target).pack(side=tk.LEFT)
+
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Button(controls, text="Check Pending", command=self._on_fleet_pending).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Dry-Run All", command=self._on_fleet_dry_run).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Check Drift", command=self._on_fleet_drift).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Apply All", command=self._on_fleet_apply).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Label(controls, text="Workers").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(controls, textvariable=self.fleet_workers_var, width=4).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Checkbutton(controls, text="Fail fast", variable=self.fleet_fail_fast_var).pack(side=tk.LEFT)
+
+        self.fleet_tree = self._make_tree(
+            parent,
+            [
+                ("target", "Target", 140, tk.W),
+                ("url", "Database URL", 260, tk.W),
+                ("enabled", "Enabled", 60, tk.W),
+                ("status", "Status", 80, tk.W),
+                ("count", "Count", 50, tk.E),
+                ("elapsed", "Time", 60, tk.E),
+                ("detail", "Detail", 320, tk.W),
+            ],
+        )
+        self.fleet_tree.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        self.fleet_tree.bind("<<TreeviewSelect>>", self._on_target_selected)
+        self._render_targets()
+
+    def _build_transfer_tab(self, parent: ttk.Frame) -> None:
+        form = ttk.Frame(parent)
+        form.pack(fill=tk.X, padx=6, pady=(6, 0))
+        for row, (label, var) in enumerate(
+            (
+                ("Tables", self.transfer_tables_var),
+                ("WHERE", self.transfer_where_var),
+                ("Exam session id", self.transfer_session_var),
+                ("Directory", self.transfer_dir_var),
+            )
+        ):
+            ttk.Label(form, text=label).grid(row=row, column=0, sticky=tk.W, padx=(0, 6), pady=2)
+            ttk.Entry(form, textvariable=var).grid(row=row, column=1, sticky=tk.EW, pady=2)
+        ttk.Button(form, text="Add Selected", command=self._on_add_transfer_table).grid(
+            row=0, column=2, sticky=tk.EW, padx=(6, 0), pady=2
+        )
+        ttk.Button(form, text="Browse", command=self._on_browse_transfer_dir).grid(
+            row=3, column=2, sticky=tk.EW, padx=(6, 0), pady=2
+        )
+        form.columnconfigure(1, weight=1)
+
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Label(controls, text="Format").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Combobox(
+            controls, textvariable=self.transfer_format_var, values=TRANSFER_FORMATS, state="readonly", width=8
+        ).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Label(controls, text="Workers").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(controls, textvariable=self.transfer_workers_var, width=4).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Button(controls, text="Export", command=self._on_export_tables).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Import Files...", command=self._on_import_files).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Checkbutton(controls, text="Truncate before import", variable=self.transfer_truncate_var).pack(side=tk.LEFT)
+
+        self.transfer_tree = self._make_tree(
+            parent,
+            [
+                ("table", "Table", 160, tk.W),
+                ("direction", "Direction", 70, tk.W),
+                ("rows", "Rows", 100, tk.E),
+                ("size", "Size", 80, tk.E),
+                ("elapsed", "Time", 60, tk.E),
+                ("detail", "File / Error", 420, tk.W),
+            ],
+        )
+        self.transfer_tree.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+
+    def _build_retention_tab(self, parent: ttk.Frame) -> None:
+        form = ttk.Frame(parent)
+        form.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Label(form, text="Table").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(form, textvariable=self.retention_table_var, width=18).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Label(form, text="Max age days").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(form, textvariable=self.retention_days_var, width=6).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Label(form, text="Destination").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Combobox(
+            form, textvariable=self.retention_destination_var, values=DESTINATIONS, state="readonly", width=8
+        ).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Label(form, text="Batch size").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(form, textvariable=self.retention_batch_var, width=8).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Button(form, text="Add / Update", command=self._on_add_retention_policy).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(form, text="Remove", command=self._on_remove_retention_policy).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(form, text="Enable / Disable", command=self._on_toggle_retention_policy).pack(side=tk.LEFT)
+
+        options = ttk.Frame(parent)
+        options.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Label(options, text="Archive dir").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(options, textvariable=self.retention_dir_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 6))
+        ttk.Button(options, text="Browse", command=self._on_browse_archive_dir).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Label(options, text="Sleep s").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(options, textvariable=self.retention_sleep_var, width=6).pack(side=tk.LEFT)
+
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Button(controls, text="Dry-Run Retention", command=self._on_dry_run_retention).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Run Retention", command=self._on_run_retention).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Label(controls, text="Partition period").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Combobox(
+            controls, textvariable=self.partition_period_var, values=list(PERIODS), state="readonly", width=7
+        ).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Label(controls, text="Premake").pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Entry(controls, textvariable=self.partition_premake_var, width=4).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Button(controls, text="Partition Table", command=self._on_partition_table).pack(side=tk.LEFT)
+
+        self.retention_tree = self._make_tree(
+            parent,
+            [
+                ("table", "Table", 160, tk.W),
+                ("days", "Max age", 70, tk.E),
+                ("destination", "Destination", 90, tk.W),
+                ("batch", "Batch", 70, tk.E),
+                ("enabled", "Enabled", 60, tk.W),
+                ("result", "Last run", 420, tk.W),
+            ],
+        )
+        self.retention_tree.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        self.retention_tree.bind("<<TreeviewSelect>>", self._on_retention_policy_selected)
+        self._render_retention_policies()
+
+    def _build_locks_tab(self, parent: ttk.Frame) -> None:
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X, padx=6, pady=(6, 0))
+        ttk.Button(controls, text="Start Monitor", command=self._on_start_lock_monitor).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Stop Monitor", command=self._on_stop_lock_monitor).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(controls, text="Abort Blocking Jobs", command=self._on_abort_blocking_jobs).pack(side=tk.LEFT)
+        ttk.Label(parent, textvariable=self.locks_status_var, anchor=tk.W).pack(fill=tk.X, padx=6, pady=(6, 0))
+
+        self.locks_tree = self._make_tree(
+            parent,
+            [
+                ("pid", "PID", 70, tk.E),
+                ("role", "Role", 130, tk.W),
+                ("application", "Application", 130, tk.W),
+                ("client", "Client", 140, tk.W),
+                ("running", "Running", 80, tk.E),
+                ("lock", "Waiting for", 220, tk.W),
+                ("blocked_by", "Blocked by", 100, tk.W),
+                ("query", "Query", 420, tk.W),
+            ],
+        )
+        self.locks_tree.tag_configure("warn", background="#f8d7da")
+        self.locks_tree.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+
+    def _make_tree(self, parent, columns) -> ttk.Treeview:
+        tree = ttk.Treeview(parent, columns=[key for key, _, _, _ in columns], show="headings", selectmode=tk.BROWSE)
+        for key, heading, width, anchor in columns:
+            tree.heading(key, text=heading)
+            tree.column(key, width=width, anchor=anchor)
+        return tree
+
     def _append_log(self, message: str) -> None:
         self.logs_text.configure(state=tk.NORMAL)
         self.logs_text.insert(tk.END, f"{message}\n")
@@ -123,30 +692,189 @@ class SchemaAdminApp(tk.Tk):
         self.status_var.set(message)
 
     def _validate_db_url(self) -> str:
+        from dialects import dialect_for_url
+
         db_url = self.db_url_var.get().strip()
         if not db_url:
             raise ValueError("Database URL cannot be empty.")
+        dialect_for_url(db_url)
         return db_url
 
+    def _is_postgres(self, db_url: str) -> bool:
+        from dialects import POSTGRES, dialect_for_url
+
+        try:
+            return dialect_for_url(db_url) is POSTGRES
+        except ValueError:
+            return False
+
     def _migrations_dir(self) -> str:
         path = self.migrations_dir_var.get().strip()
         if not path:
             raise ValueError("Migrations directory cannot be empty.")
         return path
 
-    def _with_connection(self, action):
-        db_url = self._validate_db_url()
-        conn = connect(db_url)
+    def _apply_options(self) -> ApplyOptions:
+        from migrations import ApplyOptions
+
+        values = {}
+        for key, var, label in (
+            ("lock_timeout_ms", self.lock_timeout_var, "lock_timeout"),
+            ("statement_timeout_ms", self.statement_timeout_var, "statement_timeout"),
+            ("max_retries", self.lock_retries_var, "Retries"),
+        ):
+            try:
+                value = int(var.get().strip() or "0")
+            except ValueError:
+                raise ValueError(f"{label} must be a whole number.") from None
+            if value < 0:
+                raise ValueError(f"{label} cannot be negative.")
+            values[key] = value
+        return ApplyOptions(online=bool(self.online_var.get()), **values)
+
+    def _backfill_spec(self) -> BackfillSpec:
+        from migrations import BackfillSpec
+
+        name = self.backfill_name_var.get().strip()
+        table = self.backfill_table_var.get().strip()
+        set_clause = self.backfill_set_var.get().strip()
+        if not name or not table or not set_clause:
+            raise ValueError("Backfill name, table and SET expression are required.")
         try:
-            return action(conn)
-        finally:
-            conn.close()
+            batch_size = int(self.backfill_batch_var.get().strip() or "0")
+            sleep_seconds = float(self.backfill_sleep_var.get().strip() or "0")
+        except ValueError:
+            raise ValueError("Batch size must be a whole number and sleep a number of seconds.") from None
+        if batch_size < 1 or sleep_seconds < 0:
+            raise ValueError("Batch size must be at least 1 and sleep cannot be negative.")
+        options = self._apply_options()
+        return BackfillSpec(
+            name=name,
+            table=table,
+            set_clause=set_clause,
+            where=self.backfill_where_var.get().strip() or None,
+            key_column=self.backfill_key_var.get().strip() or None,
+            batch_size=batch_size,
+            sleep_seconds=sleep_seconds,
+            lock_timeout_ms=options.lock_timeout_ms,
+            max_retries=options.max_retries,
+        )
+
+    def _with_connection(self, db_url: str, ctx: JobContext, action, reset: bool = False):
+        from pool import get_pool
+
+        pool = get_pool(db_url, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE)
+        with pool.connection(reset=reset) as conn:
+            ctx.track(conn, db_url)
+            try:
+                return action(conn)
+            finally:
+                ctx.untrack(conn)
+
+    def _monitored(self, db_url: str, action):
+        from db import LockWaitMonitor
+        from dialects import POSTGRES, dialect_of
+
+        def run(conn):
+            if dialect_of(conn) is not POSTGRES:
+                return action(conn, None)
+            with LockWaitMonitor(db_url, conn.info.backend_pid) as monitor:
+                return action(conn, monitor)
+
+        return run
+
+    def _evict_idle_connections(self) -> None:
+        pool = sys.modules.get("pool")
+        if pool is not None:
+            pool.evict_idle_all()
+        self.after(POOL_EVICT_MS, self._evict_idle_connections)
+
+    def _submit(
+        self,
+        label: str,
+        work,
+        on_success=None,
+        error_title: str = "Job Failed",
+        error_prefix: str | None = None,
+        on_failure=None,
+        show_error: bool = True,
+    ):
+        def on_error(exc: BaseException) -> None:
+            if on_failure is not None:
+                on_failure(exc)
+            if show_error:
+                messagebox.showerror(error_title, str(exc))
+            self._append_log(f"{error_prefix or label + ' failed'}: {exc}")
+
+        return self._jobs.submit(label, work, on_success=on_success, on_error=on_error, on_progress=self._append_log)
+
+    def _poll_jobs(self) -> None:
+        self._jobs.drain()
+        self.after(JOB_POLL_MS, self._poll_jobs)
+
+    def _refresh_running_jobs(self) -> None:
+        for job in self._jobs.jobs():
+            if not job.finished:
+                self._render_job(job)
+        self.after(JOB_REFRESH_MS, self._refresh_running_jobs)
+
+    def _render_job(self, job: Job) -> None:
+        iid = str(job.id)
+        values = (job.label, job.status, f"{job.elapsed:.1f}s", job.detail)
+        if self.jobs_tree.exists(iid):
+            self.jobs_tree.item(iid, values=values)
+        else:
+            self.jobs_tree.insert("", tk.END, iid=iid, values=values)
+
+    def _on_job_changed(self, job: Job) -> None:
+        self._render_job(job)
+        if job.status == JOB_CANCELLED:
+            self._append_log(f"Job cancelled: {job.label}")
+
+    def _on_cancel_job(self) -> None:
+        selection = self.jobs_tree.selection()
+        if not selection:
+            return
+        job_id = int(selection[0])
+        if self._jobs.cancel(job_id):
+            self._append_log(f"Cancel requested for job #{job_id}.")
+
+    def _on_clear_jobs(self) -> None:
+        self._jobs.clear_finished()
+        known = {str(job.id) for job in self._jobs.jobs()}
+        for iid in self.jobs_tree.get_children():
+            if iid not in known:
+                self.jobs_tree.delete(iid)
+
+    def _on_close(self) -> None:
+        if self._jobs.active_count() and not messagebox.askyesno(
+            "Jobs Running",
+            "Background jobs are still running.\nCancel them and exit?",
+        ):
+            return
+        self._jobs.shutdown()
+        self._stop_lock_monitor()
+        pool = sys.modules.get("pool")
+        if pool is not None:
+            pool.close_all()
+        self.destroy()
 
     def _on_save_config(self) -> None:
         try:
+            options = self._apply_options()
             cfg = AppConfig(
                 db_url=self._validate_db_url(),
                 migrations_dir=self._migrations_dir(),
+                online_migrations=options.online,
+                lock_timeout_ms=options.lock_timeout_ms,
+                statement_timeout_ms=options.statement_timeout_ms,
+                lock_retries=options.max_retries,
+                targets=list(self._targets),
+                fleet_workers=self._fleet_workers(),
+                fleet_fail_fast=bool(self.fleet_fail_fast_var.get()),
+                retention_policies=list(self._retention_policies),
+                retention_archive_dir=self.retention_dir_var.get().strip(),
+                retention_sleep_seconds=self._retention_options().sleep_seconds,
             )
             save_config(cfg)
             self._append_log("Configuration saved.")
@@ -155,113 +883,650 @@ class SchemaAdminApp(tk.Tk):
             self._append_log(f"Save config failed: {exc}")
 
     def _on_browse_migrations(self) -> None:
+        from tkinter import filedialog
+
         selected = filedialog.askdirectory(initialdir=self.migrations_dir_var.get() or ".")
         if selected:
             self.migrations_dir_var.set(selected)
             self._append_log(f"Migrations directory set: {selected}")
 
     def _on_test_connection(self) -> None:
+        from dialects import server_version
+
         try:
-            version = ping(self._validate_db_url())
-            self._append_log(f"Connection OK. Server: {version}")
+            db_url = self._validate_db_url()
         except Exception as exc:  # noqa: BLE001
             messagebox.showerror("Connection Failed", str(exc))
             self._append_log(f"Connection failed: {exc}")
+            return
+
+        self._submit(
+            "Test connection",
+            lambda ctx: self._with_connection(db_url, ctx, server_version),
+            on_success=lambda version: self._append_log(f"Connection OK. Server: {version}"),
+            error_title="Connection Failed",
+            error_prefix="Connection failed",
+        )
 
     def _on_refresh_schema(self) -> None:
         try:
-            tables = self._with_connection(list_tables)
-            self._table_refs = tables
-            self.tables_listbox.delete(0, tk.END)
-            for table in tables:
-                self.tables_listbox.insert(tk.END, table.label)
-            self._append_log(f"Schema refreshed. Tables found: {len(tables)}")
+            db_url = self._validate_db_url()
         except Exception as exc:  # noqa: BLE001
             messagebox.showerror("Refresh Schema Failed", str(exc))
             self._append_log(f"Refresh schema failed: {exc}")
+            return
+        self._load_catalog(db_url, refresh=True)
+
+    def _load_catalog(self, db_url: str, refresh: bool, show_error: bool = True) -> None:
+        def work(ctx: JobContext) -> CatalogSnapshot:
+            from catalog import cache as catalog_cache
+            from catalog import snapshot_to_dict
+
+            snapshot = self._with_connection(
+                db_url, ctx, lambda conn: catalog_cache.load(conn, db_url, refresh=refresh)
+            )
+            save_catalog_cache(db_url, snapshot_to_dict(snapshot))
+            return snapshot
+
+        def on_success(snapshot: CatalogSnapshot) -> None:
+            self._show_catalog(snapshot)
+            self._append_log(f"Schema refreshed. Tables found: {len(snapshot.tables)}")
+
+        self._submit(
+            "Refresh schema",
+            work,
+            on_success=on_success,
+            error_title="Refresh Schema Failed",
+            error_prefix="Refresh schema failed",
+            show_error=show_error,
+        )
+
+    def _show_cached_catalog(self) -> None:
+        db_url = self.db_url_var.get().strip()
+        cached = load_catalog_cache(db_url) if db_url else None
+        if cached is None or self._catalog is not None:
+            return
+        try:
+            labels = [f"{table['ref']['schema']}.{table['ref']['name']}" for table in cached["tables"]]
+            saved = time.strftime("%Y-%m-%d %H:%M", time.localtime(float(cached.get("loaded_at") or 0)))
+        except (KeyError, TypeError, ValueError):
+            return
+        self._cached_catalog = cached
+        self.tables_listbox.delete(0, tk.END)
+        for label in labels:
+            self.tables_listbox.insert(tk.END, label)
+        self._append_log(f"Showing {len(labels)} cached table(s) from {saved}; refreshing in the background.")
+        self._load_catalog(db_url, refresh=True, show_error=False)
+
+    def _invalidate_catalog(self, db_url: str) -> None:
+        from catalog import cache as catalog_cache
+
+        catalog_cache.invalidate(db_url)
+        if self._catalog is not None:
+            self._load_catalog(db_url, refresh=True)
+
+    def _show_catalog(self, snapshot: CatalogSnapshot) -> None:
+        selected = None
+        selection = self.tables_listbox.curselection()
+        if selection and self._catalog is not None:
+            selected = self._catalog.tables[int(selection[0])].label
+
+        self._catalog = snapshot
+        self._cached_catalog = None
+        self._table_refs = snapshot.refs()
+        self.tables_listbox.delete(0, tk.END)
+        for index, table in enumerate(self._table_refs):
+            self.tables_listbox.insert(tk.END, table.label)
+            if table.label == selected:
+                self.tables_listbox.selection_set(index)
+                self._render_table(snapshot.tables[index])
 
     def _on_table_selected(self, _event=None) -> None:
+        from catalog import snapshot_from_dict
+        from grid import sortable_columns
+
         selection = self.tables_listbox.curselection()
-        if not selection:
+        if selection and self._catalog is None and self._cached_catalog is not None:
+            try:
+                self._catalog = snapshot_from_dict(self._cached_catalog)
+            except (KeyError, TypeError, ValueError):
+                self._cached_catalog = None
+        if not selection or self._catalog is None:
             return
         index = int(selection[0])
-        table = self._table_refs[index]
-        try:
-            columns = self._with_connection(lambda conn: list_columns(conn, table))
-            self._render_columns(table.label, columns)
-            self._append_log(f"Loaded columns for {table.label}")
-        except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("Load Columns Failed", str(exc))
-            self._append_log(f"Load columns failed: {exc}")
+        table = self._catalog.tables[index]
+        self._render_table(table)
+        sortable = sortable_columns(table)
+        self.grid_sort_combo.configure(values=sortable)
+        self.grid_sort_var.set(sortable[0] if sortable else "")
+        self._grid = None
+        self.grid_status_var.set(f"{table.label}: press Load Rows to browse (about {table.row_estimate:,} rows).")
+
+    def _render_table(self, table: TableInfo) -> None:
+        from catalog import format_bytes
 
-    def _render_columns(self, table_label: str, columns: list[ColumnInfo]) -> None:
         self.schema_text.delete("1.0", tk.END)
-        self.schema_text.insert(tk.END, f"Table: {table_label}\n")
+        self.schema_text.insert(tk.END, f"Table: {table.label}\n")
+        self.schema_text.insert(
+            tk.END,
+            f"Rows (est.): {table.row_estimate:,}   Heap: {format_bytes(table.table_bytes)}   "
+            f"Indexes: {format_bytes(table.index_bytes)}   Total: {format_bytes(table.total_bytes)}\n",
+        )
         self.schema_text.insert(tk.END, "-" * 72 + "\n")
-        if not columns:
+        if not table.columns:
             self.schema_text.insert(tk.END, "No columns found.\n")
-            return
-        for col in columns:
+        for col in table.columns:
             nullable = "NULL" if col.is_nullable else "NOT NULL"
             default = col.default_value if col.default_value is not None else "-"
             line = f"{col.name:<30} {col.data_type:<20} {nullable:<10} default={default}\n"
             self.schema_text.insert(tk.END, line)
 
-    def _load_migrations(self):
+        if table.indexes:
+            self.schema_text.insert(tk.END, "\nIndexes\n" + "-" * 72 + "\n")
+            for index in table.indexes:
+                flag = "" if index.is_valid else "  [INVALID]"
+                self.schema_text.insert(tk.END, f"{index.name:<40} {format_bytes(index.size_bytes):>10}{flag}\n")
+                self.schema_text.insert(tk.END, f"    {index.definition}\n")
+
+        if table.constraints:
+            self.schema_text.insert(tk.END, "\nConstraints\n" + "-" * 72 + "\n")
+            for constraint in table.constraints:
+                self.schema_text.insert(tk.END, f"{constraint.name:<40} {constraint.kind_label}\n")
+                self.schema_text.insert(tk.END, f"    {constraint.definition}\n")
+
+    def _on_grid_load(self) -> None:
+        from grid import GridBrowser
+
+        try:
+            selection = self.tables_listbox.curselection()
+            if not selection or self._catalog is None:
+                raise ValueError("Select a table first.")
+            try:
+                page_size = int(self.grid_page_size_var.get().strip() or "0")
+            except ValueError:
+                raise ValueError("Page size must be a whole number.") from None
+            grid = GridBrowser(
+                self._catalog.tables[int(selection[0])],
+                sort_column=self.grid_sort_var.get().strip() or None,
+                descending=bool(self.grid_desc_var.get()),
+                where=self.grid_where_var.get().strip() or None,
+                page_size=page_size,
+            )
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Load Rows Failed", str(exc))
+            self._append_log(f"Load rows failed: {exc}")
+            return
+        self._grid = grid
+        self._fetch_grid(grid.first)
+
+    def _on_grid_next(self) -> None:
+        if self._grid is not None:
+            self._fetch_grid(self._grid.next)
+
+    def _on_grid_previous(self) -> None:
+        if self._grid is not None:
+            self._fetch_grid(self._grid.previous)
+
+    def _fetch_grid(self, action) -> None:
+        from dialects import dialect_for_url
+
+        if self._grid_job is not None and not self._grid_job.finished:
+            return
+        try:
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("The data grid")
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Load Rows Failed", str(exc))
+            self._append_log(f"Load rows failed: {exc}")
+            return
+        grid = self._grid
+
+        def on_success(page: GridPage) -> None:
+            if grid is self._grid:
+                self._render_grid(page)
+
+        self._grid_job = self._submit(
+            f"Browse {grid.table.label}",
+            lambda ctx: self._with_connection(db_url, ctx, action),
+            on_success=on_success,
+            error_title="Load Rows Failed",
+            error_prefix="Load rows failed",
+        )
+
+    def _render_grid(self, page: GridPage) -> None:
+        from grid import display_value
+
+        self.grid_tree.delete(*self.grid_tree.get_children())
+        self.grid_tree.configure(columns=page.columns)
+        for name in page.columns:
+            self.grid_tree.heading(name, text=name)
+            self.grid_tree.column(name, width=140, anchor=tk.W, stretch=False)
+        for row in page.rows:
+            self.grid_tree.insert("", tk.END, values=[display_value(value) for value in row])
+        self.grid_status_var.set(f"{self._grid.table.label}: {page.describe()}" if self._grid else page.describe())
+
+    def _on_run_advisor(self) -> None:
+        from advisor import advise
+        from catalog import cache as catalog_cache
+        from dialects import dialect_for_url
+
+        try:
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("The index advisor")
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Index Advisor Failed", str(exc))
+            self._append_log(f"Index advisor failed: {exc}")
+            return
+        concurrently = bool(self.online_var.get())
+
+        def on_success(report: AdvisorReport) -> None:
+            self._advisor_report = report
+            self._render_advisor(report)
+            self._append_log(report.describe())
+
+        self._submit(
+            "Index advisor",
+            lambda ctx: self._with_connection(
+                db_url,
+                ctx,
+                lambda conn: advise(conn, catalog_cache.load(conn, db_url), concurrently=concurrently),
+            ),
+            on_success=on_success,
+            error_title="Index Advisor Failed",
+            error_prefix="Index advisor failed",
+        )
+
+    def _render_advisor(self, report: AdvisorReport) -> None:
+        self.advisor_tree.delete(*self.advisor_tree.get_children())
+        for index, advice in enumerate(report.advice):
+            self.advisor_tree.insert(
+                "",
+                tk.END,
+                iid=str(index),
+                values=(advice.kind, advice.table.label, advice.index_name, advice.reason),
+            )
+        self._set_advisor_text("\n".join([report.describe(), *report.notes]))
+
+    def _on_advice_selected(self, _event=None) -> None:
+        selection = self.advisor_tree.selection()
+        if not selection or self._advisor_report is None:
+            return
+        advice: IndexAdvice = self._advisor_report.advice[int(selection[0])]
+        lines = [f"{advice.kind}: {advice.reason}", "", advice.up_sql, "", "-- down:", advice.down_sql]
+        if advice.queries:
+            lines += ["", "Statements:"] + [
+                f"{stat.calls:,} calls, {stat.mean_ms:.2f} ms avg: {stat.summary}" for stat in advice.queries
+            ]
+        self._set_advisor_text("\n".join(lines))
+
+    def _set_advisor_text(self, text: str) -> None:
+        self.advisor_text.configure(state=tk.NORMAL)
+        self.advisor_text.delete("1.0", tk.END)
+        self.advisor_text.insert(tk.END, text)
+        self.advisor_text.configure(state=tk.DISABLED)
+
+    def _on_write_advisor_migration(self) -> None:
+        from advisor import write_migration
+
+        try:
+            if self._advisor_report is None:
+                raise ValueError("Run the advisor first.")
+            up_path, down_path = write_migration(
+                self._advisor_report,
+                self._migrations_dir(),
+                include_unused=bool(self.advisor_unused_var.get()),
+            )
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Write Migration Failed", str(exc))
+            self._append_log(f"Write migration failed: {exc}")
+            return
+        self._append_log(f"Index advisor migration written: {up_path} and {down_path.name}. Review it before applying.")
+
+    def _on_schema_diff(self) -> None:
+        from catalog import cache as catalog_cache
+        from dialects import dialect_for_url
+        from schemadiff import build_expected_snapshot, diff_schema
+
+        try:
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("Schema diff")
+            migrations = self._load_migrations(db_url)
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Schema Diff Failed", str(exc))
+            self._append_log(f"Schema diff failed: {exc}")
+            return
+        refresh = bool(self.diff_rebuild_var.get())
+
+        def work(ctx: JobContext) -> SchemaDiff:
+            expected = build_expected_snapshot(
+                db_url, migrations, progress=ctx.progress, cancel_check=ctx.check_cancelled, refresh=refresh
+            )
+            actual = self._with_connection(db_url, ctx, lambda conn: catalog_cache.load(conn, db_url, refresh=True))
+            return diff_schema(expected, actual)
+
+        def on_success(diff: SchemaDiff) -> None:
+            self._schema_diff = diff
+            self._render_schema_diff(diff)
+            self._append_log(diff.describe())
+
+        self._submit(
+            "Schema diff",
+            work,
+            on_success=on_success,
+            error_title="Schema Diff Failed",
+            error_prefix="Schema diff failed",
+        )
+
+    def _render_schema_diff(self, diff: SchemaDiff) -> None:
+        self.diff_tree.delete(*self.diff_tree.get_children())
+        for item in diff.differences:
+            detail = f"{item.expected}  /  {item.actual}" if item.expected or item.actual else ""
+            self.diff_tree.insert("", tk.END, values=(item.status, item.object_type, item.table, item.name, detail))
+        self.diff_script_text.delete("1.0", tk.END)
+        self.diff_script_text.insert("1.0", diff.script())
+
+    def _on_save_diff_script(self) -> None:
+        from tkinter import filedialog
+
+        if self._schema_diff is None:
+            messagebox.showerror("Save Script Failed", "Run Compare With Migrations first.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Save Reconciling SQL",
+            defaultextension=".sql",
+            initialfile="reconcile_schema.sql",
+            filetypes=[("SQL files", "*.sql"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            Path(path).write_text(self.diff_script_text.get("1.0", tk.END), encoding="utf-8")
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Save Script Failed", str(exc))
+            self._append_log(f"Save script failed: {exc}")
+            return
+        self._append_log(f"Reconciling SQL saved: {path}")
+
+    def _on_open_diff_script(self) -> None:
+        if self._schema_diff is None:
+            messagebox.showerror("Open Script Failed", "Run Compare With Migrations first.")
+            return
+        self.sql_text.delete("1.0", tk.END)
+        self.sql_text.insert("1.0", self.diff_script_text.get("1.0", tk.END))
+        self._append_log("Reconciling SQL copied to the Custom SQL tab. Dry-run it before executing.")
+
+    def _on_sample_stats(self) -> None:
+        from dialects import dialect_for_url
+
+        try:
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("Table statistics")
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Sample Statistics Failed", str(exc))
+            self._append_log(f"Sample statistics failed: {exc}")
+            return
+        self._sample_stats(db_url)
+
+    def _auto_sample_stats(self) -> None:
+        if self.stats_auto_var.get() and not self._stats_pending:
+            db_url = self.db_url_var.get().strip()
+            if db_url and self._is_postgres(db_url):
+                self._sample_stats(db_url)
+        self.after(STATS_INTERVAL_MS, self._auto_sample_stats)
+
+    def _sample_stats(self, db_url: str) -> None:
+        if db_url != self._stats_url:
+            self._stats_sampler.clear()
+            self._stats_url = db_url
+        tables = WATCHED_TABLES if self.stats_watched_var.get() else None
+        self._stats_pending = True
+
+        def on_success(sample: StatsSample) -> None:
+            self._stats_pending = False
+            if db_url != self._stats_url:
+                return
+            self._stats_sampler.add(sample)
+            self._render_stats(sample)
+            self._append_log(
+                f"Statistics sampled: {len(sample.tables)} table(s), "
+                f"{self._stats_sampler.sample_count()} sample(s) in history."
+            )
+
+        def on_failure(_exc: BaseException) -> None:
+            self._stats_pending = False
+            self.stats_auto_var.set(False)
+
+        self._submit(
+            "Sample statistics",
+            lambda ctx: self._with_connection(db_url, ctx, lambda conn: sample_stats(conn, tables)),
+            on_success=on_success,
+            error_title="Sample Statistics Failed",
+            error_prefix="Sample statistics failed",
+            on_failure=on_failure,
+        )
+
+    def _render_stats(self, sample: StatsSample) -> None:
+        from catalog import format_bytes
+
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for label, table in sample.tables.items():
+            growth = self._stats_sampler.growth(label)
+            autovacuum = table.last_autovacuum.strftime("%Y-%m-%d %H:%M") if table.last_autovacuum else "never"
+            self.stats_tree.insert(
+                "",
+                tk.END,
+                values=(
+                    label,
+                    f"{max(table.row_estimate, table.live_rows):,}",
+                    format_bytes(table.heap_bytes),
+                    format_bytes(table.index_bytes),
+                    f"{table.dead_ratio * 100:.1f}",
+                    f"{table.seq_scan:,} / {table.idx_scan:,}",
+                    f"{growth.rows_per_hour:+,.0f}" if growth else "-",
+                    format_bytes(int(growth.bytes_per_hour)) if growth else "-",
+                    autovacuum,
+                ),
+            )
+
+        self.index_stats_tree.delete(*self.index_stats_tree.get_children())
+        for index in sorted(sample.indexes, key=lambda item: (not item.is_unused, -item.size_bytes)):
+            note = "unused" if index.is_unused else ("primary key" if index.is_primary else "")
+            self.index_stats_tree.insert(
+                "",
+                tk.END,
+                values=(index.table_label, index.name, f"{index.idx_scan:,}", format_bytes(index.size_bytes), note),
+            )
+
+    def _load_migrations(self, db_url: str):
+        from dialects import dialect_for_url
+        from migrations import discover_migrations
+
         migrations_dir = self._migrations_dir()
         if not Path(migrations_dir).exists():
             raise ValueError(f"Migrations directory does not exist: {migrations_dir}")
-        migrations = discover_migrations(migrations_dir)
+        dialect = dialect_for_url(db_url)
+        migrations = discover_migrations(migrations_dir, dialect)
         if not migrations:
-            raise ValueError(f"No .sql migration files found in: {migrations_dir}")
+            raise ValueError(f"No .sql migration files found in: {dialect.migrations_dir(migrations_dir)}")
         return migrations
 
     def _on_preview_pending(self) -> None:
+        from migrations import check_drift, preview_pending_sql
+
         try:
-            migrations = self._load_migrations()
-            preview = self._with_connection(lambda conn: preview_pending_sql(conn, migrations))
+            db_url = self._validate_db_url()
+            migrations = self._load_migrations(db_url)
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Preview Failed", str(exc))
+            self._append_log(f"Preview failed: {exc}")
+            return
+
+        def on_success(result) -> None:
+            drift, preview = result
             self.preview_text.delete("1.0", tk.END)
+            if not drift.ok:
+                self.preview_text.insert(tk.END, self._drift_text(drift) + "\n")
             self.preview_text.insert(tk.END, preview)
             self._append_log(f"Pending migration preview loaded ({len(migrations)} migrations discovered).")
+            if not drift.ok:
+                self._append_log(drift.describe())
+
+        self._submit(
+            "Preview pending SQL",
+            lambda ctx: self._with_connection(
+                db_url, ctx, lambda conn: (check_drift(conn, migrations), preview_pending_sql(conn, migrations))
+            ),
+            on_success=on_success,
+            error_title="Preview Failed",
+            error_prefix="Preview failed",
+        )
+
+    def _drift_text(self, report: DriftReport) -> str:
+        lines = [f"-- {report.describe()}"]
+        for entry in report.problems:
+            current = entry.current_checksum[:12] if entry.current_checksum else "file not found"
+            lines.append(f"-- {entry.status.upper()}: {entry.name} (recorded {entry.recorded_checksum[:12]}, on disk {current})")
+        lines.append("-- Apply Pending is blocked until the files match the migration history.")
+        return "\n".join(lines) + "\n"
+
+    def _on_check_drift(self) -> None:
+        from migrations import check_drift
+
+        try:
+            db_url = self._validate_db_url()
+            migrations = self._load_migrations(db_url)
         except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("Preview Failed", str(exc))
-            self._append_log(f"Preview failed: {exc}")
+            messagebox.showerror("Drift Check Failed", str(exc))
+            self._append_log(f"Drift check failed: {exc}")
+            return
 
-    def _run_apply_pending(self, dry_run: bool) -> None:
-        migrations = self._load_migrations()
-        names = self._with_connection(lambda conn: apply_pending(conn, migrations, dry_run=dry_run))
-        if dry_run:
-            self._append_log(
-                f"Dry-run pending complete. Would apply: {len(names)} migration(s): {', '.join(names) if names else '(none)'}"
-            )
-        else:
-            self._append_log(
-                f"Applied pending migrations: {len(names)} migration(s): {', '.join(names) if names else '(none)'}"
+        def on_success(report: DriftReport) -> None:
+            self._append_log(f"{report.describe()} ({report.elapsed_seconds * 1000:.0f} ms)")
+            if not report.ok:
+                self.preview_text.delete("1.0", tk.END)
+                self.preview_text.insert(tk.END, self._drift_text(report))
+                messagebox.showwarning("Migration Drift", report.describe())
+
+        self._submit(
+            "Check drift",
+            lambda ctx: self._with_connection(db_url, ctx, lambda conn: check_drift(conn, migrations)),
+            on_success=on_success,
+            error_title="Drift Check Failed",
+            error_prefix="Drift check failed",
+        )
+
+    def _run_apply_pending(self, dry_run: bool, error_title: str, error_prefix: str) -> None:
+        from migrations import apply_pending
+
+        try:
+            db_url = self._validate_db_url()
+            migrations = self._load_migrations(db_url)
+            options = self._apply_options()
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror(error_title, str(exc))
+            self._append_log(f"{error_prefix}: {exc}")
+            return
+        if self._is_postgres(db_url):
+            self._start_lock_monitor(db_url)
+
+        def work(ctx: JobContext):
+            return self._with_connection(
+                db_url,
+                ctx,
+                self._monitored(
+                    db_url,
+                    lambda conn, monitor: apply_pending(
+                        conn,
+                        migrations,
+                        dry_run=dry_run,
+                        progress=ctx.progress,
+                        options=options,
+                        cancel_check=ctx.check_cancelled,
+                        monitor=monitor,
+                    ),
+                ),
+                reset=True,
             )
 
+        def on_failure(_exc: BaseException) -> None:
+            if options.online and not dry_run:
+                self._invalidate_catalog(db_url)
+
+        def on_success(names) -> None:
+            if not dry_run:
+                self._invalidate_catalog(db_url)
+            if dry_run:
+                self._append_log(
+                    f"Dry-run pending complete. Would apply: {len(names)} migration(s): {', '.join(names) if names else '(none)'}"
+                )
+            else:
+                self._append_log(
+                    f"Applied pending migrations: {len(names)} migration(s): {', '.join(names) if names else '(none)'}"
+                )
+
+        self._submit(
+            "Dry-run pending" if dry_run else "Apply pending",
+            work,
+            on_success=on_success,
+            error_title=error_title,
+            error_prefix=error_prefix,
+            on_failure=on_failure,
+        )
+
     def _on_apply_pending(self) -> None:
         if not messagebox.askyesno("Apply Pending Migrations", "Apply all pending migrations to the connected database?"):
             return
-        try:
-            self._run_apply_pending(dry_run=False)
-        except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("Apply Pending Failed", str(exc))
-            self._append_log(f"Apply pending failed: {exc}")
+        self._run_apply_pending(dry_run=False, error_title="Apply Pending Failed", error_prefix="Apply pending failed")
 
     def _on_dry_run_pending(self) -> None:
+        self._run_apply_pending(dry_run=True, error_title="Dry-Run Pending Failed", error_prefix="Dry-run pending failed")
+
+    def _run_rollback_last(self, dry_run: bool, error_title: str, error_prefix: str) -> None:
+        from migrations import rollback_last
+
         try:
-            self._run_apply_pending(dry_run=True)
+            db_url = self._validate_db_url()
+            migrations = self._load_migrations(db_url)
         except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("Dry-Run Pending Failed", str(exc))
-            self._append_log(f"Dry-run pending failed: {exc}")
-
-    def _run_rollback_last(self, dry_run: bool) -> None:
-        migrations = self._load_migrations()
-        name = self._with_connection(lambda conn: rollback_last(conn, migrations, dry_run=dry_run))
-        if dry_run:
-            self._append_log(f"Dry-run rollback complete. Would rollback: {name}")
-        else:
-            self._append_log(f"Rolled back migration: {name}")
+            messagebox.showerror(error_title, str(exc))
+            self._append_log(f"{error_prefix}: {exc}")
+            return
+        if self._is_postgres(db_url):
+            self._start_lock_monitor(db_url)
+
+        def work(ctx: JobContext):
+            return self._with_connection(
+                db_url,
+                ctx,
+                self._monitored(
+                    db_url,
+                    lambda conn, monitor: rollback_last(
+                        conn,
+                        migrations,
+                        dry_run=dry_run,
+                        progress=ctx.progress,
+                        cancel_check=ctx.check_cancelled,
+                        monitor=monitor,
+                    ),
+                ),
+                reset=True,
+            )
+
+        def on_success(name: str) -> None:
+            if not dry_run:
+                self._invalidate_catalog(db_url)
+            if dry_run:
+                self._append_log(f"Dry-run rollback complete. Would rollback: {name}")
+            else:
+                self._append_log(f"Rolled back migration: {name}")
+
+        self._submit(
+            "Dry-run rollback" if dry_run else "Rollback last",
+            work,
+            on_success=on_success,
+            error_title=error_title,
+            error_prefix=error_prefix,
+        )
 
     def _on_rollback_last(self) -> None:
         if not messagebox.askyesno(
@@ -269,44 +1534,903 @@ class SchemaAdminApp(tk.Tk):
             "Rollback the latest applied migration?\nRequires a matching *.down.sql file.",
         ):
             return
+        self._run_rollback_last(dry_run=False, error_title="Rollback Failed", error_prefix="Rollback failed")
+
+    def _on_dry_run_rollback(self) -> None:
+        self._run_rollback_last(dry_run=True, error_title="Dry-Run Rollback Failed", error_prefix="Dry-run rollback failed")
+
+    def _start_lock_monitor(self, db_url: str) -> None:
+        from locks import LockMonitor
+
+        monitor = self._lock_monitor
+        if monitor is not None and monitor.db_url == db_url and monitor.running:
+            return
+        self._stop_lock_monitor()
+        self._lock_monitor = LockMonitor(db_url)
+        self._lock_monitor.start()
+        self._lock_warned = False
+        self.locks_status_var.set("Lock monitor starting...")
+        self._append_log(f"Lock monitor started for {redact_url(db_url)}.")
+
+    def _stop_lock_monitor(self) -> None:
+        monitor = self._lock_monitor
+        self._lock_monitor = None
+        if monitor is not None:
+            monitor.stop()
+
+    def _on_start_lock_monitor(self) -> None:
+        from dialects import dialect_for_url
+
         try:
-            self._run_rollback_last(dry_run=False)
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("The lock monitor")
         except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("Rollback Failed", str(exc))
-            self._append_log(f"Rollback failed: {exc}")
+            messagebox.showerror("Lock Monitor Failed", str(exc))
+            self._append_log(f"Lock monitor failed: {exc}")
+            return
+        self._start_lock_monitor(db_url)
+
+    def _on_stop_lock_monitor(self) -> None:
+        if self._lock_monitor is None:
+            return
+        self._stop_lock_monitor()
+        self.locks_status_var.set("Lock monitor stopped.")
+        self._append_log("Lock monitor stopped.")
+
+    def _monitored_jobs(self, db_url: str):
+        return [job for job in self._jobs.jobs() if not job.finished and job.db_url == db_url and job.backend_pids]
+
+    def _refresh_locks(self) -> None:
+        monitor = self._lock_monitor
+        if monitor is not None:
+            monitor.watch([pid for job in self._monitored_jobs(monitor.db_url) for pid in job.backend_pids])
+            snapshot, error = monitor.latest()
+            if error is not None:
+                self._stop_lock_monitor()
+                self.locks_status_var.set(f"Lock monitor stopped: {error}")
+                self._append_log(f"Lock monitor failed: {error}")
+            elif snapshot is not None:
+                self._render_locks(snapshot)
+        self.after(LOCK_REFRESH_MS, self._refresh_locks)
+
+    def _render_locks(self, snapshot: LockSnapshot) -> None:
+        from locks import LOCK_WARN_SECONDS
+
+        blocked = snapshot.blocked_by_watched()
+        blocked_pids = {backend.pid for backend in blocked}
+        self.locks_tree.delete(*self.locks_tree.get_children())
+        for backend in snapshot.backends:
+            waiting = f"{backend.lock_mode} on {backend.lock_target}" if backend.lock_mode else backend.wait_event
+            warn = backend.pid in blocked_pids and backend.running_seconds >= LOCK_WARN_SECONDS
+            self.locks_tree.insert(
+                "",
+                tk.END,
+                values=(
+                    backend.pid,
+                    snapshot.role(backend, blocked_pids),
+                    backend.application or "-",
+                    f"{backend.user}@{backend.client}",
+                    f"{backend.running_seconds:.1f}s",
+                    waiting or "-",
+                    ", ".join(str(pid) for pid in backend.blocked_by) or "-",
+                    backend.query,
+                ),
+                tags=("warn",) if warn else (),
+            )
+
+        captured = time.strftime("%H:%M:%S", time.localtime(snapshot.captured_at))
+        if not blocked:
+            self.locks_status_var.set(
+                f"{captured}: {len(snapshot.watched)} job backend(s) watched, no sessions blocked by schema-admin jobs."
+            )
+            self._lock_warned = False
+            return
+        others = sum(1 for backend in blocked if not backend.is_schema_admin)
+        summary = (
+            f"{captured}: {len(blocked)} session(s) blocked by schema-admin jobs "
+            f"({others} from other applications), longest wait {snapshot.longest_wait:.1f}s."
+        )
+        self.locks_status_var.set(summary)
+        if snapshot.longest_wait >= LOCK_WARN_SECONDS and not self._lock_warned:
+            self._lock_warned = True
+            self._append_log(f"Lock monitor: {summary} Use Abort Blocking Jobs on the Locks tab to release them.")
+
+    def _on_abort_blocking_jobs(self) -> None:
+        jobs = []
+        monitor = self._lock_monitor
+        snapshot = monitor.latest()[0] if monitor is not None else None
+        if snapshot is not None:
+            blockers = snapshot.blocking_pids()
+            jobs = [job for job in self._monitored_jobs(monitor.db_url) if blockers.intersection(job.backend_pids)]
+        if not jobs:
+            messagebox.showinfo("Abort Blocking Jobs", "No running schema-admin job is blocking other sessions.")
+            return
+        labels = "\n".join(f"#{job.id} {job.label}" for job in jobs)
+        if not messagebox.askyesno("Abort Blocking Jobs", f"Cancel these jobs and roll back their work?\n{labels}"):
+            return
+        for job in jobs:
+            if self._jobs.cancel(job.id):
+                self._append_log(f"Cancel requested for job #{job.id} ({job.label}); it was blocking other sessions.")
+
+    def _run_custom_sql(self, dry_run: bool, error_title: str, error_prefix: str) -> None:
+        from db import execute_script
+        from dialects import dialect_for_url, dialect_of
 
-    def _on_dry_run_rollback(self) -> None:
         try:
-            self._run_rollback_last(dry_run=True)
+            db_url = self._validate_db_url()
+            sql = self.sql_text.get("1.0", tk.END).strip()
+            if not sql:
+                raise ValueError("Custom SQL is empty.")
+            dialect = dialect_for_url(db_url)
+            if dry_run and not dialect.transactional_ddl:
+                implicit = [statement for statement in split_statements(sql) if causes_implicit_commit(statement)]
+                if implicit:
+                    raise ValueError(
+                        f"Dry-run is not available: {dialect.label} commits DDL implicitly "
+                        f"(line {implicit[0].line}: {implicit[0].summary})."
+                    )
         except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("Dry-Run Rollback Failed", str(exc))
-            self._append_log(f"Dry-run rollback failed: {exc}")
-
-    def _run_custom_sql(self, dry_run: bool) -> None:
-        sql = self.sql_text.get("1.0", tk.END).strip()
-        if not sql:
-            raise ValueError("Custom SQL is empty.")
-        self._with_connection(lambda conn: execute_script(conn, sql, dry_run=dry_run))
-        if dry_run:
-            self._append_log("Custom SQL dry-run succeeded (transaction rolled back).")
-        else:
-            self._append_log("Custom SQL executed and committed.")
+            messagebox.showerror(error_title, str(exc))
+            self._append_log(f"{error_prefix}: {exc}")
+            return
+
+        def on_success(timings) -> None:
+            if not dry_run:
+                self._invalidate_catalog(db_url)
+            total = sum(timing.seconds for timing in timings)
+            if dry_run:
+                self._append_log(
+                    f"Custom SQL dry-run succeeded: {len(timings)} statement(s) in {total:.3f}s (transaction rolled back)."
+                )
+            else:
+                self._append_log(f"Custom SQL executed and committed: {len(timings)} statement(s) in {total:.3f}s.")
+
+        self._submit(
+            "Dry-run SQL" if dry_run else "Execute SQL",
+            lambda ctx: self._with_connection(
+                db_url,
+                ctx,
+                self._monitored(
+                    db_url,
+                    lambda conn, monitor: execute_script(
+                        conn,
+                        sql,
+                        dry_run=dry_run,
+                        progress=ctx.progress,
+                        cancel_check=ctx.check_cancelled,
+                        monitor=monitor,
+                        errors=dialect_of(conn).errors,
+                    ),
+                ),
+                reset=True,
+            ),
+            on_success=on_success,
+            error_title=error_title,
+            error_prefix=error_prefix,
+        )
 
     def _on_execute_sql(self) -> None:
         if not messagebox.askyesno("Execute SQL", "Execute custom SQL and COMMIT changes?"):
             return
+        self._run_custom_sql(dry_run=False, error_title="Execute SQL Failed", error_prefix="Execute SQL failed")
+
+    def _on_dry_run_sql(self) -> None:
+        self._run_custom_sql(dry_run=True, error_title="Dry-Run SQL Failed", error_prefix="Dry-run SQL failed")
+
+    def _on_profile_query(self) -> None:
+        from dialects import dialect_for_url
+        from profiler import profile_script
+        from profiler import cache as plan_cache
+
+        try:
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("The query profiler")
+            sql = self.profile_text.get("1.0", tk.END).strip()
+            if not sql:
+                raise ValueError("Query is empty.")
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Profile Failed", str(exc))
+            self._append_log(f"Profile failed: {exc}")
+            return
+
+        def on_success(plan: QueryPlan) -> None:
+            plan_cache.add(db_url, plan)
+            self._render_plan(plan, plan_cache.history(db_url, plan.query))
+            self._append_log(f"Profiled query: {plan.summary()} (transaction rolled back).")
+
+        self._submit(
+            "Profile query",
+            lambda ctx: self._with_connection(
+                db_url,
+                ctx,
+                self._monitored(
+                    db_url,
+                    lambda conn, monitor: profile_script(
+                        conn, sql, progress=ctx.progress, cancel_check=ctx.check_cancelled, monitor=monitor
+                    ),
+                ),
+                reset=True,
+            ),
+            on_success=on_success,
+            error_title="Profile Failed",
+            error_prefix="Profile failed",
+        )
+
+    def _render_plan(self, plan: QueryPlan, history) -> None:
+        from profiler import HOT_NODE_LIMIT, compare_plans
+
+        self.plan_tree.delete(*self.plan_tree.get_children())
+        hot = {id(node) for node in plan.hot_nodes()}
+
+        def insert(parent: str, node: PlanNode) -> None:
+            item = self.plan_tree.insert(
+                parent,
+                tk.END,
+                text=node.label,
+                open=True,
+                tags=("hot",) if id(node) in hot else (),
+                values=(
+                    f"{node.total_ms:.3f}",
+                    f"{node.self_ms:.3f}",
+                    f"{plan.share(node) * 100:.0f}%",
+                    f"{node.actual_rows:,}",
+                    f"{node.plan_rows:,}",
+                    node.loops,
+                    f"{node.shared_hit:,}/{node.shared_read:,}",
+                    node.detail,
+                ),
+            )
+            for child in node.children:
+                insert(item, child)
+
+        insert("", plan.root)
+
+        lines = [plan.summary()]
+        lines += [f"Hot: {node.label} ({plan.share(node) * 100:.0f}% of time)" for node in plan.hot_nodes(HOT_NODE_LIMIT)]
+        if len(history) >= 2:
+            lines.append("")
+            lines.append(f"Compared with the previous run of this query ({len(history)} cached):")
+            lines += compare_plans(history[-2], history[-1])
+        self.profile_summary_text.configure(state=tk.NORMAL)
+        self.profile_summary_text.delete("1.0", tk.END)
+        self.profile_summary_text.insert(tk.END, "\n".join(lines))
+        self.profile_summary_text.configure(state=tk.DISABLED)
+
+    def _on_clear_plan_cache(self) -> None:
+        from profiler import cache as plan_cache
+
+        plan_cache.invalidate()
+        self._append_log("Plan cache cleared.")
+
+    def _run_backfill(self, dry_run: bool, error_title: str, error_prefix: str) -> None:
+        from dialects import dialect_for_url
+        from migrations import run_backfill
+
         try:
-            self._run_custom_sql(dry_run=False)
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("Backfills")
+            spec = self._backfill_spec()
         except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("Execute SQL Failed", str(exc))
-            self._append_log(f"Execute SQL failed: {exc}")
+            messagebox.showerror(error_title, str(exc))
+            self._append_log(f"{error_prefix}: {exc}")
+            return
+        restart = bool(self.backfill_restart_var.get())
+
+        def work(ctx: JobContext):
+            return self._with_connection(
+                db_url,
+                ctx,
+                lambda conn: run_backfill(
+                    conn,
+                    spec,
+                    dry_run=dry_run,
+                    restart=restart,
+                    progress=ctx.progress,
+                    cancel_check=ctx.check_cancelled,
+                ),
+                reset=True,
+            )
+
+        def on_success(_result: BackfillProgress) -> None:
+            if not dry_run:
+                self.backfill_restart_var.set(False)
+            self._load_backfills(db_url)
+
+        def on_failure(_exc: BaseException) -> None:
+            self._load_backfills(db_url)
+
+        self._submit(
+            f"Dry-run backfill {spec.name}" if dry_run else f"Backfill {spec.name}",
+            work,
+            on_success=on_success,
+            error_title=error_title,
+            error_prefix=error_prefix,
+            on_failure=on_failure,
+        )
+
+    def _on_run_backfill(self) -> None:
+        if not messagebox.askyesno(
+            "Run Backfill",
+            "Run the backfill in committed batches?\nIt resumes from its last checkpoint unless restart is ticked.",
+        ):
+            return
+        self._run_backfill(dry_run=False, error_title="Backfill Failed", error_prefix="Backfill failed")
+
+    def _on_dry_run_backfill(self) -> None:
+        self._run_backfill(dry_run=True, error_title="Dry-Run Backfill Failed", error_prefix="Dry-run backfill failed")
+
+    def _on_refresh_backfills(self) -> None:
+        from dialects import dialect_for_url
+
+        try:
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("Backfills")
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Backfill Checkpoints Failed", str(exc))
+            self._append_log(f"Backfill checkpoints failed: {exc}")
+            return
+        self._load_backfills(db_url)
+
+    def _load_backfills(self, db_url: str) -> None:
+        from migrations import list_backfills
+
+        def on_success(items) -> None:
+            self._render_backfills(items)
+            self._append_log(f"Backfill checkpoints loaded: {len(items)} backfill(s).")
+
+        self._submit(
+            "Load backfill checkpoints",
+            lambda ctx: self._with_connection(db_url, ctx, list_backfills),
+            on_success=on_success,
+            error_title="Backfill Checkpoints Failed",
+            error_prefix="Backfill checkpoints failed",
+        )
+
+    def _render_backfills(self, items) -> None:
+        self.backfill_tree.delete(*self.backfill_tree.get_children())
+        for item in items:
+            self.backfill_tree.insert(
+                "",
+                tk.END,
+                iid=item.name,
+                values=(
+                    item.name,
+                    item.table_name,
+                    f"{item.rows_done:,}",
+                    f"{item.batches:,}",
+                    f"{item.rows_per_second:,.0f}",
+                    item.last_key or "",
+                    "completed" if item.completed else "in progress",
+                ),
+            )
+
+    def _on_backfill_selected(self, _event=None) -> None:
+        selection = self.backfill_tree.selection()
+        if not selection:
+            return
+        values = self.backfill_tree.item(selection[0], "values")
+        self.backfill_name_var.set(values[0])
+        self.backfill_table_var.set(values[1])
+
+    def _render_targets(self) -> None:
+        self.fleet_tree.delete(*self.fleet_tree.get_children())
+        for target in self._targets:
+            self.fleet_tree.insert(
+                "",
+                tk.END,
+                iid=target.name,
+                values=(target.name, redact_url(target.db_url), "yes" if target.enabled else "no", "", "", "", ""),
+            )
+
+    def _render_target_result(self, result: TargetResult) -> None:
+        iid = result.target.name
+        if not self.fleet_tree.exists(iid):
+            return
+        self.fleet_tree.item(
+            iid,
+            values=(
+                result.target.name,
+                redact_url(result.target.db_url),
+                "yes" if result.target.enabled else "no",
+                result.status,
+                len(result.migrations),
+                f"{result.elapsed_seconds:.1f}s",
+                result.detail,
+            ),
+        )
+
+    def _selected_target(self) -> Target | None:
+        selection = self.fleet_tree.selection()
+        if not selection:
+            return None
+        return next((target for target in self._targets if target.name == selection[0]), None)
+
+    def _on_target_selected(self, _event=None) -> None:
+        target = self._selected_target()
+        if target is not None:
+            self.target_name_var.set(target.name)
+            self.target_url_var.set(target.db_url)
+
+    def _on_add_target(self) -> None:
+        name = self.target_name_var.get().strip()
+        db_url = self.target_url_var.get().strip()
+        if not name or not db_url:
+            messagebox.showerror("Add Target Failed", "Target name and database URL are required.")
+            return
+        existing = next((target for target in self._targets if target.name == name), None)
+        if existing is None:
+            self._targets.append(Target(name=name, db_url=db_url))
+            self._append_log(f"Fleet target added: {name}")
+        else:
+            existing.db_url = db_url
+            self._append_log(f"Fleet target updated: {name}")
+        self._render_targets()
+
+    def _on_remove_target(self) -> None:
+        target = self._selected_target()
+        if target is None:
+            return
+        self._targets.remove(target)
+        self._render_targets()
+        self._append_log(f"Fleet target removed: {target.name}")
+
+    def _on_toggle_target(self) -> None:
+        target = self._selected_target()
+        if target is None:
+            return
+        target.enabled = not target.enabled
+        self._render_targets()
+        self._append_log(f"Fleet target {'enabled' if target.enabled else 'disabled'}: {target.name}")
+
+    def _fleet_workers(self) -> int:
+        try:
+            workers = int(self.fleet_workers_var.get().strip() or "0")
+        except ValueError:
+            raise ValueError("Workers must be a whole number.") from None
+        if workers < 1:
+            raise ValueError("Workers must be at least 1.")
+        return workers
+
+    def _run_fleet(self, operation: str, error_title: str, error_prefix: str) -> None:
+        from catalog import cache as catalog_cache
+        from dialects import dialect_for_url
+        from fleet import OP_APPLY, FleetRun
+
+        try:
+            targets = [target for target in self._targets if target.enabled]
+            if not targets:
+                raise ValueError("No enabled fleet targets.")
+            if self._fleet_job is not None and not self._fleet_job.finished:
+                raise ValueError("A fleet run is already in progress.")
+            for target in targets:
+                dialect_for_url(target.db_url).require(f"Fleet rollout ({target.name})")
+            migrations = self._load_migrations(targets[0].db_url)
+            options = self._apply_options()
+            workers = self._fleet_workers()
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror(error_title, str(exc))
+            self._append_log(f"{error_prefix}: {exc}")
+            return
+
+        self._render_targets()
+
+        def work(ctx: JobContext) -> FleetSummary:
+            fleet = FleetRun(
+                targets,
+                operation,
+                migrations,
+                options=options,
+                max_workers=workers,
+                fail_fast=bool(self.fleet_fail_fast_var.get()),
+                progress=ctx.progress,
+                on_result=lambda result: ctx.post(lambda: self._render_target_result(result)),
+            )
+            ctx.on_cancel(fleet.cancel)
+            return fleet.run()
+
+        def on_success(summary: FleetSummary) -> None:
+            if operation == OP_APPLY:
+                catalog_cache.invalidate()
+            self._append_log(summary.table())
+            if not summary.ok:
+                messagebox.showerror(error_title, summary.headline())
+
+        self._fleet_job = self._submit(
+            f"Fleet {operation} ({len(targets)} targets)",
+            work,
+            on_success=on_success,
+            error_title=error_title,
+            error_prefix=error_prefix,
+        )
+
+    def _on_fleet_pending(self) -> None:
+        from fleet import OP_PENDING
+
+        self._run_fleet(OP_PENDING, error_title="Fleet Pending Check Failed", error_prefix="Fleet pending check failed")
+
+    def _on_fleet_dry_run(self) -> None:
+        from fleet import OP_DRY_RUN
+
+        self._run_fleet(OP_DRY_RUN, error_title="Fleet Dry-Run Failed", error_prefix="Fleet dry-run failed")
+
+    def _on_fleet_drift(self) -> None:
+        from fleet import OP_DRIFT
+
+        self._run_fleet(OP_DRIFT, error_title="Fleet Drift Check Failed", error_prefix="Fleet drift check failed")
+
+    def _on_fleet_apply(self) -> None:
+        from fleet import OP_APPLY
+
+        enabled = sum(1 for target in self._targets if target.enabled)
+        if not messagebox.askyesno(
+            "Apply Pending on Fleet",
+            f"Apply all pending migrations to {enabled} enabled target database(s)?",
+        ):
+            return
+        self._run_fleet(OP_APPLY, error_title="Fleet Apply Failed", error_prefix="Fleet apply failed")
+
+    def _on_add_transfer_table(self) -> None:
+        selection = self.tables_listbox.curselection()
+        if not selection or self._catalog is None:
+            return
+        label = self._catalog.tables[int(selection[0])].label
+        current = [item.strip() for item in self.transfer_tables_var.get().split(",") if item.strip()]
+        if label not in current:
+            self.transfer_tables_var.set(", ".join(current + [label]))
+
+    def _on_browse_transfer_dir(self) -> None:
+        from tkinter import filedialog
+
+        selected = filedialog.askdirectory(initialdir=self.transfer_dir_var.get() or ".")
+        if selected:
+            self.transfer_dir_var.set(selected)
+            self._append_log(f"Export directory set: {selected}")
+
+    def _transfer_workers(self) -> int:
+        try:
+            workers = int(self.transfer_workers_var.get().strip() or "0")
+        except ValueError:
+            raise ValueError("Workers must be a whole number.") from None
+        if workers < 1:
+            raise ValueError("Workers must be at least 1.")
+        return workers
+
+    def _render_transfer_result(self, result: TransferResult) -> None:
+        from catalog import format_bytes
+
+        self.transfer_tree.insert(
+            "",
+            tk.END,
+            values=(
+                result.table.label,
+                result.direction,
+                f"{result.rows:,}" if result.ok else "",
+                format_bytes(result.bytes) if result.ok else "",
+                f"{result.seconds:.1f}s" if result.ok else "",
+                result.path if result.ok else result.error,
+            ),
+        )
+
+    def _run_transfer(self, db_url: str, specs, exam_session_id: str | None, label: str, error_title: str) -> None:
+        from db import IMPORT, TransferRun
+
+        try:
+            workers = self._transfer_workers()
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror(error_title, str(exc))
+            self._append_log(f"{label} failed: {exc}")
+            return
+
+        def work(ctx: JobContext):
+            transfer = TransferRun(
+                db_url,
+                specs,
+                max_workers=workers,
+                exam_session_id=exam_session_id,
+                progress=ctx.progress,
+                on_result=lambda result: ctx.post(lambda: self._render_transfer_result(result)),
+            )
+            ctx.on_cancel(transfer.cancel)
+            return transfer.run()
+
+        def on_success(results) -> None:
+            failed = [result for result in results if not result.ok]
+            total = sum(result.rows for result in results)
+            self._append_log(f"{label}: {len(results) - len(failed)} of {len(results)} table(s), {total:,} rows.")
+            if any(result.direction == IMPORT for result in results):
+                self._invalidate_catalog(db_url)
+            if failed:
+                messagebox.showerror(error_title, "\n".join(result.describe() for result in failed))
+
+        self._submit(f"{label} ({len(specs)} tables)", work, on_success=on_success, error_title=error_title)
+
+    def _on_export_tables(self) -> None:
+        from db import EXPORT, TransferSpec, export_path, parse_table
+        from dialects import dialect_for_url
+
+        try:
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("Export")
+            tables = [parse_table(item) for item in self.transfer_tables_var.get().split(",") if item.strip()]
+            if not tables:
+                raise ValueError("Enter at least one table to export.")
+            directory = self.transfer_dir_var.get().strip()
+            if not directory:
+                raise ValueError("Choose an export directory.")
+            file_format = self.transfer_format_var.get().strip() or TRANSFER_FORMATS[0]
+            exam_session_id = self.transfer_session_var.get().strip() or None
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Export Failed", str(exc))
+            self._append_log(f"Export failed: {exc}")
+            return
+        where = self.transfer_where_var.get().strip() or None
+        specs = [
+            TransferSpec(table, str(export_path(directory, table, file_format, exam_session_id)), EXPORT, file_format, where)
+            for table in tables
+        ]
+        self._run_transfer(db_url, specs, exam_session_id, "Export", "Export Failed")
+
+    def _on_import_files(self) -> None:
+        from tkinter import filedialog
+
+        from db import IMPORT, TransferSpec, table_for_path
+        from dialects import dialect_for_url
+
+        try:
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("Import")
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Import Failed", str(exc))
+            self._append_log(f"Import failed: {exc}")
+            return
+        paths = filedialog.askopenfilenames(
+            initialdir=self.transfer_dir_var.get() or ".",
+            filetypes=[("Table exports", "*.csv *.csv.gz *.parquet"), ("All files", "*.*")],
+        )
+        if not paths:
+            return
+        try:
+            specs = [
+                TransferSpec(table_for_path(path), path, IMPORT, truncate=bool(self.transfer_truncate_var.get()))
+                for path in paths
+            ]
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Import Failed", str(exc))
+            self._append_log(f"Import failed: {exc}")
+            return
+        truncate = " after truncating them" if self.transfer_truncate_var.get() else ""
+        if not messagebox.askyesno(
+            "Import Files",
+            f"Import {len(specs)} file(s) into {', '.join(spec.table.label for spec in specs)}{truncate}?\n"
+            "Each file is loaded in its own transaction.",
+        ):
+            return
+        self._run_transfer(db_url, specs, None, "Import", "Import Failed")
+
+    def _render_retention_policies(self) -> None:
+        self.retention_tree.delete(*self.retention_tree.get_children())
+        for policy in self._retention_policies:
+            self.retention_tree.insert(
+                "",
+                tk.END,
+                iid=policy.table,
+                values=(
+                    policy.table,
+                    f"{policy.max_age_days}d",
+                    policy.destination,
+                    f"{policy.batch_size:,}",
+                    "yes" if policy.enabled else "no",
+                    "",
+                ),
+            )
+
+    def _render_retention_result(self, result: RetentionResult) -> None:
+        policy = next((item for item in self._retention_policies if item.table == result.table), None)
+        if policy is None or not self.retention_tree.exists(policy.table):
+            return
+        self.retention_tree.item(
+            policy.table,
+            values=(
+                policy.table,
+                f"{policy.max_age_days}d",
+                policy.destination,
+                f"{policy.batch_size:,}",
+                "yes" if policy.enabled else "no",
+                result.describe(),
+            ),
+        )
+
+    def _selected_retention_policy(self) -> RetentionPolicy | None:
+        selection = self.retention_tree.selection()
+        if not selection:
+            return None
+        return next((policy for policy in self._retention_policies if policy.table == selection[0]), None)
+
+    def _on_retention_policy_selected(self, _event=None) -> None:
+        policy = self._selected_retention_policy()
+        if policy is not None:
+            self.retention_table_var.set(policy.table)
+            self.retention_days_var.set(str(policy.max_age_days))
+            self.retention_destination_var.set(policy.destination)
+            self.retention_batch_var.set(str(policy.batch_size))
+
+    def _on_add_retention_policy(self) -> None:
+        table = self.retention_table_var.get().strip()
+        try:
+            if not table:
+                raise ValueError("Retention table is required.")
+            try:
+                max_age_days = int(self.retention_days_var.get().strip() or "0")
+                batch_size = int(self.retention_batch_var.get().strip() or "0")
+            except ValueError:
+                raise ValueError("Max age and batch size must be whole numbers.") from None
+            if max_age_days < 1 or batch_size < 1:
+                raise ValueError("Max age and batch size must be at least 1.")
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Add Retention Policy Failed", str(exc))
+            return
+        destination = self.retention_destination_var.get().strip() or DESTINATIONS[0]
+        existing = next((policy for policy in self._retention_policies if policy.table == table), None)
+        if existing is None:
+            self._retention_policies.append(RetentionPolicy(table, max_age_days, destination, batch_size))
+            self._append_log(f"Retention policy added: {table} ({max_age_days} days, {destination})")
+        else:
+            existing.max_age_days = max_age_days
+            existing.destination = destination
+            existing.batch_size = batch_size
+            self._append_log(f"Retention policy updated: {table} ({max_age_days} days, {destination})")
+        self._render_retention_policies()
+
+    def _on_remove_retention_policy(self) -> None:
+        policy = self._selected_retention_policy()
+        if policy is None:
+            return
+        self._retention_policies.remove(policy)
+        self._render_retention_policies()
+        self._append_log(f"Retention policy removed: {policy.table}")
+
+    def _on_toggle_retention_policy(self) -> None:
+        policy = self._selected_retention_policy()
+        if policy is None:
+            return
+        policy.enabled = not policy.enabled
+        self._render_retention_policies()
+        self._append_log(f"Retention policy {'enabled' if policy.enabled else 'disabled'}: {policy.table}")
+
+    def _on_browse_archive_dir(self) -> None:
+        from tkinter import filedialog
+
+        selected = filedialog.askdirectory(initialdir=self.retention_dir_var.get() or ".")
+        if selected:
+            self.retention_dir_var.set(selected)
+            self._append_log(f"Retention archive directory set: {selected}")
+
+    def _retention_options(self) -> RetentionOptions:
+        from retention import RetentionOptions
+
+        try:
+            sleep_seconds = float(self.retention_sleep_var.get().strip() or "0")
+        except ValueError:
+            raise ValueError("Retention sleep must be a number of seconds.") from None
+        if sleep_seconds < 0:
+            raise ValueError("Retention sleep cannot be negative.")
+        options = self._apply_options()
+        return RetentionOptions(
+            archive_dir=self.retention_dir_var.get().strip(),
+            sleep_seconds=sleep_seconds,
+            lock_timeout_ms=options.lock_timeout_ms,
+            max_retries=options.max_retries,
+        )
+
+    def _run_retention(self, dry_run: bool, error_title: str, error_prefix: str) -> None:
+        from dialects import dialect_for_url
+        from retention import run_retention
+
+        try:
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("Retention")
+            policies = [policy for policy in self._retention_policies if policy.enabled]
+            if not policies:
+                raise ValueError("No enabled retention policies.")
+            options = self._retention_options()
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror(error_title, str(exc))
+            self._append_log(f"{error_prefix}: {exc}")
+            return
+
+        def work(ctx: JobContext):
+            return self._with_connection(
+                db_url,
+                ctx,
+                lambda conn: run_retention(
+                    conn,
+                    policies,
+                    options,
+                    dry_run=dry_run,
+                    progress=ctx.progress,
+                    cancel_check=ctx.check_cancelled,
+                ),
+                reset=True,
+            )
+
+        def on_success(results) -> None:
+            for result in results:
+                self._render_retention_result(result)
+            if not dry_run:
+                self._invalidate_catalog(db_url)
+
+        self._submit(
+            "Dry-run retention" if dry_run else "Retention",
+            work,
+            on_success=on_success,
+            error_title=error_title,
+            error_prefix=error_prefix,
+        )
+
+    def _on_run_retention(self) -> None:
+        enabled = [policy.table for policy in self._retention_policies if policy.enabled]
+        if not messagebox.askyesno(
+            "Run Retention",
+            f"Move expired rows out of {', '.join(enabled) or 'no tables'} in committed batches?\n"
+            "Audit rows are written to session_cleanup_audit.",
+        ):
+            return
+        self._run_retention(dry_run=False, error_title="Retention Failed", error_prefix="Retention failed")
+
+    def _on_dry_run_retention(self) -> None:
+        self._run_retention(dry_run=True, error_title="Dry-Run Retention Failed", error_prefix="Dry-run retention failed")
+
+    def _on_partition_table(self) -> None:
+        from dialects import dialect_for_url
+        from retention import partition_table
 
-    def _on_dry_run_sql(self) -> None:
         try:
-            self._run_custom_sql(dry_run=True)
+            db_url = self._validate_db_url()
+            dialect_for_url(db_url).require("Partitioning")
+            table = self.retention_table_var.get().strip() or "heartbeats"
+            period = self.partition_period_var.get().strip()
+            try:
+                premake = int(self.partition_premake_var.get().strip() or "0")
+            except ValueError:
+                raise ValueError("Premake must be a whole number of partitions.") from None
+            if premake < 1:
+                raise ValueError("Premake must be at least 1.")
+            options = self._retention_options()
         except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("Dry-Run SQL Failed", str(exc))
-            self._append_log(f"Dry-run SQL failed: {exc}")
+            messagebox.showerror("Partition Table Failed", str(exc))
+            self._append_log(f"Partition table failed: {exc}")
+            return
+        if not messagebox.askyesno(
+            "Partition Table",
+            f"Convert {table} to {period} range partitions on created_at?\n"
+            f"Existing rows stay in {table}_legacy until it ages out; the swap takes a brief exclusive lock.",
+        ):
+            return
+
+        def on_success(partitions) -> None:
+            self._append_log(f"{table} partitioned: {', '.join(partitions)}")
+            self._invalidate_catalog(db_url)
+
+        self._submit(
+            f"Partition {table}",
+            lambda ctx: self._with_connection(
+                db_url,
+                ctx,
+                lambda conn: partition_table(
+                    conn,
+                    table,
+                    period,
+                    premake,
+                    options,
+                    progress=ctx.progress,
+                    cancel_check=ctx.check_cancelled,
+                ),
+                reset=True,
+            ),
+            on_success=on_success,
+            error_title="Partition Table Failed",
+            error_prefix="Partition table failed",
+        )
 
 
 def run() -> None: